@@ -5,15 +5,23 @@ import torch
 import numpy as np
 from PIL import Image
 import cv2
-import torchvision.transforms as transforms
+import threading
+import time
+from backend.app.ai.face.exported import load_embedder_model, apply_exported_mtcnn_nets, INPUT_SHAPE
+from backend.app.ai.inference_runtime import apply_inference_threads
 
 class ArcfaceEmbedder:
-    def __init__(self, device=None):
+    def __init__(self, device=None, backend=None):
         self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
         
-        # Load model FaceNet (vggface2)
-        print(f"Loading FaceNet model on {self.device}...")
-        self.model = InceptionResnetV1(pretrained='vggface2').eval().to(self.device)
+        # Ưu tiên model đã export (TorchScript / ONNX), không có thì load FaceNet eager (vggface2)
+        exported = load_embedder_model(self.device, backend)
+        if exported:
+            self.backend, self.model = exported
+        else:
+            self.backend = "eager"
+            self.model = InceptionResnetV1(pretrained='vggface2').eval().to(self.device)
+        print(f"Loading FaceNet model on {self.device} (backend={self.backend})...")
         
         # MTCNN để detect và lấy landmarks
         self.mtcnn = MTCNN(
@@ -23,12 +31,21 @@ class ArcfaceEmbedder:
             device=self.device,
             post_process=False
         )
+        apply_exported_mtcnn_nets(self.mtcnn, self.device)
 
-        # Transform chuẩn hóa
-        self.transform = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.5, 0.5, 0.5], std=[0.5, 0.5, 0.5])
-        ])
+    def warmup(self, runs=3):
+        """
+        Chạy vài lượt giả trước khi nhận request thật: TorchScript tối ưu graph ở các lượt đầu,
+        onnxruntime / oneDNN cấp phát bộ nhớ -> request đầu tiên không bị chậm. Trả về ms của lượt cuối.
+        """
+        dummy = torch.zeros(INPUT_SHAPE, device=self.device)
+        elapsed = 0.0
+        with torch.no_grad():
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                self.model(dummy)
+                elapsed = (time.perf_counter() - t0) * 1000
+        return elapsed
 
     def align_face(self, img_np, box, landmarks):
         """
@@ -62,19 +79,13 @@ class ArcfaceEmbedder:
         aligned_face = cv2.warpAffine(img_np, M, (160, 160), flags=cv2.INTER_CUBIC)
         return aligned_face
 
-    def get_face_image(self, img_input):
+    def get_face_rgb(self, img_rgb):
         """
-        Input: PIL Image hoặc Numpy Array (BGR)
-        Output: Ảnh mặt đã crop và align (PIL Image 160x160) hoặc None
+        Input: Numpy Array RGB (H x W x 3)
+        Output: Ảnh mặt lớn nhất đã crop và align (Numpy RGB 160x160) hoặc None
+        (detect + align trực tiếp trên 1 buffer RGB, không đổi qua lại PIL / BGR)
         """
-        if isinstance(img_input, np.ndarray):
-            img_pil = Image.fromarray(cv2.cvtColor(img_input, cv2.COLOR_BGR2RGB))
-            img_np_bgr = img_input 
-        else:
-            img_pil = img_input
-            img_np_bgr = cv2.cvtColor(np.array(img_input), cv2.COLOR_RGB2BGR)
-
-        boxes, probs, landmarks = self.mtcnn.detect(img_pil, landmarks=True)
+        boxes, probs, landmarks = self.mtcnn.detect(img_rgb, landmarks=True)
         
         if boxes is None:
             return None
@@ -85,9 +96,58 @@ class ArcfaceEmbedder:
         box = boxes[idx]
         lm = landmarks[idx] if landmarks is not None else None
         
-        aligned_bgr = self.align_face(img_np_bgr, box, lm)
-        
-        return Image.fromarray(cv2.cvtColor(aligned_bgr, cv2.COLOR_BGR2RGB))
+        # warpAffine không phân biệt thứ tự kênh -> align thẳng trên RGB
+        return self.align_face(img_rgb, box, lm)
+
+    def get_face_image(self, img_input):
+        """
+        Input: PIL Image hoặc Numpy Array (BGR)
+        Output: Ảnh mặt đã crop và align (PIL Image 160x160) hoặc None
+        """
+        if isinstance(img_input, np.ndarray):
+            img_rgb = cv2.cvtColor(img_input, cv2.COLOR_BGR2RGB)
+        else:
+            img_rgb = np.asarray(img_input.convert("RGB"))
+
+        face_rgb = self.get_face_rgb(img_rgb)
+        return Image.fromarray(face_rgb) if face_rgb is not None else None
+
+    def faces_to_tensor(self, faces_rgb):
+        """
+        List ảnh mặt RGB uint8 (kích thước bất kỳ) -> tensor N x 3 x 160 x 160 chuẩn hóa [-1, 1]
+        (tương đương ToTensor + Normalize(0.5, 0.5)), resize thẳng vào 1 buffer numpy.
+        """
+        batch = np.empty((len(faces_rgb), 160, 160, 3), dtype=np.uint8)
+        for i, face in enumerate(faces_rgb):
+            h, w = face.shape[:2]
+            if (h, w) == (160, 160):
+                batch[i] = face
+            else:
+                # thu nhỏ: INTER_AREA (chống răng cưa); phóng to: INTER_CUBIC
+                interp = cv2.INTER_AREA if h * w > 160 * 160 else cv2.INTER_CUBIC
+                cv2.resize(face, (160, 160), dst=batch[i], interpolation=interp)
+        tensor = torch.from_numpy(batch).to(self.device).permute(0, 3, 1, 2).float()
+        return tensor.div_(127.5).sub_(1.0)
+
+    def get_embeddings_from_rgb(self, faces_rgb):
+        """
+        Input: list ảnh mặt đã crop (Numpy RGB, có thể là view của khung hình)
+        Output: ma trận embedding N x 512 (đã chuẩn hóa L2) - 1 lần forward cho cả khung hình
+        """
+        if len(faces_rgb) == 0:
+            return np.empty((0, 512), dtype=np.float32)
+
+        with torch.no_grad():
+            embs = self.model(self.faces_to_tensor(faces_rgb)).cpu().numpy().reshape(len(faces_rgb), -1)
+
+        norms = np.linalg.norm(embs, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embs / norms
+
+    def get_embedding_from_rgb(self, face_rgb):
+        if face_rgb is None:
+            return None
+        return self.get_embeddings_from_rgb([face_rgb])[0]
 
     # --- ĐÃ SỬA: Đổi tên từ embed -> get_embedding_from_pil ---
     def get_embedding_from_pil(self, face_pil):
@@ -97,19 +157,7 @@ class ArcfaceEmbedder:
         """
         if face_pil is None:
             return None
-            
-        if face_pil.size != (160, 160):
-            face_pil = face_pil.resize((160, 160))
-
-        face_tensor = self.transform(face_pil).unsqueeze(0).to(self.device)
-        
-        with torch.no_grad():
-            emb = self.model(face_tensor).cpu().numpy().reshape(-1)
-        
-        norm = np.linalg.norm(emb)
-        if norm == 0:
-            return emb
-        return emb / norm
+        return self.get_embedding_from_rgb(np.asarray(face_pil.convert("RGB")))
 
     def embed_image(self, full_image):
         """Dùng hàm này nếu bạn đưa ảnh gốc (chưa crop)"""
@@ -117,4 +165,18 @@ class ArcfaceEmbedder:
         if face_processed is None:
             return None
         # Đã cập nhật dòng này gọi hàm mới
-        return self.get_embedding_from_pil(face_processed)
\ No newline at end of file
+        return self.get_embedding_from_pil(face_processed)
+
+
+# ===== SINGLETON (tạo lần đầu khi cần, dùng chung cho nhận diện + đăng ký khuôn mặt) =====
+_embedder = None
+_embedder_lock = threading.Lock()
+
+def get_arcface_embedder():
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                apply_inference_threads()   # request AI đến trước warm-up: đặt số luồng trước lần chạy đầu
+                _embedder = ArcfaceEmbedder()
+    return _embedder
@@ -0,0 +1,162 @@
+# backend/app/ai/face/calibration.py
+# Ngưỡng nhận diện riêng cho từng SV, tính từ gallery (không cần dữ liệu gán nhãn thêm):
+#   điểm "mạo danh" (impostor) của SV i = cosine giữa embedding của i và embedding của mọi SV khác
+#   -> SV có người giống (điểm mạo danh cao) cần ngưỡng cao hơn; không hạ dưới ngưỡng chung MATCH_THRESHOLD
+# Tính OFFLINE (training/calibrate_thresholds.py --db --write) bằng ma trận gallery x gallery theo khối TILE x TILE
+# (bộ nhớ cố định), lưu vào student_embeddings; lúc nạp gallery chỉ đọc lại (from_stored), không tính O(G^2).
+# Kết quả là các mảng cùng thứ tự dòng gallery: lúc so khớp chỉ cần tra thresholds[best_idx].
+
+import os
+
+import numpy as np
+
+from backend.config import CONFIDENCE_THRESHOLD
+
+# Ngưỡng chung (khi tắt hiệu chỉnh hoặc gallery quá ít SV để thống kê)
+MATCH_THRESHOLD = float(os.getenv("MATCH_THRESHOLD", 0.50))
+# Khoảng cho phép của ngưỡng riêng: không hạ dưới MATCH_THRESHOLD_MIN, không đòi cao hơn CONFIDENCE_THRESHOLD
+# (mặc định sàn = ngưỡng chung: hiệu chỉnh chỉ nâng ngưỡng SV có người giống, không nới cho ai)
+MATCH_THRESHOLD_MIN = float(os.getenv("MATCH_THRESHOLD_MIN", MATCH_THRESHOLD))
+MATCH_THRESHOLD_MAX = CONFIDENCE_THRESHOLD
+ADAPTIVE_THRESHOLDS = os.getenv("ADAPTIVE_THRESHOLDS", "1") == "1"
+# Ngưỡng riêng = max(mean + Z x std của điểm mạo danh, điểm mạo danh cao nhất + MARGIN)
+CALIBRATION_Z = float(os.getenv("CALIBRATION_Z", 3.0))
+CALIBRATION_MARGIN = float(os.getenv("CALIBRATION_MARGIN", 0.05))
+# Gallery ít SV hơn số này thì phân bố mạo danh không đáng tin -> dùng ngưỡng chung
+CALIBRATION_MIN_IDENTITIES = int(os.getenv("CALIBRATION_MIN_IDENTITIES", 10))
+TILE = 1024
+
+
+def normalize_rows(encodings):
+    """Chuẩn hóa L2 từng dòng (float32) - dùng chung cho calibration / gallery_audit"""
+    e = np.asarray(encodings, dtype=np.float32)
+    norms = np.linalg.norm(e, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return e / norms
+
+
+def impostor_stats(encodings, labels, rows=None, tile=TILE):
+    """
+    Thống kê điểm mạo danh của các dòng `rows` (mặc định: mọi dòng) so với các dòng khác SV.
+    Chia khối cả 2 chiều (tile x tile), cộng dồn tổng / tổng bình phương / max -> RAM không phụ thuộc G.
+    Return: (mean, std, top) - mỗi mảng dài len(rows)
+    """
+    e = normalize_rows(encodings)
+    labels = np.asarray(labels)
+    rows = np.arange(len(e)) if rows is None else np.asarray(rows, dtype=np.int64)
+
+    mean = np.zeros(len(rows), dtype=np.float32)
+    std = np.zeros(len(rows), dtype=np.float32)
+    top = np.full(len(rows), -1.0, dtype=np.float32)
+    for start in range(0, len(rows), tile):
+        r = rows[start:start + tile]
+        block, block_labels = e[r], labels[r][:, None]
+        total = np.zeros(len(r), dtype=np.float64)
+        total_sq = np.zeros(len(r), dtype=np.float64)
+        count = np.zeros(len(r), dtype=np.int64)
+        for j0 in range(0, len(e), tile):
+            sims = block @ e[j0:j0 + tile].T                          # khối tile x tile
+            other = block_labels != labels[None, j0:j0 + tile]        # bỏ chính SV đó
+            masked = np.where(other, sims, 0.0)
+            total += masked.sum(axis=1)
+            total_sq += (masked * masked).sum(axis=1)
+            count += other.sum(axis=1)
+            np.maximum(top[start:start + len(r)], np.where(other, sims, -1.0).max(axis=1),
+                       out=top[start:start + len(r)])
+        count = np.maximum(count, 1)
+        m = total / count
+        mean[start:start + len(r)] = m
+        std[start:start + len(r)] = np.sqrt(np.maximum(total_sq / count - m * m, 0.0))
+    return mean, std, top
+
+
+def thresholds_from_stats(mean, std, top):
+    """Ngưỡng riêng từng dòng từ thống kê mạo danh (đã kẹp trong [MATCH_THRESHOLD_MIN, MATCH_THRESHOLD_MAX])"""
+    thr = np.maximum(mean + CALIBRATION_Z * std, top + CALIBRATION_MARGIN)
+    return np.clip(thr, MATCH_THRESHOLD_MIN, MATCH_THRESHOLD_MAX).astype(np.float32)
+
+
+def calibrate(encodings, labels):
+    """
+    Hiệu chỉnh cả gallery.
+    labels: StudentID của từng dòng (1 SV có thể nhiều dòng embedding)
+    Return: {"thresholds", "impostor_mean", "impostor_std"} - mảng cùng thứ tự dòng gallery.
+    1 SV nhiều dòng -> cùng 1 ngưỡng (lấy ngưỡng cao nhất trong các dòng của SV đó).
+    """
+    n = len(encodings)
+    labels = np.asarray(labels)
+    if n == 0 or not ADAPTIVE_THRESHOLDS or len(np.unique(labels)) < CALIBRATION_MIN_IDENTITIES:
+        return {
+            "thresholds": np.full(n, MATCH_THRESHOLD, dtype=np.float32),
+            "impostor_mean": np.zeros(n, dtype=np.float32),
+            "impostor_std": np.ones(n, dtype=np.float32),
+        }
+
+    mean, std, top = impostor_stats(encodings, labels)
+    thr = thresholds_from_stats(mean, std, top)
+
+    _, inverse = np.unique(labels, return_inverse=True)
+    per_identity = np.full(inverse.max() + 1, -np.inf, dtype=np.float32)
+    np.maximum.at(per_identity, inverse, thr)
+
+    return {
+        "thresholds": per_identity[inverse],
+        "impostor_mean": mean,
+        "impostor_std": np.maximum(std, 1e-3),
+    }
+
+
+def from_stored(known):
+    """
+    Ngưỡng + thống kê đã tính sẵn (load_all_embeddings đọc từ student_embeddings, NaN = chưa tính)
+    -> {"thresholds", "impostor_mean", "impostor_std"}. Dòng chưa tính (SV mới đăng ký) dùng ngưỡng chung.
+    """
+    n = len(known["encodings"])
+    thr = np.asarray(known.get("stored_thresholds", np.full(n, np.nan)), dtype=np.float32)
+    mean = np.asarray(known.get("stored_impostor_mean", np.full(n, np.nan)), dtype=np.float32)
+    std = np.asarray(known.get("stored_impostor_std", np.full(n, np.nan)), dtype=np.float32)
+
+    if ADAPTIVE_THRESHOLDS:
+        # Kẹp lại theo cấu hình hiện tại (MATCH_THRESHOLD_MIN / MAX có thể đổi sau lần tính)
+        thr = np.clip(np.where(np.isnan(thr), MATCH_THRESHOLD, thr), MATCH_THRESHOLD_MIN, MATCH_THRESHOLD_MAX)
+    else:
+        thr = np.full(n, MATCH_THRESHOLD, dtype=np.float32)
+    return {
+        "thresholds": thr.astype(np.float32),
+        "impostor_mean": np.where(np.isnan(mean), 0.0, mean).astype(np.float32),
+        "impostor_std": np.where(np.isnan(std), 1.0, np.maximum(std, 1e-3)).astype(np.float32),
+    }
+
+
+def recalibrate_rows(known, rows):
+    """
+    Cập nhật ngưỡng các dòng `rows` (cùng 1 SV) sau khi embedding của chúng đổi tại chỗ:
+    chỉ tính khối rows x G, không hiệu chỉnh lại cả gallery.
+    """
+    labels = known["labels"]
+    if not ADAPTIVE_THRESHOLDS or len(np.unique(labels)) < CALIBRATION_MIN_IDENTITIES:
+        return
+    mean, std, top = impostor_stats(known["encodings"], labels, rows)
+    known["impostor_mean"][rows] = mean
+    known["impostor_std"][rows] = np.maximum(std, 1e-3)
+    known["thresholds"][rows] = thresholds_from_stats(mean, std, top).max()
+
+
+def raise_for_row(known, row, sims):
+    """
+    Dòng `row` của 1 SV vừa đổi: SV khác giờ giống dòng này hơn (sims + CALIBRATION_MARGIN > ngưỡng) -> nâng ngưỡng
+    SV đó, chỉ tính 1 dòng x G. Không hạ ngưỡng (cần điểm mạo danh cao nhất cũ -> để lần hiệu chỉnh offline sau).
+    """
+    labels = known["labels"]
+    if not ADAPTIVE_THRESHOLDS or len(np.unique(labels)) < CALIBRATION_MIN_IDENTITIES:
+        return
+    need = np.clip(sims + CALIBRATION_MARGIN, MATCH_THRESHOLD_MIN, MATCH_THRESHOLD_MAX).astype(np.float32)
+    raised = np.flatnonzero((labels != labels[row]) & (need > known["thresholds"]))
+    for label in np.unique(labels[raised]):
+        same = labels == label
+        known["thresholds"][same] = max(known["thresholds"][same].max(), need[raised][labels[raised] == label].max())
+
+
+def z_scores(scores, idx, calibration):
+    """Z-normalization: (điểm - mean mạo danh) / std mạo danh của dòng gallery idx (chỉ tra mảng)"""
+    return (scores - calibration["impostor_mean"][idx]) / calibration["impostor_std"][idx]
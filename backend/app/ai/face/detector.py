@@ -2,6 +2,9 @@ from facenet_pytorch import MTCNN
 from PIL import Image
 import torch
 import numpy as np
+import threading
+from backend.app.ai.face.exported import apply_exported_mtcnn_nets
+from backend.app.ai.inference_runtime import apply_inference_threads
 
 # Kiểm tra xem có GPU không (nếu có sẽ nhanh hơn nhiều)
 _device = 'cuda' if torch.cuda.is_available() else 'cpu'
@@ -9,42 +12,56 @@ print(f"🔹 MTCNN đang chạy trên thiết bị: {_device}")
 
 # ==========================================
 # CẤU HÌNH MTCNN (TỐI ƯU CHO WEBCAM)
+# Tạo lần đầu khi cần (get_mtcnn) thay vì lúc import -> server khởi động nhanh
 # ==========================================
-_mtcnn = MTCNN(
-    image_size=160,
-    margin=0,
-    min_face_size=40,   # Giảm xuống để bắt được mặt ở xa hơn (Mặc định 20)
-    
-    # 🔥 QUAN TRỌNG: Giảm ngưỡng nhận diện xuống
-    # Mặc định là [0.6, 0.7, 0.7]. 
-    # Giảm xuống [0.5, 0.6, 0.6] giúp nhận diện tốt hơn ở cam mờ/tối.
-    thresholds=[0.5, 0.6, 0.6], 
-    
-    factor=0.709,
-    post_process=True,
-    keep_all=True,      # Bắt tất cả các mặt trong khung hình
-    device=_device
-)
+_mtcnn = None
+_mtcnn_lock = threading.Lock()
 
-def detect_faces_rgb(pil_or_np_rgb):
+def get_mtcnn():
+    global _mtcnn
+    if _mtcnn is None:
+        with _mtcnn_lock:
+            if _mtcnn is None:
+                apply_inference_threads()   # request AI đến trước warm-up: đặt số luồng trước lần chạy đầu
+                _mtcnn = MTCNN(
+                    image_size=160,
+                    margin=0,
+                    min_face_size=40,   # Giảm xuống để bắt được mặt ở xa hơn (Mặc định 20)
+
+                    # 🔥 QUAN TRỌNG: Giảm ngưỡng nhận diện xuống
+                    # Mặc định là [0.6, 0.7, 0.7].
+                    # Giảm xuống [0.5, 0.6, 0.6] giúp nhận diện tốt hơn ở cam mờ/tối.
+                    thresholds=[0.5, 0.6, 0.6],
+
+                    factor=0.709,
+                    post_process=True,
+                    keep_all=True,      # Bắt tất cả các mặt trong khung hình
+                    device=_device
+                )
+                # P/R/O-net TorchScript (nếu đã export) thay cho bản eager
+                if apply_exported_mtcnn_nets(_mtcnn, _device):
+                    print("🔹 MTCNN dùng P/R/O-net TorchScript")
+    return _mtcnn
+
+def detect_faces_rgb(pil_or_np_rgb, landmarks=False):
     """
     Hàm phát hiện khuôn mặt.
     Input: Ảnh PIL hoặc Numpy Array (RGB)
     Output: boxes (List toạ độ), probs (Độ tin cậy)
+            + landmarks (5 điểm / mặt) nếu landmarks=True - dùng lại cho liveness, không detect lần 2
     """
-    # 1. Chuẩn hóa đầu vào thành PIL Image (MTCNN thích PIL hơn Numpy)
+    empty = (None, None, None) if landmarks else (None, None)
+    # 1. MTCNN nhận thẳng numpy RGB (H x W x 3 uint8) - không cần đổi sang PIL (thêm 1 bản copy cả khung hình)
     img_input = pil_or_np_rgb
-    if not isinstance(img_input, Image.Image):
-        try:
-            # Nếu là numpy array, convert sang PIL
-            img_input = Image.fromarray(img_input)
-        except Exception as e:
-            print(f"❌ Lỗi convert ảnh trong detector: {e}")
-            return None, None
+    if not isinstance(img_input, (Image.Image, np.ndarray)):
+        print(f"❌ Lỗi ảnh đầu vào detector: kiểu {type(img_input).__name__} không hỗ trợ")
+        return empty
 
     try:
         # 2. Gọi model để detect
-        boxes, probs = _mtcnn.detect(img_input)
+        if landmarks:
+            return get_mtcnn().detect(img_input, landmarks=True)
+        boxes, probs = get_mtcnn().detect(img_input)
         
         # --- DEBUG LOG (Xem Terminal để biết có bắt được mặt không) ---
         if boxes is not None:
@@ -58,7 +75,7 @@ def detect_faces_rgb(pil_or_np_rgb):
 
     except Exception as e:
         print(f"❌ Lỗi nghiêm trọng trong MTCNN: {e}")
-        return None, None
+        return empty
 
 def extract_face_region_rgb(rgb_frame, box):
     """
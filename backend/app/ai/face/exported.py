@@ -0,0 +1,103 @@
+# backend/app/ai/face/exported.py
+# Model đã export (TorchScript / ONNX, có bản int8) cho inference CPU nhanh hơn eager PyTorch.
+# Tạo bằng: python -m backend.app.ai.training.export_models
+#
+# EMBEDDER_BACKEND:
+#   auto (mặc định)  -> torchscript, rồi onnx (bản fp32) nếu đã export; không có thì eager
+#   eager | torchscript | torchscript_int8 | onnx | onnx_int8 -> chọn rõ (int8 chỉ dùng khi đã qua kiểm tra parity)
+# MTCNN_BACKEND: auto (mặc định, dùng P/R/O-net TorchScript nếu có) | eager
+
+import os
+from pathlib import Path
+
+import torch
+
+EXPORT_DIR = Path(os.getenv("AI_EXPORT_DIR", Path(__file__).resolve().parents[1] / "exported"))
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "auto")
+MTCNN_BACKEND = os.getenv("MTCNN_BACKEND", "auto")
+
+EMBEDDER_ARTIFACTS = {
+    "torchscript": "facenet_ts.pt",
+    "torchscript_int8": "facenet_ts_int8.pt",
+    "onnx": "facenet.onnx",
+    "onnx_int8": "facenet_int8.onnx",
+}
+# auto chỉ chọn bản fp32 (sai khác với eager ~1e-6); int8 phải chọn rõ
+AUTO_ORDER = ["torchscript", "onnx"]
+
+MTCNN_ARTIFACTS = {"pnet": "pnet_ts.pt", "rnet": "rnet_ts.pt", "onet": "onet_ts.pt"}
+
+INPUT_SHAPE = (1, 3, 160, 160)
+
+
+class OnnxModel:
+    """Bọc onnxruntime.InferenceSession để gọi như module torch: model(tensor) -> tensor"""
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x):
+        out = self.session.run(None, {self.input_name: x.detach().cpu().numpy()})[0]
+        return torch.from_numpy(out)
+
+
+def _load_artifact(name, device):
+    path = EXPORT_DIR / EMBEDDER_ARTIFACTS[name]
+    if not path.exists():
+        raise FileNotFoundError(path)
+    if name.startswith("onnx"):
+        return OnnxModel(path)
+    if name.endswith("int8") and device != "cpu":
+        raise RuntimeError("bản int8 (dynamic quantization) chỉ chạy trên CPU")
+    model = torch.jit.load(str(path), map_location=device)
+    model.eval()
+    if name == "torchscript" and device == "cpu":
+        # Gộp Conv+BN, chuyển sang MKLDNN... lúc nạp (không lưu được vào file);
+        # optimize_for_inference chưa hỗ trợ hết op quantized nên bỏ qua bản int8
+        try:
+            model = torch.jit.optimize_for_inference(model)
+        except Exception as e:
+            print(f"⚠️ optimize_for_inference lỗi: {e} -> dùng TorchScript đã freeze")
+    return model
+
+
+def load_embedder_model(device, backend=None):
+    """
+    Trả về (tên backend, model) - model gọi được như model(tensor Nx3x160x160) -> tensor Nx512.
+    Không có / lỗi artifact -> None (caller dùng eager InceptionResnetV1).
+    """
+    backend = backend or EMBEDDER_BACKEND
+    if backend == "eager":
+        return None
+    candidates = AUTO_ORDER if backend == "auto" else [backend]
+    for name in candidates:
+        try:
+            return name, _load_artifact(name, device)
+        except FileNotFoundError:
+            if backend != "auto":
+                print(f"⚠️ Chưa export {EMBEDDER_ARTIFACTS[name]} trong {EXPORT_DIR} -> dùng eager")
+        except Exception as e:
+            print(f"⚠️ Không nạp được backend {name}: {e} -> thử tiếp / dùng eager")
+    return None
+
+
+def apply_exported_mtcnn_nets(mtcnn, device):
+    """Thay P/R/O-net eager của 1 MTCNN (facenet_pytorch) bằng bản TorchScript nếu đã export"""
+    if MTCNN_BACKEND == "eager":
+        return False
+    paths = {attr: EXPORT_DIR / fname for attr, fname in MTCNN_ARTIFACTS.items()}
+    if not all(p.exists() for p in paths.values()):
+        return False
+    try:
+        nets = {attr: torch.jit.load(str(p), map_location=device).eval() for attr, p in paths.items()}
+    except Exception as e:
+        print(f"⚠️ Không nạp được MTCNN TorchScript: {e} -> dùng eager")
+        return False
+    for attr, net in nets.items():
+        setattr(mtcnn, attr, net)
+    return True
@@ -4,7 +4,33 @@ import torch
 from PIL import Image
 from facenet_pytorch import MTCNN
 import collections
-import torchvision.transforms as transforms
+import threading
+import time
+import itertools
+
+
+# Kích thước chuẩn hóa crop khi chấm texture: điểm không phụ thuộc mặt to / nhỏ, và xếp được thành 1 batch
+TEXTURE_SIZE = 112
+# Kích thước đầu vào model anti-spoof
+ANTI_SPOOF_SIZE = 128
+# Khung hình sau ghép vào track cũ nếu tâm mặt lệch < TRACK_MATCH_RATIO x kích thước mặt
+TRACK_MATCH_RATIO = 0.5
+# Track không thấy lại sau TRACK_TTL giây thì bỏ (người rời khung hình / camera khác dừng)
+TRACK_TTL = 3.0
+
+
+class _Track:
+    """Lịch sử landmark + điểm của 1 khuôn mặt qua nhiều khung hình"""
+
+    def __init__(self, track_id, window_size, smooth_windows):
+        self.id = track_id
+        self.nose_hist = collections.deque(maxlen=window_size)
+        self.eye_hist = collections.deque(maxlen=window_size)
+        self.conf_hist = collections.deque(maxlen=smooth_windows)
+        self.center = None
+        self.size = 0.0
+        self.last_seen = 0.0
+        self.frames = 0
 
 
 class FakeDetector:
@@ -19,75 +45,116 @@ class FakeDetector:
 
         self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
 
-        self.mtcnn = MTCNN(keep_all=False, device=self.device, post_process=False)
+        # MTCNN riêng chỉ cần cho process_frame (ảnh chưa detect); nhận diện truyền sẵn box + landmark
+        self._mtcnn = None
 
         self.anti_spoof_model = None
         if anti_spoof_model_path:
-            model = torch.load(anti_spoof_model_path, map_location=self.device)
+            # file lưu nguyên module (torch.save(model)) -> cần weights_only=False từ torch 2.6
+            model = torch.load(anti_spoof_model_path, map_location=self.device, weights_only=False)
             model.eval()
             self.anti_spoof_model = model
 
+        # Buffer crop (numpy) + tensor đầu vào cấp sẵn, riêng từng thread của pool inference,
+        # chỉ cấp lại khi khung hình có nhiều mặt hơn dung lượng hiện có
+        self._buffers = threading.local()
+
         self.w_a = w_a
         self.w_b = w_b
         self.W = window_size
         self.smooth_W = smooth_windows
         self.TH = threshold_real
 
-        self.nose_hist = collections.deque(maxlen=self.W)
-        self.eye_hist = collections.deque(maxlen=self.W)
-        self.conf_hist = collections.deque(maxlen=150)
+        # source (camera / lớp) -> danh sách track đang theo dõi
+        self._tracks = {}
+        self._track_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def mtcnn(self):
+        if self._mtcnn is None:
+            self._mtcnn = MTCNN(keep_all=False, device=self.device, post_process=False)
+        return self._mtcnn
 
     # -----------------------
-    # Anti-spoof score
+    # Anti-spoof score (cả batch)
     # -----------------------
-    def score_frame_anti_spoof(self, frame, box):
-        x1, y1, x2, y2 = box
-        crop = frame[y1:y2, x1:x2]
+    def _buffer(self, name, shape, alloc):
+        """Buffer thread-local dùng lại giữa các khung hình; dung lượng (chiều 0) tăng gấp đôi khi thiếu"""
+        buf = getattr(self._buffers, name, None)
+        if buf is None or buf.shape[0] < shape[0]:
+            capacity = max(8, 1 << (shape[0] - 1).bit_length())
+            buf = alloc((capacity,) + tuple(shape[1:]))
+            setattr(self._buffers, name, buf)
+        return buf[:shape[0]]
 
-        # nếu có model anti-spoof
+    def _crops(self, frame, boxes, size):
+        """Crop + resize về size x size cho mọi box vào buffer cấp sẵn. Trả về (batch uint8 Nxsxsx3, chỉ số box hợp lệ)"""
+        h, w = frame.shape[:2]
+        out = self._buffer(f"crops_{size}", (len(boxes), size, size, 3), lambda s: np.empty(s, dtype=np.uint8))
+        valid = []
+        for i, box in enumerate(boxes):
+            x1, y1, x2, y2 = [int(v) for v in box]
+            x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            cv2.resize(frame[y1:y2, x1:x2], (size, size), dst=out[len(valid)], interpolation=cv2.INTER_AREA)
+            valid.append(i)
+        if not valid:
+            return None, valid
+        return out[:len(valid)], valid
+
+    def _anti_spoof_input(self, batch, rgb=False):
+        """Crop uint8 Nx128x128x3 -> tensor RGB Nx3x128x128 chuẩn hóa [-1, 1] (như Normalize(0.5, 0.5)) trong buffer cấp sẵn"""
+        x = self._buffer("anti_spoof_input", (len(batch), 3, ANTI_SPOOF_SIZE, ANTI_SPOOF_SIZE),
+                         lambda s: torch.empty(s, dtype=torch.float32, device=self.device))
+        src = torch.from_numpy(batch).to(self.device).permute(0, 3, 1, 2)   # N x C x H x W (uint8)
+        x.copy_(src if rgb else src.flip(1))                                 # BGR -> RGB, đổi sang float khi copy
+        return x.div_(127.5).sub_(1.0)
+
+    def score_anti_spoof_batch(self, frame, boxes, rgb=False):
+        """Điểm anti-spoof (0..1) cho mọi box trong 1 lượt; box lỗi (ngoài khung hình) = 0. rgb: frame là RGB (không phải BGR)"""
+        scores = np.zeros(len(boxes), dtype=np.float32)
+
+        # nếu có model anti-spoof: 1 lần forward cho cả batch
         if self.anti_spoof_model:
-            img = Image.fromarray(crop[:, :, ::-1])
-            trans = transforms.Compose([
-                transforms.Resize((128,128)),
-                transforms.ToTensor(),
-                transforms.Normalize([0.5]*3, [0.5]*3)
-            ])
-            x = trans(img).unsqueeze(0).to(self.device)
+            batch, valid = self._crops(frame, boxes, ANTI_SPOOF_SIZE)
+            if batch is None:
+                return scores
+            x = self._anti_spoof_input(batch, rgb)
             with torch.no_grad():
                 out = self.anti_spoof_model(x)
+            scores[valid] = torch.sigmoid(out).reshape(len(valid), -1)[:, 0].cpu().numpy()
+            return np.clip(scores, 0, 1)
 
-            score = torch.sigmoid(out).item()
-            return float(np.clip(score, 0, 1))
-
-        # fallback texture
-        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
-        lap = cv2.Laplacian(gray, cv2.CV_64F).var()
-        col = np.var(crop.astype(np.float32) / 255.0)
+        # fallback texture: Laplacian variance (độ nét / vân da) + color variance, vector hóa trên cả batch
+        batch, valid = self._crops(frame, boxes, TEXTURE_SIZE)
+        if batch is None:
+            return scores
+        pixels = batch.astype(np.float32)
+        weights = [0.299, 0.587, 0.114] if rgb else [0.114, 0.587, 0.299]
+        gray = pixels @ np.array(weights, dtype=np.float32)  # -> gray như cv2
+        lap = (gray[:, :-2, 1:-1] + gray[:, 2:, 1:-1] + gray[:, 1:-1, :-2] + gray[:, 1:-1, 2:]
+               - 4.0 * gray[:, 1:-1, 1:-1])
+        n = len(valid)
+        lap_var = lap.reshape(n, -1).var(axis=1)
+        col = (pixels / 255.0).reshape(n, -1).var(axis=1)
 
-        s1 = np.tanh(lap / 80)
+        s1 = np.tanh(lap_var / 80)
         s2 = np.tanh(col * 4)
-        return float(np.clip(0.6 * s1 + 0.4 * s2, 0, 1))
+        scores[valid] = np.clip(0.6 * s1 + 0.4 * s2, 0, 1)
+        return scores
 
     # -----------------------
-    def update_landmarks(self, lm):
-        if lm is None:
-            self.nose_hist.append((0, 0))
-            self.eye_hist.append((0, 0))
-            return
-
-        left, right, nose, *_ = lm
-        mid = (left + right) / 2.0
-
-        self.nose_hist.append(tuple(nose))
-        self.eye_hist.append(tuple(mid))
-
+    # Motion score (theo từng track)
     # -----------------------
-    def score_motion(self):
-        if len(self.nose_hist) < 4:
+    @staticmethod
+    def score_motion(nose_hist, eye_hist):
+        if len(nose_hist) < 4:
             return 0.0
 
-        nose = np.array(self.nose_hist)
-        eye = np.array(self.eye_hist)
+        nose = np.array(nose_hist)
+        eye = np.array(eye_hist)
 
         head_std = np.std(nose, axis=0).mean()
         head_score = np.tanh(head_std / 8.0)
@@ -100,33 +167,92 @@ class FakeDetector:
         return float(0.7 * head_score + 0.3 * blink_score)
 
     # -----------------------
-    def process_frame(self, frame):
+    # Ghép box vào track
+    # -----------------------
+    def _assign_tracks(self, source, boxes, now):
+        """Ghép mỗi box với track gần nhất cùng source (tham lam theo khoảng cách tâm), box mới -> track mới"""
+        tracks = [t for t in self._tracks.get(source, []) if now - t.last_seen <= TRACK_TTL]
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2.0
+        sizes = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+
+        assigned = [None] * len(boxes)
+        if tracks:
+            track_centers = np.array([t.center for t in tracks], dtype=np.float32)
+            dist = np.linalg.norm(centers[:, None, :] - track_centers[None, :, :], axis=2)
+            used = set()
+            for flat in np.argsort(dist, axis=None):
+                b, t = divmod(int(flat), len(tracks))
+                if assigned[b] is not None or t in used:
+                    continue
+                if dist[b, t] > TRACK_MATCH_RATIO * max(sizes[b], tracks[t].size):
+                    continue
+                assigned[b] = tracks[t]
+                used.add(t)
+
+        for b in range(len(boxes)):
+            if assigned[b] is None:
+                assigned[b] = _Track(next(self._track_ids), self.W, self.smooth_W)
+                tracks.append(assigned[b])
+            track = assigned[b]
+            track.center = centers[b]
+            track.size = float(sizes[b])
+            track.last_seen = now
+            track.frames += 1
+
+        self._tracks[source] = tracks
+        # Bỏ hẳn source không còn track sống (camera đã tắt)
+        for key in [k for k, ts in self._tracks.items() if all(now - t.last_seen > TRACK_TTL for t in ts)]:
+            del self._tracks[key]
+        return assigned
+
+    # -----------------------
+    def score_faces(self, frame, boxes, landmarks=None, source="default", rgb=False):
+        """
+        Liveness cho mọi khuôn mặt trong 1 khung hình, dùng lại box + landmark của bước detect nhận diện.
+        frame: ảnh BGR (RGB nếu rgb=True); boxes: Nx4; landmarks: Nx5x2 hoặc None;
+        source: id camera / lớp (mỗi source có track riêng).
+        Output: list (cùng thứ tự boxes) {is_real, real_conf, score_a, score_b, track_id, frames}
+        """
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        anti = self.score_anti_spoof_batch(frame, boxes, rgb)
+
+        results = []
+        with self._lock:
+            tracks = self._assign_tracks(source, boxes, time.monotonic())
+            for i, track in enumerate(tracks):
+                lm = landmarks[i] if landmarks is not None else None
+                if lm is not None:
+                    left, right, nose, *_ = lm
+                    track.nose_hist.append(tuple(nose))
+                    track.eye_hist.append(tuple((left + right) / 2.0))
+
+                motion = self.score_motion(track.nose_hist, track.eye_hist)
+                conf = self.w_a * float(anti[i]) + self.w_b * motion
+                track.conf_hist.append(conf)
+                smooth = float(np.mean(track.conf_hist))
+
+                results.append({
+                    "is_real": bool(smooth >= self.TH),
+                    "real_conf": smooth,
+                    "score_a": float(anti[i]),
+                    "score_b": float(motion),
+                    "track_id": track.id,
+                    "frames": track.frames
+                })
+        return results
+
+    # -----------------------
+    def process_frame(self, frame, source="process_frame"):
+        """Ảnh chưa detect: tự detect 1 mặt (lớn nhất) rồi chấm như score_faces"""
         img = Image.fromarray(frame[:, :, ::-1])
 
         boxes, probs, landmarks = self.mtcnn.detect(img, landmarks=True)
 
         if boxes is None:
-            self.update_landmarks(None)
-            anti = 0.0
-            motion = self.score_motion()
-        else:
-            box = [int(x) for x in boxes[0]]
-            lm = landmarks[0] if landmarks is not None else None
-
-            self.update_landmarks(lm)
-
-            anti = self.score_frame_anti_spoof(frame, box)
-            motion = self.score_motion()
-
-        conf = self.w_a * anti + self.w_b * motion
-        self.conf_hist.append(conf)
-
-        smooth = np.mean(list(self.conf_hist)[-self.smooth_W:])
-        is_real = smooth >= self.TH
-
-        return {
-            "is_real": bool(is_real),
-            "real_conf": float(smooth),
-            "score_a": float(anti),
-            "score_b": float(motion)
-        }
+            return {"is_real": False, "real_conf": 0.0, "score_a": 0.0, "score_b": 0.0}
+
+        res = self.score_faces(frame, boxes[:1], landmarks[:1] if landmarks is not None else None, source)[0]
+        return {k: res[k] for k in ("is_real", "real_conf", "score_a", "score_b")}
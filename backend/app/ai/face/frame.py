@@ -0,0 +1,154 @@
+# backend/app/ai/face/frame.py
+# 1 khung hình = 1 buffer RGB uint8 (H x W x 3) dùng suốt pipeline nhận diện:
+#   decode 1 lần -> MTCNN detect trực tiếp trên numpy -> crop là view (không copy) -> tensor chuẩn hóa từ numpy
+# thay cho chuỗi BGR -> RGB -> PIL -> crop -> PIL -> resize -> tensor ở mỗi request.
+#
+# Ảnh upload lớn (ảnh điện thoại 12MP) được decode thu nhỏ 1/2, 1/4, 1/8 ngay trong bộ giải mã JPEG
+# (IMREAD_REDUCED_*, không decode đủ rồi resize) cho bước detect; chỉ khi có mặt quá nhỏ mới decode
+# lại ảnh gốc để cắt vùng mặt đủ nét cho embedding.
+
+import io
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# OpenCV >= 4.10 decode thẳng ra RGB (không cần cvtColor cả khung hình)
+_IMREAD_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
+_IMREAD_REDUCED = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+# Cạnh dài tối thiểu của ảnh dùng để detect (ảnh lớn hơn nhiều lần thì decode thu nhỏ); 0 = luôn decode đủ
+DETECT_MAX_SIDE = int(os.getenv("DETECT_MAX_SIDE", 1280))
+# Mặt nhỏ hơn cỡ này (px, trong ảnh đã thu nhỏ) -> cắt lại từ ảnh gốc (đầu vào FaceNet là 160x160)
+FULLRES_FACE_SIZE = int(os.getenv("FULLRES_FACE_SIZE", 160))
+
+RAW_FORMATS = ("raw", "rgb", "raw_rgb")
+
+
+def _decode_full_rgb(data):
+    buf = np.frombuffer(data, np.uint8)
+    if _IMREAD_RGB is not None:
+        return cv2.imdecode(buf, _IMREAD_RGB)
+    bgr = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB) if bgr is not None else None
+
+
+def image_size(data):
+    """(width, height) đọc từ header ảnh (PIL chỉ đọc header, chưa giải mã điểm ảnh); None nếu không nhận ra"""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def reduction_for(size, max_side=DETECT_MAX_SIDE):
+    """Hệ số thu nhỏ lớn nhất (8, 4, 2) mà cạnh dài sau thu nhỏ vẫn >= max_side; 1 = decode đủ"""
+    if not size or max_side <= 0:
+        return 1
+    long_side = max(size)
+    for r in (8, 4, 2):
+        if long_side / r >= max_side:
+            return r
+    return 1
+
+
+class Frame:
+    __slots__ = ("rgb", "scale", "_data", "_full")
+
+    def __init__(self, rgb, scale=1.0, data=None):
+        self.rgb = np.ascontiguousarray(rgb, dtype=np.uint8)
+        self.scale = scale   # toạ độ ảnh gốc = toạ độ trong rgb x scale
+        self._data = data    # bytes ảnh gốc (để decode lại độ phân giải đủ khi cần)
+        self._full = None
+
+    @classmethod
+    def from_bgr(cls, bgr):
+        return cls(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+
+    @classmethod
+    def from_raw_rgb(cls, data, width, height):
+        """Bytes RGB thô (width x height x 3) -> Frame, không copy (mảng chỉ đọc)"""
+        expected = width * height * 3
+        if width <= 0 or height <= 0 or len(data) != expected:
+            raise ValueError(f"Ảnh RGB thô cần đúng {width}x{height}x3 = {expected} bytes, nhận {len(data)}")
+        return cls(np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3))
+
+    @classmethod
+    def decode(cls, data, max_side=DETECT_MAX_SIDE):
+        """
+        JPEG / PNG / WebP -> Frame (None nếu không đọc được).
+        Ảnh có cạnh dài >= 2 x max_side được decode thu nhỏ (JPEG: libjpeg bỏ bớt hệ số DCT, nhanh hơn nhiều lần).
+        """
+        size = image_size(data)
+        r = reduction_for(size, max_side)
+        if r > 1:
+            bgr = cv2.imdecode(np.frombuffer(data, np.uint8), _IMREAD_REDUCED[r])
+            if bgr is not None:
+                # scale tính từ kích thước thật (ảnh lẻ pixel, ảnh xoay theo EXIF)
+                return cls(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB), scale=max(size) / max(bgr.shape[:2]), data=data)
+        rgb = _decode_full_rgb(data)
+        return cls(rgb) if rgb is not None else None
+
+    @property
+    def height(self):
+        return self.rgb.shape[0]
+
+    @property
+    def width(self):
+        return self.rgb.shape[1]
+
+    def crop(self, box):
+        """View (không copy) vùng box [x1, y1, x2, y2] đã cắt theo biên ảnh; None nếu rỗng"""
+        x1, y1, x2, y2 = [int(v) for v in box]
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.width, x2), min(self.height, y2)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return self.rgb[y1:y2, x1:x2]
+
+    @property
+    def full_rgb(self):
+        """Ảnh độ phân giải gốc (decode lần đầu khi cần, giữ lại cho các mặt khác cùng khung hình)"""
+        if self.scale == 1.0 or self._data is None:
+            return self.rgb
+        if self._full is None:
+            self._full = _decode_full_rgb(self._data)
+        return self._full
+
+    def to_source(self, box):
+        """Box trong rgb -> box trong ảnh gốc (trả về client để vẽ khung)"""
+        return [float(v) * self.scale for v in box]
+
+    def face_crop(self, box, min_size=FULLRES_FACE_SIZE):
+        """
+        Vùng mặt để embedding: mặt đủ lớn -> view trong ảnh đã thu nhỏ;
+        mặt nhỏ (< min_size px) trong ảnh thu nhỏ -> cắt từ ảnh gốc (nét hơn, tránh phóng to ảnh mờ).
+        """
+        x1, y1, x2, y2 = [float(v) for v in box]
+        if self.scale == 1.0 or self._data is None or min(x2 - x1, y2 - y1) >= min_size:
+            return self.crop(box)
+        full = self.full_rgb
+        if full is None:
+            return self.crop(box)
+        fx1, fy1, fx2, fy2 = [int(v) for v in self.to_source(box)]
+        h, w = full.shape[:2]
+        fx1, fy1, fx2, fy2 = max(0, fx1), max(0, fy1), min(w, fx2), min(h, fy2)
+        if fx2 <= fx1 or fy2 <= fy1:
+            return None
+        return full[fy1:fy2, fx1:fx2]
+
+
+def decode_upload(data, image_format=None, width=None, height=None):
+    """
+    Ảnh upload -> Frame.
+    image_format: None / "jpeg" / "webp" / "png" (tự nhận theo nội dung) hoặc "raw_rgb" (kèm width, height).
+    Ảnh nén lớn được decode thu nhỏ cho detect (xem Frame.decode).
+    Trả về None nếu không decode được; ValueError nếu ảnh thô sai kích thước.
+    """
+    if image_format and image_format.lower() in RAW_FORMATS:
+        if not width or not height:
+            raise ValueError("Ảnh RGB thô cần kèm width và height")
+        return Frame.from_raw_rgb(data, int(width), int(height))
+    return Frame.decode(data)
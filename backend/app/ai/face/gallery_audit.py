@@ -0,0 +1,151 @@
+# backend/app/ai/face/gallery_audit.py
+# Kiểm tra gallery: tìm các cặp embedding của 2 SV KHÁC NHAU gần như trùng nhau
+# (1 ảnh đăng ký cho 2 SV, sinh đôi, người rất giống) -> dễ điểm danh nhầm người.
+#   - so mọi cặp theo khối TILE x TILE ở nửa trên ma trận (bộ nhớ cố định, mỗi cặp tính 1 lần)
+#   - các SV có mặt trong 1 cặp -> "tập xung đột": khi so khớp, mặt khớp SV trong tập này phải
+#     cách SV khác gần nhất ít nhất CONFLICT_MARGIN mới được nhận
+#   - O(G^2) nên không chạy lúc nạp gallery: training/audit_gallery.py --write (hoặc /gallery-audit?refresh=true)
+#     lưu tập xung đột vào student_embeddings.AuditConflict, gallery chỉ đọc lại (conflict_from_stored)
+
+import os
+
+import numpy as np
+
+from backend.app.ai.face.calibration import normalize_rows
+
+# Cặp khác SV có cosine >= ngưỡng này thì báo cáo + đưa vào tập xung đột
+AUDIT_PAIR_THRESHOLD = float(os.getenv("AUDIT_PAIR_THRESHOLD", 0.75))
+# Từ ngưỡng này coi là trùng ảnh (cùng 1 ảnh đăng ký cho 2 SV) thay vì chỉ giống nhau
+AUDIT_DUPLICATE_THRESHOLD = float(os.getenv("AUDIT_DUPLICATE_THRESHOLD", 0.97))
+# Chênh lệch tối thiểu giữa SV khớp nhất và SV khác gần nhất, cho SV trong tập xung đột
+CONFLICT_MARGIN = float(os.getenv("CONFLICT_MARGIN", 0.10))
+TILE = 1024
+
+
+def find_similar_pairs(encodings, labels, threshold=AUDIT_PAIR_THRESHOLD, tile=TILE):
+    """
+    Mọi cặp dòng (a < b) khác SV có cosine >= threshold.
+    Return: (rows_a, rows_b, sims) - sắp theo độ giống giảm dần
+    """
+    e = normalize_rows(encodings)
+    labels = np.asarray(labels)
+    n = len(e)
+    found_a, found_b, found_s = [], [], []
+
+    for i0 in range(0, n, tile):
+        block = e[i0:i0 + tile]
+        for j0 in range(i0, n, tile):
+            sims = block @ e[j0:j0 + tile].T          # khối tile x tile
+            hit = sims >= threshold
+            if j0 == i0:
+                hit = np.triu(hit, k=1)               # khối trên đường chéo: bỏ (a, a) và cặp lặp (b, a)
+            ii, jj = np.nonzero(hit)
+            if not len(ii):
+                continue
+            ra, rb = ii + i0, jj + j0
+            other = labels[ra] != labels[rb]
+            found_a.append(ra[other])
+            found_b.append(rb[other])
+            found_s.append(sims[ii[other], jj[other]])
+
+    if not found_a:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    rows_a, rows_b, sims = np.concatenate(found_a), np.concatenate(found_b), np.concatenate(found_s)
+    order = np.argsort(-sims)
+    return rows_a[order], rows_b[order], sims[order]
+
+
+def conflict_mask(labels, rows_a, rows_b):
+    """Mask các dòng gallery thuộc SV có trong ít nhất 1 cặp (mọi dòng của SV đó)"""
+    labels = np.asarray(labels)
+    involved = np.unique(np.concatenate([labels[rows_a], labels[rows_b]]))
+    return np.isin(labels, involved)
+
+
+def _pair_info(meta, a, b, s):
+    ma, mb = meta[a], meta[b]
+    return {
+        "similarity": round(float(s), 4),
+        "kind": "duplicate" if s >= AUDIT_DUPLICATE_THRESHOLD else "lookalike",
+        "a": {"id": ma.get("id"), "name": ma.get("name"), "code": ma.get("code"),
+              "embedding_id": ma.get("embedding_id")},
+        "b": {"id": mb.get("id"), "name": mb.get("name"), "code": mb.get("code"),
+              "embedding_id": mb.get("embedding_id")},
+    }
+
+
+def audit_gallery(known, threshold=AUDIT_PAIR_THRESHOLD):
+    """
+    Kiểm tra cả gallery {"encodings", "meta", "labels"}.
+    Return: {"audit_pairs": list dict (cặp đáng ngờ, giống nhất lên đầu), "conflict": mask dòng gallery}
+    """
+    labels = known["labels"]
+    rows_a, rows_b, sims = find_similar_pairs(known["encodings"], labels, threshold)
+
+    pairs = [_pair_info(known["meta"], a, b, s) for a, b, s in zip(rows_a, rows_b, sims)]
+    if pairs:
+        print(f"⚠️ Gallery audit: {len(pairs)} cặp SV khác nhau giống >= {threshold}")
+    return {"audit_pairs": pairs, "conflict": conflict_mask(labels, rows_a, rows_b)}
+
+
+def update_row(known, row, sims, threshold=AUDIT_PAIR_THRESHOLD):
+    """
+    Embedding dòng `row` vừa đổi tại chỗ (cập nhật mẫu): sửa audit_pairs / conflict theo 1 dòng x G.
+    sims: cosine của dòng mới với mọi dòng gallery.
+    Có audit_pairs -> bỏ cặp cũ của dòng này, thêm cặp mới, tính lại tập xung đột từ danh sách cặp;
+    chưa có (chỉ có tập đã lưu) -> chỉ thêm SV vào tập xung đột, không bỏ ai (bỏ cần kiểm tra lại cả gallery).
+    """
+    labels = known["labels"]
+    hit = np.flatnonzero((sims >= threshold) & (labels != labels[row]))
+    hit = hit[np.argsort(-sims[hit])]
+
+    pairs = known.get("audit_pairs")
+    if pairs is None:
+        conflict = known["conflict"].copy()
+        if len(hit):
+            conflict |= np.isin(labels, np.append(labels[hit], labels[row]))
+    else:
+        embedding_id = known["meta"][row].get("embedding_id")
+        pairs = [p for p in pairs if embedding_id not in (p["a"]["embedding_id"], p["b"]["embedding_id"])]
+        pairs.extend(_pair_info(known["meta"], row, other, sims[other]) for other in hit)
+        pairs.sort(key=lambda p: -p["similarity"])
+        involved = [p[side]["id"] for p in pairs for side in ("a", "b")]
+        conflict = np.isin(labels, np.asarray(involved, dtype=labels.dtype))
+        known["audit_pairs"] = pairs
+    known["conflict"] = conflict
+
+
+def conflict_from_stored(known):
+    """Tập xung đột đã lưu (load_all_embeddings -> "stored_conflict") -> mask mọi dòng của các SV đó"""
+    labels = np.asarray(known["labels"])
+    stored = np.asarray(known.get("stored_conflict", np.zeros(len(labels), dtype=bool)), dtype=bool)
+    return np.isin(labels, labels[stored])
+
+
+def write_conflicts(meta, conflict):
+    """Lưu tập xung đột vào student_embeddings.AuditConflict theo EmbeddingID (1 transaction)"""
+    from backend.app.database import SessionLocal
+    from backend.app.models.student_embeddings import StudentEmbeddings
+
+    mappings = [
+        {"EmbeddingID": m["embedding_id"], "AuditConflict": bool(conflict[i])}
+        for i, m in enumerate(meta) if m.get("embedding_id") is not None
+    ]
+    db = SessionLocal()
+    try:
+        db.bulk_update_mappings(StudentEmbeddings, mappings)
+        db.commit()
+    finally:
+        db.close()
+    return len(mappings)
+
+
+def identity_margins(sims, best_idxs, best_scores, labels, rows):
+    """Chênh lệch điểm giữa SV khớp nhất và SV khác gần nhất, chỉ tính cho các mặt `rows`"""
+    margins = np.full(len(best_idxs), np.inf, dtype=np.float32)
+    for row in rows:
+        others = sims[row][labels != labels[best_idxs[row]]]
+        if others.size:
+            margins[row] = best_scores[row] - others.max()
+    return margins
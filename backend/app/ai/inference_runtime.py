@@ -0,0 +1,139 @@
+# backend/app/ai/inference_runtime.py
+# Cấu hình luồng CPU cho inference (torch / OpenCV) trong mỗi process nạp model.
+#
+# Mặc định torch dùng số luồng = số core cho MỖI process -> chạy N worker uvicorn thì N x core luồng
+# tranh nhau CPU (oversubscription), chậm hơn hẳn 1 worker. Chia core theo số worker:
+#   INFERENCE_WORKERS        số process nạp model (mặc định WEB_CONCURRENCY - cũng là --workers của uvicorn)
+#   INFERENCE_THREADS        luồng intra-op torch / worker (0 = số core / số worker)
+#   INFERENCE_INTEROP_THREADS luồng inter-op torch (mặc định 1: model chạy tuần tự từng op)
+#   OPENCV_THREADS           luồng OpenCV (mặc định 1: decode / resize nhỏ, song song chỉ tốn thêm luồng)
+#   INFERENCE_PIN_CORES=1    ghim mỗi worker vào dải core riêng (Linux)
+# Chọn cặp (worker, luồng) tốt nhất cho máy: python -m benchmarks.bench_threads
+#
+# 2 bước:
+#   configure_inference_runtime() - đầu main.py, TRƯỚC khi import torch / cv2: biến OMP_* / MKL_* chỉ có tác dụng
+#       lúc thư viện khởi tạo. Không import torch / cv2 (~2s) -> app vẫn khởi động nhanh.
+#   apply_inference_threads() - thread warm-up / getter model, trước lần chạy model đầu tiên:
+#       torch.set_num_threads / set_num_interop_threads (chỉ gọi được trước khi torch chạy song song), cv2.setNumThreads.
+
+import os
+import tempfile
+import threading
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", os.getenv("WEB_CONCURRENCY", 1)))
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", 0))
+INFERENCE_INTEROP_THREADS = int(os.getenv("INFERENCE_INTEROP_THREADS", 1))
+OPENCV_THREADS = int(os.getenv("OPENCV_THREADS", 1))
+INFERENCE_PIN_CORES = os.getenv("INFERENCE_PIN_CORES", "0") == "1"
+
+_settings = None
+_applied = False
+_lock = threading.Lock()
+_slot_file = None   # giữ file lock suốt đời process (đóng file = nhả slot)
+
+
+def available_cores():
+    """Các core process được phép chạy (tôn trọng cgroup / taskset), không có API thì 0..cpu_count-1"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def threads_per_worker(workers, cores):
+    return max(1, cores // max(1, workers))
+
+
+def _claim_worker_slot(workers):
+    """
+    Số thứ tự worker (0..workers-1) để ghim core: mỗi worker giữ 1 file lock.
+    uvicorn không báo số thứ tự worker; worker chết thì lock tự nhả cho worker thay thế.
+    """
+    global _slot_file
+    try:
+        import fcntl
+    except ImportError:  # Windows: không ghim
+        return None
+    for index in range(workers):
+        f = open(os.path.join(tempfile.gettempdir(), f"vaa-inference-worker-{index}.lock"), "w")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            continue
+        _slot_file = f
+        return index
+    return None
+
+
+def _pin(index, threads, cores):
+    start = (index * threads) % len(cores)
+    subset = {cores[(start + i) % len(cores)] for i in range(threads)}
+    os.sched_setaffinity(0, subset)
+    return sorted(subset)
+
+
+def configure_inference_runtime(workers=None, threads=None, interop=None, opencv=None, pin=None):
+    """
+    Áp dụng cấu hình luồng cho process hiện tại (gọi lại chỉ trả về cấu hình đã áp dụng).
+    Trả về dict cấu hình (hiển thị ở /ready, ghi vào báo cáo benchmark).
+    """
+    global _settings
+    with _lock:
+        if _settings is not None:
+            return _settings
+
+        workers = workers or INFERENCE_WORKERS
+        cores = available_cores()
+        threads = threads or INFERENCE_THREADS or threads_per_worker(workers, len(cores))
+        interop = interop or INFERENCE_INTEROP_THREADS
+        opencv = OPENCV_THREADS if opencv is None else opencv
+        pin = INFERENCE_PIN_CORES if pin is None else pin
+
+        # Thư viện BLAS / OpenMP đọc biến môi trường khi khởi tạo -> đặt trước khi import torch
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ.setdefault(var, str(threads))
+
+        settings = {"workers": workers, "cores": len(cores), "threads": threads,
+                    "interop_threads": interop, "opencv_threads": opencv, "pinned_cores": None}
+
+        if pin and hasattr(os, "sched_setaffinity"):
+            index = _claim_worker_slot(workers)
+            if index is not None:
+                settings["worker_index"] = index
+                settings["pinned_cores"] = _pin(index, threads, cores)
+
+        print(f"🧵 [INFERENCE] {threads} luồng torch / worker ({workers} worker, {len(cores)} core), "
+              f"inter-op={settings['interop_threads']}, OpenCV={opencv}"
+              + (f", ghim core {settings['pinned_cores']}" if settings["pinned_cores"] else ""))
+        _settings = settings
+        return _settings
+
+
+def apply_inference_threads():
+    """
+    Đặt số luồng torch / OpenCV theo cấu hình đã chọn (import torch, cv2). Gọi nhiều lần chỉ áp dụng 1 lần.
+    Gọi ở thread warm-up / getter model, không gọi lúc import app.
+    """
+    global _applied
+    settings = configure_inference_runtime()
+    with _lock:
+        if _applied:
+            return settings
+
+        import torch
+        torch.set_num_threads(settings["threads"])
+        try:
+            torch.set_num_interop_threads(settings["interop_threads"])
+        except RuntimeError:
+            # torch đã chạy song song trước đó (model chạy trước khi áp dụng) -> giữ giá trị cũ
+            settings["interop_threads"] = torch.get_num_interop_threads()
+
+        import cv2
+        cv2.setNumThreads(settings["opencv_threads"])
+        _applied = True
+    return settings
+
+
+def runtime_info():
+    """Cấu hình đã áp dụng (None nếu chưa gọi configure_inference_runtime)"""
+    return _settings
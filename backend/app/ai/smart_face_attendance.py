@@ -1,19 +1,55 @@
 import cv2
 import numpy as np
-from PIL import Image
 from sklearn.metrics.pairwise import cosine_similarity
 import pymysql
 import os
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from sqlalchemy.exc import IntegrityError
 
 # ===== IMPORT CÁC MODULE AI =====
-from backend.app.ai.face.arcface_embedder import ArcfaceEmbedder
-from backend.app.ai.student_embedding import load_all_embeddings, fake_detector_instance
-from backend.app.ai.face.detector import detect_faces_rgb, extract_face_region_rgb
+from backend.app.ai.face.arcface_embedder import get_arcface_embedder
+from backend.app.ai import student_embedding
+from backend.app.ai.face.detector import detect_faces_rgb
+from backend.app.ai.face.frame import Frame
+from backend.app.ai.face import calibration, gallery_audit
+from backend.app.services import unknown_face_service, template_service
 
-# ===== KHỞI TẠO MODEL (Load 1 lần duy nhất khi chạy server) =====
-embedder = ArcfaceEmbedder()
-_known = load_all_embeddings()
+# Liveness (FakeDetector) cho mọi khuôn mặt - tắt mặc định: cần nhiều khung hình liên tiếp (camera)
+# để có điểm chuyển động; ảnh chụp đơn lẻ chỉ có điểm texture
+LIVENESS_CHECK = os.getenv("LIVENESS_CHECK", "0") == "1"
+
+# Pool chạy liveness song song với embedding (torch nhả GIL khi tính -> 2 model chạy cùng lúc)
+_inference_pool = ThreadPoolExecutor(max_workers=int(os.getenv("INFERENCE_POOL_WORKERS", 2)),
+                                     thread_name_prefix="inference")
+
+# ===== MODEL + GALLERY: nạp 1 lần khi cần (warm-up nền lúc khởi động hoặc request đầu tiên) =====
+_known = None
+_known_lock = threading.Lock()
+
+def get_embedder():
+    return get_arcface_embedder()
+
+def get_gallery(reload=False):
+    """
+    Gallery embedding {"encodings", "meta", "labels", "thresholds", "impostor_mean", "impostor_std",
+    "audit_pairs", "conflict"} của toàn bộ SV. Ngưỡng riêng từng SV đọc từ DB (tính sẵn offline, face/calibration.py)
+    -> nạp gallery không tính ma trận G x G. Tập SV gần như trùng nhau cũng đọc từ DB (face/gallery_audit.py);
+    "audit_pairs" = None tới khi /gallery-audit kiểm tra lại. Rỗng thì thử nạp lại.
+    """
+    global _known
+    if reload or _known is None or _known["encodings"].size == 0:
+        with _known_lock:
+            if reload or _known is None or _known["encodings"].size == 0:
+                known = student_embedding.load_all_embeddings()
+                known["labels"] = np.array([m["id"] for m in known["meta"]], dtype=np.int64)
+                known.update(calibration.from_stored(known))
+                known["conflict"] = gallery_audit.conflict_from_stored(known)
+                known["audit_pairs"] = None
+                _known = known
+    return _known
 
 def get_student_class_name(student_id):
     """
@@ -42,133 +78,211 @@ def get_student_class_name(student_id):
         print(f"❌ Error get_student_class_name: {e}")
         return "N/A"
 
-def match_image_and_check_real(image_np_bgr):
+# Số khuôn mặt tối đa / 1 lần forward FaceNet (nhiều ảnh gộp chung 1 batch)
+EMBED_BATCH = int(os.getenv("EMBED_BATCH", 32))
+
+
+def match_frames(images, sources=None, with_class_name=True, class_id=None):
     """
-    Hàm nhận diện khuôn mặt (Hỗ trợ nhiều người cùng lúc)
-    Output: Dictionary chứa danh sách các khuôn mặt đã nhận diện
+    Nhận diện nhiều ảnh cùng lúc (ảnh nhóm của 1 buổi học, hoặc 1 ảnh):
+    detect từng ảnh -> gộp mặt của mọi ảnh, embedding theo batch EMBED_BATCH -> so khớp gallery 1 lần.
+    images: list Frame (buffer RGB, xem face/frame.py) hoặc ảnh OpenCV BGR
+    sources: id camera / lớp cho từng ảnh (liveness theo dõi lịch sử khuôn mặt trong cùng source)
+    with_class_name: tra tên lớp của SV nhận ra (1 query / mặt - tắt khi caller đã biết lớp)
+    class_id: lớp đang điểm danh - có thì mặt không khớp ai được lưu vào kho mặt lạ (services/unknown_face_service.py),
+              mặt khớp chắc chắn được dùng cập nhật mẫu của SV (services/template_service.py)
+    Output: list kết quả (cùng thứ tự images) dạng {'status', 'faces'}
     """
-    # 1. Chuyển đổi ảnh BGR (OpenCV) sang RGB (PIL)
-    rgb = cv2.cvtColor(image_np_bgr, cv2.COLOR_BGR2RGB)
-    pil = Image.fromarray(rgb)
-
-    # 2. Phát hiện tất cả khuôn mặt trong hình
-    boxes, probs = detect_faces_rgb(pil)
-    
-    # Nếu không thấy mặt nào -> Trả về rỗng
-    if boxes is None or len(boxes) == 0:
-        return {'status': 'no_face', 'faces': []}
-
-    # 3. Xử lý Database (Nếu rỗng thì load lại)
-    global _known
-    if _known["encodings"].size == 0:
-        _known = load_all_embeddings()
+    # 1. 1 buffer RGB cho cả pipeline (ảnh BGR thì đổi 1 lần duy nhất)
+    frames = [img if isinstance(img, Frame) else Frame.from_bgr(img) for img in images]
+    sources = sources or ["default"] * len(frames)
 
-    results = []
+    # 2. Phát hiện tất cả khuôn mặt trong từng ảnh (MTCNN chạy thẳng trên numpy RGB)
+    # (lấy cả landmark khi bật liveness: FakeDetector dùng lại, không detect lần 2)
+    detections = []
+    for frame in frames:
+        if LIVENESS_CHECK:
+            boxes, probs, landmarks = detect_faces_rgb(frame.rgb, landmarks=True)
+        else:
+            boxes, probs = detect_faces_rgb(frame.rgb)
+            landmarks = None
+        detections.append((boxes, landmarks) if boxes is not None and len(boxes) else (None, None))
 
-    # 4. DUYỆT QUA TỪNG KHUÔN MẶT (Loop)
-    for box in boxes:
-        # --- Bước A: Cắt ảnh khuôn mặt (Crop) ---
-        face_rgb = extract_face_region_rgb(rgb, box)
-        if face_rgb is None: 
-            continue
+    outputs = [{'status': 'no_face', 'faces': []} for _ in frames]
+    if all(boxes is None for boxes, _ in detections):
+        return outputs
+
+    # 3. Gallery + model (nạp lần đầu nếu warm-up chưa xong; gallery rỗng thì load lại)
+    known = get_gallery()
+    embedder = get_embedder()
 
-        # --- Bước B: Tạo Vector đặc trưng (Embedding) ---
-        face_pil = Image.fromarray(face_rgb)
-        emb = embedder.get_embedding_from_pil(face_pil)
-        
-        if emb is None: 
+    # Liveness cho cả khung hình 1 lần (anti-spoof / texture theo batch, chuyển động theo track của từng mặt),
+    # chạy ở pool song song với embedding bên dưới, lấy kết quả ở bước D
+    liveness_jobs = {}
+    if LIVENESS_CHECK:
+        fake_detector = student_embedding.get_fake_detector()
+        for f, (frame, (boxes, landmarks)) in enumerate(zip(frames, detections)):
+            if boxes is not None:
+                liveness_jobs[f] = _inference_pool.submit(
+                    fake_detector.score_faces, frame.rgb, boxes, landmarks, sources[f], True
+                )
+
+    # --- Bước A: Cắt ảnh khuôn mặt (view vào buffer khung hình, không copy; mặt nhỏ cắt từ ảnh gốc) ---
+    face_index = []  # (ảnh, vị trí box) của từng mặt cắt được (box ngoài khung hình bị bỏ qua)
+    crops = []
+    for f, (frame, (boxes, _)) in enumerate(zip(frames, detections)):
+        if boxes is None:
             continue
+        for i, box in enumerate(boxes):
+            crop = frame.face_crop(box)
+            if crop is not None:
+                face_index.append((f, i))
+                crops.append(crop)
+
+    # --- Bước B: Tạo Vector đặc trưng (Embedding) - forward theo batch cho mọi khuôn mặt ---
+    embs = np.concatenate(
+        [embedder.get_embeddings_from_rgb(crops[k:k + EMBED_BATCH]) for k in range(0, len(crops), EMBED_BATCH)]
+    ) if crops else np.empty((0, 512), dtype=np.float32)
 
-        # --- Bước C: So sánh với Database ---
+    # --- Bước C: So sánh với Database (ma trận mặt x gallery trong 1 lần) ---
+    sims = None
+    if len(crops) and known["encodings"].size > 0:
+        sims = cosine_similarity(embs, known["encodings"])
+
+    for f in range(len(frames)):
+        if detections[f][0] is not None:
+            outputs[f] = {'status': 'ok', 'faces': []}
+
+    # Ngưỡng riêng của SV khớp nhất: chỉ tra mảng (tính sẵn offline bằng calibrate_thresholds --db --write, nạp cùng gallery)
+    if sims is not None:
+        best_idxs = np.argmax(sims, axis=1)
+        best_scores = sims[np.arange(len(best_idxs)), best_idxs]
+        thresholds = known["thresholds"][best_idxs]
+        zs = calibration.z_scores(best_scores, best_idxs, known)
+        # SV trong tập xung đột (có người gần như trùng trong gallery): tính chênh lệch với SV khác gần nhất
+        conflict_rows = np.flatnonzero(known["conflict"][best_idxs])
+        margins = gallery_audit.identity_margins(sims, best_idxs, best_scores, known["labels"], conflict_rows)
+
+    face_rows = {}  # (ảnh, box) -> kết quả, để gắn liveness ở bước D
+    for row, (f, i) in enumerate(face_index):
         student = {}
         best_score = 0.0
+        threshold = calibration.MATCH_THRESHOLD
+        z = None
         found = False
+        ambiguous = False
+
+        if sims is not None:
+            best_idx = int(best_idxs[row])
+            best_score = float(best_scores[row])
+            threshold = float(thresholds[row])
+            z = round(float(zs[row]), 2)
+
+            # SV trong tập xung đột phải tách biệt SV giống nó ít nhất CONFLICT_MARGIN
+            ambiguous = best_score >= threshold and margins[row] < gallery_audit.CONFLICT_MARGIN
 
-        if _known["encodings"].size > 0:
-            # Tính độ tương đồng (Cosine Similarity) với tất cả vector trong DB
-            sims = cosine_similarity([emb], _known["encodings"])[0]
-            best_idx = int(np.argmax(sims))
-            best_score = float(sims[best_idx])
-            
-            # Ngưỡng nhận diện (0.50 - 0.55 là mức ổn định cho ArcFace)
-            if best_score >= 0.50:
+            if best_score >= threshold and not ambiguous:
                 found = True
-                student = _known["meta"][best_idx].copy()  # Copy để tránh modify gốc
+                student = known["meta"][best_idx].copy()  # Copy để tránh modify gốc
                 
                 # ⭐ THÊM THÔNG TIN LỚP HỌC
-                student_id = student.get("id")
-                if student_id:
-                    student["class_name"] = get_student_class_name(student_id)
-                else:
-                    student["class_name"] = "N/A"
-        
-        # --- Bước D: Kiểm tra giả mạo (Liveness Check) ---
-        is_real = True 
+                if with_class_name:
+                    student_id = student.get("id")
+                    if student_id:
+                        student["class_name"] = get_student_class_name(student_id)
+                    else:
+                        student["class_name"] = "N/A"
 
         # --- Bước E: Đóng gói kết quả ---
-        results.append({
-            "box": box.tolist(),        # Tọa độ [x1, y1, x2, y2] để vẽ khung
+        face = {
+            "box": frames[f].to_source(detections[f][0][i]),  # Tọa độ [x1, y1, x2, y2] trên ảnh gốc để vẽ khung
             "found": found,             # Có tìm thấy trong DB không
             "similarity": best_score,   # Độ chính xác (0.0 -> 1.0)
-            "is_real": is_real,         # Có phải người thật không
+            "threshold": threshold,     # Ngưỡng của SV khớp nhất
+            "z_score": z,               # Điểm chuẩn hóa theo phân bố mạo danh của SV đó
+            "ambiguous": bool(ambiguous),  # Vượt ngưỡng nhưng không phân biệt được với SV gần như trùng
+            "is_real": True,            # Có phải người thật không (bước D)
             "student": student          # Thông tin sinh viên (ĐÃ CÓ class_name)
-        })
+        }
+        outputs[f]['faces'].append(face)
+        face_rows[(f, i)] = face
 
-    # 5. Trả về kết quả tổng
-    return {
-        "status": "ok",
-        "faces": results  # Danh sách các khuôn mặt
-    }
+    # --- Bước D: Kiểm tra giả mạo (Liveness Check) - chờ kết quả chạy song song ---
+    for f, job in liveness_jobs.items():
+        liveness = job.result()
+        for i, live in enumerate(liveness):
+            face = face_rows.get((f, i))
+            if face is None:
+                continue
+            face["is_real"] = live["is_real"]
+            face["liveness"] = {k: live[k] for k in ("real_conf", "score_a", "score_b", "track_id", "frames")}
+
+    # --- Bước F: Lưu mặt lạ (người thật, đủ lớn, không khớp ai) để gom cụm cho giáo viên duyệt - ghi nền ---
+    if class_id is not None and sims is not None:
+        unknown = []
+        for row, key in enumerate(face_index):
+            face = face_rows[key]
+            x1, y1, x2, y2 = face["box"]
+            if face["found"] or face["ambiguous"] or not face["is_real"]:
+                continue
+            if min(x2 - x1, y2 - y1) >= unknown_face_service.UNKNOWN_MIN_FACE:
+                unknown.append(row)
+        if unknown:
+            unknown_face_service.submit_unknown_faces(
+                class_id, embs[unknown], [crops[r] for r in unknown], [float(sims[r].max()) for r in unknown]
+            )
+
+    # --- Bước G: Cập nhật mẫu của SV từ lần điểm danh chắc chắn (TEMPLATE_ADAPTATION=1) - ghi nền ---
+    if template_service.TEMPLATE_ADAPTATION and class_id is not None and sims is not None:
+        updates = [
+            (int(best_idxs[row]), embs[row], float(best_scores[row]), sources[key[0]])
+            for row, key in enumerate(face_index)
+            if template_service.is_candidate(known, sims[row], best_idxs[row], face_rows[key], LIVENESS_CHECK)
+        ]
+        if updates:
+            template_service.submit_template_updates(known, updates)
+
+    return outputs
+
+
+def match_image_and_check_real(image, source="default", class_id=None):
+    """
+    Hàm nhận diện khuôn mặt (Hỗ trợ nhiều người cùng lúc)
+    image: Frame (buffer RGB, xem face/frame.py) hoặc ảnh OpenCV BGR
+    source: id camera / lớp - liveness theo dõi lịch sử từng khuôn mặt trong cùng source
+    class_id: lớp đang điểm danh (lưu mặt lạ để duyệt)
+    Output: Dictionary chứa danh sách các khuôn mặt đã nhận diện
+    """
+    return match_frames([image], [source], class_id=class_id)[0]
 
 
 def save_attendance_to_db(study_id, similarity, photo_base64=None):
     """
-    Lưu điểm danh vào DB
+    Lưu điểm danh vào DB (qua attendance_crud -> cập nhật luôn bảng tổng hợp)
     - study_id: ID bản ghi trong bảng study
     - similarity: Độ chính xác nhận diện (0.0 -> 1.0)
     - photo_base64: Ảnh khuôn mặt dạng base64 (optional)
     """
+    from backend.app.database import SessionLocal
+    from backend.app.crud.attendance_crud import record_checkin
+
+    # Nếu có ảnh thì lưu base64, không thì lưu similarity làm placeholder
+    photo_data = photo_base64 if photo_base64 else f"similarity_{similarity:.2f}"
+
+    db = SessionLocal()
     try:
-        conn = pymysql.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", "python_project"),
-            charset="utf8mb4"
-        )
-        cursor = conn.cursor()
-        
-        # ⭐ KIỂM TRA ĐÃ ĐIỂM DANH CHƯA (Tránh trùng lặp)
-        cursor.execute(
-            "SELECT AttendanceID FROM attendance WHERE StudyID = %s AND Date = CURDATE()",
-            (study_id,)
-        )
-        
-        if cursor.fetchone():
-            conn.close()
-            return "Duplicate"  # Đã điểm danh rồi
-        
-        # ⭐ LƯU ĐIỂM DANH MỚI (Có PhotoPath)
-        sql = """
-            INSERT INTO attendance (StudyID, Date, Time, PhotoPath)
-            VALUES (%s, CURDATE(), CURTIME(), %s)
-        """
-        
-        # Nếu có ảnh thì lưu base64, không thì lưu similarity làm placeholder
-        photo_data = photo_base64 if photo_base64 else f"similarity_{similarity:.2f}"
-        
-        cursor.execute(sql, (study_id, photo_data))
-        conn.commit()
-        conn.close()
-        
-        return "Success"
-        
-    except pymysql.IntegrityError as e:
+        status, _ = record_checkin(db, study_id, date.today(), photo_path=photo_data)
+        return "Duplicate" if status == "Duplicate" else ("Success" if status == "Success" else "Error")
+    except IntegrityError as e:
+        db.rollback()
         print(f"❌ DB IntegrityError: {e}")
         return "Duplicate"
     except Exception as e:
+        db.rollback()
         print(f"❌ ERROR save_attendance_to_db: {e}")
         return "Error"
+    finally:
+        db.close()
 
 
 def encode_image_to_base64(image_np_bgr):
@@ -2,16 +2,33 @@ import numpy as np
 import pymysql
 import os
 import pickle  # Thêm import pickle
+import threading
 from backend.app.ai.face.fake_detector import FakeDetector
 
-fake_detector_instance = FakeDetector()  # Thêm dòng này trước khi dùng
+# FakeDetector (chứa 1 MTCNN) tạo lần đầu khi cần, không tạo lúc import
+_fake_detector = None
+_fake_detector_lock = threading.Lock()
+
+def get_fake_detector():
+    global _fake_detector
+    if _fake_detector is None:
+        with _fake_detector_lock:
+            if _fake_detector is None:
+                _fake_detector = FakeDetector(
+                    anti_spoof_model_path=os.getenv("ANTI_SPOOF_MODEL_PATH") or None,
+                    threshold_real=float(os.getenv("LIVENESS_THRESHOLD", 0.63))
+                )
+    return _fake_detector
 
 def load_all_embeddings():
     """
     Return:
     {
         "encodings": np.ndarray (N,512)
-        "meta": list[{id, name, student_code, ...}]
+        "meta": list[{id, name, code, embedding_id}]
+        "stored_thresholds", "stored_impostor_mean", "stored_impostor_std": np.ndarray (N,)
+            ngưỡng riêng tính sẵn (training/calibrate_thresholds.py --db --write), NaN = chưa tính
+        "stored_conflict": np.ndarray bool (N,) - tập xung đột tính sẵn (training/audit_gallery.py --write)
     }
     """
     conn = pymysql.connect(
@@ -24,7 +41,8 @@ def load_all_embeddings():
     cursor = conn.cursor()
 
     cursor.execute("""
-        SELECT s.StudentID, s.FullName, s.StudentCode, e.Embedding
+        SELECT s.StudentID, s.FullName, s.StudentCode, e.EmbeddingID, e.Embedding,
+               e.MatchThreshold, e.ImpostorMean, e.ImpostorStd, e.AuditConflict
         FROM student s
         JOIN student_embeddings e ON s.StudentID = e.StudentID
     """)
@@ -33,8 +51,10 @@ def load_all_embeddings():
 
     encs = []
     meta = []
+    stored = []
+    conflict = []
 
-    for rid, name, code, emb_blob in rows:
+    for rid, name, code, embedding_id, emb_blob, match_thr, imp_mean, imp_std, audit_conflict in rows:
         try:
             print(f"DEBUG: Kích thước BLOB: {len(emb_blob)} bytes")
             emb = pickle.loads(emb_blob)  # Đọc embedding bằng pickle
@@ -44,8 +64,11 @@ def load_all_embeddings():
                 meta.append({
                     "id": rid,
                     "name": name,
-                    "code": code
+                    "code": code,
+                    "embedding_id": embedding_id   # dòng student_embeddings (cập nhật mẫu tại chỗ)
                 })
+                stored.append([np.nan if v is None else v for v in (match_thr, imp_mean, imp_std)])
+                conflict.append(bool(audit_conflict))
         except Exception as e:
             print(f"ERROR: {e}")
             continue
@@ -57,7 +80,12 @@ def load_all_embeddings():
     if len(encs) == 0:
         return {"encodings": np.zeros((0, 512), dtype="float32"), "meta": []}
 
+    stored = np.array(stored, dtype=np.float32)
     return {
         "encodings": np.vstack(encs),
-        "meta": meta
+        "meta": meta,
+        "stored_thresholds": stored[:, 0],
+        "stored_impostor_mean": stored[:, 1],
+        "stored_impostor_std": stored[:, 2],
+        "stored_conflict": np.array(conflict, dtype=bool),
     }
\ No newline at end of file
@@ -0,0 +1,70 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# --- CẤU HÌNH ĐƯỜNG DẪN ---
+# File này nằm ở: backend/app/ai/training/audit_gallery.py
+current_file = Path(__file__).resolve()
+project_root = current_file.parents[4]
+sys.path.insert(0, str(project_root))
+
+from backend.app.ai import student_embedding
+from backend.app.ai.face import gallery_audit
+
+# ==============================================================================
+# Kiểm tra gallery trong DB: liệt kê các cặp SV khác nhau có embedding gần như trùng
+# (cùng 1 ảnh đăng ký cho 2 SV, sinh đôi...) - xử lý tay: đăng ký lại ảnh / xóa embedding sai.
+# Thoát mã 1 nếu có cặp trùng ảnh (>= AUDIT_DUPLICATE_THRESHOLD) -> dùng được cho cron / CI.
+# --write: lưu tập xung đột vào student_embeddings.AuditConflict (server đọc lại khi nạp gallery, không tự kiểm tra).
+#   python -m backend.app.ai.training.audit_gallery [--threshold 0.75] [--write]
+# ==============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tìm các cặp SV có embedding gần như trùng trong gallery")
+    parser.add_argument("--threshold", type=float, default=gallery_audit.AUDIT_PAIR_THRESHOLD)
+    parser.add_argument("--tile", type=int, default=gallery_audit.TILE, help="Kích thước khối (dòng)")
+    parser.add_argument("--limit", type=int, default=50, help="Số cặp in ra tối đa")
+    parser.add_argument("--write", action="store_true", help="Lưu tập xung đột vào student_embeddings")
+    args = parser.parse_args()
+
+    known = student_embedding.load_all_embeddings()
+    if not known["meta"]:
+        print("❌ Gallery trống")
+        return 2
+    labels = np.array([m["id"] for m in known["meta"]])
+
+    t0 = time.perf_counter()
+    rows_a, rows_b, sims = gallery_audit.find_similar_pairs(known["encodings"], labels, args.threshold, args.tile)
+    ms = (time.perf_counter() - t0) * 1000
+    conflict = gallery_audit.conflict_mask(labels, rows_a, rows_b)
+
+    print(f"\n{len(labels)} dòng embedding / {len(np.unique(labels))} SV - so mọi cặp trong {ms:.0f}ms")
+    print(f"{len(sims)} cặp khác SV giống >= {args.threshold}, {len(np.unique(labels[conflict]))} SV trong tập xung đột\n")
+
+    duplicates = 0
+    for a, b, s in list(zip(rows_a, rows_b, sims))[:args.limit]:
+        ma, mb = known["meta"][a], known["meta"][b]
+        is_dup = s >= gallery_audit.AUDIT_DUPLICATE_THRESHOLD
+        duplicates += is_dup
+        print(f"{'🔴 trùng ảnh' if is_dup else '🟡 rất giống':<14}{s:.4f}  "
+              f"{ma['code']} {ma['name']} (emb {ma.get('embedding_id')})  <->  "
+              f"{mb['code']} {mb['name']} (emb {mb.get('embedding_id')})")
+    duplicates += int(np.sum(sims[args.limit:] >= gallery_audit.AUDIT_DUPLICATE_THRESHOLD))
+
+    if args.write:
+        n = gallery_audit.write_conflicts(known["meta"], conflict)
+        print(f"\n💾 Đã lưu tập xung đột cho {n} dòng embedding (gallery nạp lại sẽ dùng)")
+
+    if duplicates:
+        print(f"\n❌ {duplicates} cặp trùng ảnh đăng ký - cần xử lý")
+        return 1
+    print("\n✅ Không có cặp trùng ảnh")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
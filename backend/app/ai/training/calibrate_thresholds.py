@@ -0,0 +1,184 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# --- CẤU HÌNH ĐƯỜNG DẪN ---
+# File này nằm ở: backend/app/ai/training/calibrate_thresholds.py
+current_file = Path(__file__).resolve()
+project_root = current_file.parents[4]
+sys.path.insert(0, str(project_root))
+
+from backend.app.ai.face import calibration
+
+DATA_DIR = project_root / "backend" / "app" / "data" / "face"
+
+# ==============================================================================
+# Kiểm tra ngưỡng riêng từng SV (face/calibration.py):
+#   --db   : báo cáo ngưỡng của gallery thật trong DB (phân bố, các SV bị nâng ngưỡng vì có người giống)
+#   --db --write : tính + lưu ngưỡng / thống kê mạo danh vào student_embeddings - server chỉ đọc lại khi nạp
+#             gallery (chạy lại sau khi đăng ký thêm SV, vd cron hằng đêm; SV chưa tính dùng ngưỡng chung)
+#   mặc định: đánh giá trên ảnh backend/app/data/face/{MSSV}/ - mỗi SV lấy vài ảnh đầu làm gallery
+#             (trung bình như import_data), các ảnh còn lại làm truy vấn; so ngưỡng chung với ngưỡng riêng:
+#               - chấp nhận đúng: ảnh của SV khớp đúng SV đó và vượt ngưỡng
+#               - nhận nhầm: bỏ SV đó khỏi gallery (người lạ), mặt vẫn vượt ngưỡng của ai đó
+#   python -m backend.app.ai.training.calibrate_thresholds [--db [--write]]
+# ==============================================================================
+
+
+def report_thresholds(thresholds, labels, names, top=10):
+    uniq, first = np.unique(labels, return_index=True)
+    per_student = thresholds[first]
+    pct = np.percentile(per_student, [0, 10, 50, 90, 100])
+    print(f"\n{len(uniq)} SV, {len(labels)} dòng embedding")
+    print("Ngưỡng riêng  min / p10 / p50 / p90 / max: " + " / ".join(f"{v:.3f}" for v in pct))
+    print(f"Bị kẹp ở mức thấp nhất ({calibration.MATCH_THRESHOLD_MIN}): "
+          f"{int(np.sum(per_student <= calibration.MATCH_THRESHOLD_MIN + 1e-6))} SV, "
+          f"mức cao nhất ({calibration.MATCH_THRESHOLD_MAX}): "
+          f"{int(np.sum(per_student >= calibration.MATCH_THRESHOLD_MAX - 1e-6))} SV")
+    order = np.argsort(-per_student)[:top]
+    print(f"\nTop {len(order)} SV ngưỡng cao (có người giống trong gallery):")
+    for k in order:
+        print(f"  {names[first[k]]:<40}{per_student[k]:.3f}")
+
+
+# ===============================
+# 1. GALLERY THẬT TRONG DB
+# ===============================
+def write_calibration(meta, cal):
+    """Lưu ImpostorMean / ImpostorStd / MatchThreshold theo EmbeddingID (1 transaction)"""
+    from backend.app.database import SessionLocal
+    from backend.app.models.student_embeddings import StudentEmbeddings
+
+    mappings = [
+        {
+            "EmbeddingID": m["embedding_id"],
+            "ImpostorMean": float(cal["impostor_mean"][i]),
+            "ImpostorStd": float(cal["impostor_std"][i]),
+            "MatchThreshold": float(cal["thresholds"][i]),
+        }
+        for i, m in enumerate(meta)
+    ]
+    db = SessionLocal()
+    try:
+        db.bulk_update_mappings(StudentEmbeddings, mappings)
+        db.commit()
+    finally:
+        db.close()
+    print(f"💾 Đã lưu ngưỡng cho {len(mappings)} dòng embedding (gallery nạp lại sẽ dùng)")
+
+
+def run_db(write=False):
+    from backend.app.ai import student_embedding
+
+    known = student_embedding.load_all_embeddings()
+    if not known["meta"]:
+        print("❌ Gallery trống")
+        return 2
+    labels = np.array([m["id"] for m in known["meta"]])
+    names = [f"{m['code']} - {m['name']}" for m in known["meta"]]
+    t0 = time.perf_counter()
+    cal = calibration.calibrate(known["encodings"], labels)
+    print(f"⏱️ Hiệu chỉnh {len(labels)} dòng: {(time.perf_counter() - t0) * 1000:.0f}ms")
+    report_thresholds(cal["thresholds"], labels, names)
+    if write:
+        write_calibration(known["meta"], cal)
+    return 0
+
+
+# ===============================
+# 2. ĐÁNH GIÁ TRÊN ẢNH
+# ===============================
+def load_embeddings(data_dir, per_student):
+    from backend.app.ai.face.arcface_embedder import ArcfaceEmbedder
+
+    embedder = ArcfaceEmbedder(device="cpu")
+    embs, labels = [], []
+    for folder in sorted(p for p in data_dir.iterdir() if p.is_dir()):
+        files = sorted(f for f in folder.iterdir() if f.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        count = 0
+        for f in files:
+            img = cv2.imread(str(f))
+            face = embedder.get_face_image(img) if img is not None else None
+            if face is None:
+                continue
+            embs.append(embedder.get_embedding_from_pil(face))
+            labels.append(folder.name)
+            count += 1
+            if per_student and count >= per_student:
+                break
+    return np.stack(embs).astype(np.float32), np.array(labels)
+
+
+def split_gallery(embs, labels, enroll):
+    """Mỗi SV: `enroll` ảnh đầu -> 1 vector trung bình (gallery), phần còn lại -> truy vấn"""
+    gallery, g_labels, q_idx = [], [], []
+    for label in np.unique(labels):
+        idx = np.flatnonzero(labels == label)
+        if len(idx) <= enroll:
+            continue
+        mean = embs[idx[:enroll]].mean(axis=0)
+        gallery.append(mean / (np.linalg.norm(mean) + 1e-9))
+        g_labels.append(label)
+        q_idx.extend(idx[enroll:])
+    return np.stack(gallery), np.array(g_labels), np.array(q_idx)
+
+
+def evaluate(gallery, g_labels, queries, q_labels, thresholds):
+    sims = queries @ gallery.T
+    own = g_labels[None, :] == q_labels[:, None]
+
+    # Chấp nhận đúng: khớp nhất là chính SV đó và vượt ngưỡng của SV đó
+    best = np.argmax(sims, axis=1)
+    best_score = sims[np.arange(len(best)), best]
+    genuine = (g_labels[best] == q_labels) & (best_score >= thresholds[best])
+
+    # Nhận nhầm người lạ: bỏ SV của ảnh khỏi gallery
+    others = np.where(own, -1.0, sims)
+    best_o = np.argmax(others, axis=1)
+    false_accept = others[np.arange(len(best_o)), best_o] >= thresholds[best_o]
+    return float(genuine.mean()), float(false_accept.mean())
+
+
+def run_eval(args):
+    print(f"📂 Đang đọc + embedding ảnh từ {args.data} ...")
+    embs, labels = load_embeddings(args.data, args.per_student)
+    gallery, g_labels, q_idx = split_gallery(embs, labels, args.enroll)
+    if len(g_labels) < 2 or not len(q_idx):
+        print("❌ Không đủ SV / ảnh để đánh giá")
+        return 2
+    queries, q_labels = embs[q_idx], labels[q_idx]
+
+    # Đủ ít SV vẫn hiệu chỉnh (đánh giá), trên server cần CALIBRATION_MIN_IDENTITIES
+    mean, std, top = calibration.impostor_stats(gallery, g_labels)
+    adaptive = calibration.thresholds_from_stats(mean, std, top)
+    fixed = np.full(len(g_labels), calibration.MATCH_THRESHOLD, dtype=np.float32)
+
+    print(f"\n{len(g_labels)} SV trong gallery, {len(q_idx)} ảnh truy vấn")
+    print(f"{'ngưỡng':<22}{'chấp nhận đúng':>16}{'nhận nhầm':>12}")
+    for name, thr in ((f"chung {calibration.MATCH_THRESHOLD:.2f}", fixed), ("riêng từng SV", adaptive)):
+        tar, far = evaluate(gallery, g_labels, queries, q_labels, thr)
+        print(f"{name:<22}{tar:>16.3f}{far:>12.3f}")
+
+    report_thresholds(adaptive, g_labels, list(g_labels))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hiệu chỉnh / đánh giá ngưỡng nhận diện riêng từng SV")
+    parser.add_argument("--db", action="store_true", help="Báo cáo ngưỡng của gallery trong DB")
+    parser.add_argument("--write", action="store_true", help="Cùng --db: lưu ngưỡng vào student_embeddings")
+    parser.add_argument("--data", type=Path, default=DATA_DIR)
+    parser.add_argument("--per-student", type=int, default=0, help="Số ảnh tối đa / SV (0 = tất cả)")
+    parser.add_argument("--enroll", type=int, default=3, help="Số ảnh / SV dùng làm gallery")
+    args = parser.parse_args()
+    if args.write and not args.db:
+        parser.error("--write cần --db")
+    return run_db(args.write) if args.db else run_eval(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
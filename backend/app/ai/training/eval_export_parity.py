@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# --- CẤU HÌNH ĐƯỜNG DẪN ---
+# File này nằm ở: backend/app/ai/training/eval_export_parity.py
+current_file = Path(__file__).resolve()
+project_root = current_file.parents[4]
+sys.path.insert(0, str(project_root))
+
+# So sánh với model eager gốc: không để MTCNN / embedder tự chọn bản export
+os.environ.setdefault("MTCNN_BACKEND", "eager")
+
+from backend.app.ai.face.arcface_embedder import ArcfaceEmbedder
+from backend.app.ai.face.exported import EXPORT_DIR, EMBEDDER_ARTIFACTS
+
+DATA_DIR = project_root / "backend" / "app" / "data" / "face"
+
+# ==============================================================================
+# Kiểm tra độ chính xác model đã export so với FaceNet eager trên tập ảnh đánh giá
+# (backend/app/data/face/{MSSV}/*.jpg):
+#   - cosine giữa embedding eager và embedding bản export (cùng ảnh mặt đã align)
+#   - rank-1 leave-one-out: mỗi ảnh tìm ảnh gần nhất trong các ảnh còn lại -> đúng MSSV?
+#   - tỉ lệ trùng dự đoán với eager
+# Thoát mã 1 nếu bản nào không đạt ngưỡng hoặc đã export mà không nạp được
+# -> không bật bản đó (EMBEDDER_BACKEND) trên server.
+#   python -m backend.app.ai.training.eval_export_parity
+# ==============================================================================
+
+
+# ===============================
+# 1. ĐỌC + ALIGN ẢNH (1 LẦN, DÙNG CHUNG CHO MỌI BACKEND)
+# ===============================
+def load_faces(embedder, data_dir, per_student):
+    faces, labels = [], []
+    for folder in sorted(p for p in data_dir.iterdir() if p.is_dir()):
+        files = sorted(f for f in folder.iterdir() if f.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        count = 0
+        for f in files:
+            img = cv2.imread(str(f))
+            if img is None:
+                continue
+            face = embedder.get_face_image(img)
+            if face is None:
+                continue
+            faces.append(face)
+            labels.append(folder.name)
+            count += 1
+            if per_student and count >= per_student:
+                break
+    return faces, np.array(labels)
+
+
+def embed_all(embedder, faces):
+    t0 = time.perf_counter()
+    embs = np.stack([embedder.get_embedding_from_pil(f) for f in faces]).astype(np.float32)
+    ms = (time.perf_counter() - t0) * 1000 / max(len(faces), 1)
+    return embs, ms
+
+
+# ===============================
+# 2. RANK-1 LEAVE-ONE-OUT
+# ===============================
+def rank1(embs, labels):
+    sims = embs @ embs.T
+    np.fill_diagonal(sims, -1.0)
+    pred = labels[np.argmax(sims, axis=1)]
+    return pred, float(np.mean(pred == labels))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh model export với FaceNet eager")
+    parser.add_argument("--data", type=Path, default=DATA_DIR)
+    parser.add_argument("--per-student", type=int, default=0, help="Số ảnh tối đa / SV (0 = tất cả)")
+    parser.add_argument("--min-cos", type=float, default=0.999, help="Ngưỡng cosine tối thiểu cho bản fp32")
+    parser.add_argument("--min-cos-int8", type=float, default=0.98, help="Ngưỡng cosine tối thiểu cho bản int8")
+    parser.add_argument("--max-acc-drop", type=float, default=0.01, help="Rank-1 được phép giảm tối đa")
+    args = parser.parse_args()
+
+    eager = ArcfaceEmbedder(device="cpu", backend="eager")
+    print(f"📂 Đang đọc + align ảnh từ {args.data} ...")
+    faces, labels = load_faces(eager, args.data, args.per_student)
+    if len(faces) < 2:
+        print("❌ Không đủ ảnh có khuôn mặt để đánh giá")
+        return 2
+
+    base_embs, base_ms = embed_all(eager, faces)
+    base_pred, base_acc = rank1(base_embs, labels)
+    print(f"\n{len(faces)} ảnh / {len(set(labels))} SV")
+    print(f"{'backend':<18}{'ms/mặt':>8}{'cos min':>10}{'cos mean':>10}{'rank-1':>9}{'trùng eager':>13}")
+    print(f"{'eager':<18}{base_ms:>8.1f}{1.0:>10.4f}{1.0:>10.4f}{base_acc:>9.3f}{1.0:>13.3f}")
+
+    failed, tested = 0, 0
+    for name, fname in EMBEDDER_ARTIFACTS.items():
+        if not (EXPORT_DIR / fname).exists():
+            continue
+        embedder = ArcfaceEmbedder(device="cpu", backend=name)
+        if embedder.backend != name:
+            # File có nhưng nạp lỗi (server sẽ âm thầm quay về eager) -> tính là không đạt
+            print(f"{name:<18}  ❌ có file {fname} nhưng không nạp được")
+            failed += 1
+            tested += 1
+            continue
+        embedder.warmup()
+        embs, ms = embed_all(embedder, faces)
+        cos = np.sum(embs * base_embs, axis=1)
+        pred, acc = rank1(embs, labels)
+        agree = float(np.mean(pred == base_pred))
+
+        min_cos = args.min_cos_int8 if name.endswith("int8") else args.min_cos
+        ok = cos.min() >= min_cos and base_acc - acc <= args.max_acc_drop
+        failed += not ok
+        tested += 1
+        print(f"{name:<18}{ms:>8.1f}{cos.min():>10.4f}{cos.mean():>10.4f}{acc:>9.3f}{agree:>13.3f}"
+              f"  {'✅' if ok else '❌'}")
+
+    if not tested:
+        print(f"\n⚠️ Chưa có model export trong {EXPORT_DIR} - chạy export_models.py trước")
+        return 2
+    print(f"\n{failed} bản không đạt ngưỡng" if failed else "\nMọi bản export đều đạt ngưỡng")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import sys
+import argparse
+from pathlib import Path
+
+import torch
+from facenet_pytorch import InceptionResnetV1, MTCNN
+
+# --- CẤU HÌNH ĐƯỜNG DẪN ---
+# File này nằm ở: backend/app/ai/training/export_models.py
+current_file = Path(__file__).resolve()
+project_root = current_file.parents[4]
+sys.path.insert(0, str(project_root))
+
+from backend.app.ai.face.exported import EXPORT_DIR, EMBEDDER_ARTIFACTS, MTCNN_ARTIFACTS, INPUT_SHAPE
+
+# ==============================================================================
+# Export model sang TorchScript / ONNX cho inference CPU
+#   python -m backend.app.ai.training.export_models            # FaceNet -> TorchScript
+#   python -m backend.app.ai.training.export_models --all      # + int8, ONNX, P/R/O-net của MTCNN
+# Sau khi export: chạy eval_export_parity.py để so độ chính xác với model eager.
+# ==============================================================================
+
+
+def _load_eager():
+    return InceptionResnetV1(pretrained='vggface2').eval()
+
+
+# ===============================
+# 1. FACENET -> TORCHSCRIPT (+ INT8)
+# ===============================
+def export_torchscript(model, out_dir, int8=False):
+    example = torch.zeros(INPUT_SHAPE)
+    name = "torchscript"
+    if int8:
+        # Dynamic quantization: chỉ lượng tử hóa lớp Linear (đầu embedding 1792->512);
+        # Conv vẫn fp32 nên mức tăng tốc nhỏ hơn ONNX int8, bù lại sai khác rất ít
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        name = "torchscript_int8"
+
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+    # Chỉ freeze: optimize_for_inference biến trọng số thành hằng MKLDNN không serialize được
+    # (file lưu thiếu trọng số, torch.jit.load lỗi) -> áp dụng sau khi nạp (face/exported.py)
+    traced = torch.jit.freeze(traced)
+
+    path = out_dir / EMBEDDER_ARTIFACTS[name]
+    traced.save(str(path))
+    print(f"✅ {name}: {path}")
+    return path
+
+
+# ===============================
+# 2. FACENET -> ONNX (+ INT8)
+# ===============================
+def export_onnx(model, out_dir, int8=False):
+    path = out_dir / EMBEDDER_ARTIFACTS["onnx"]
+    torch.onnx.export(
+        model, torch.zeros(INPUT_SHAPE), str(path),
+        input_names=["input"], output_names=["embedding"],
+        dynamic_axes={"input": {0: "batch"}, "embedding": {0: "batch"}},
+        opset_version=17,
+    )
+    print(f"✅ onnx: {path}")
+
+    if int8:
+        try:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+        except ImportError:
+            print("⚠️ Chưa cài onnxruntime -> bỏ qua onnx_int8")
+            return path
+        q_path = out_dir / EMBEDDER_ARTIFACTS["onnx_int8"]
+        quantize_dynamic(str(path), str(q_path), weight_type=QuantType.QInt8)
+        print(f"✅ onnx_int8: {q_path}")
+    return path
+
+
+# ===============================
+# 3. MTCNN P/R/O-NET -> TORCHSCRIPT
+# ===============================
+def export_mtcnn(out_dir):
+    mtcnn = MTCNN(device='cpu')
+    # P-net là fully-convolutional (nhận mọi kích thước ảnh) -> script; R/O-net nhận crop cố định 24 / 48
+    nets = {
+        "pnet": torch.jit.script(mtcnn.pnet.eval()),
+        "rnet": torch.jit.trace(mtcnn.rnet.eval(), torch.zeros(1, 3, 24, 24)),
+        "onet": torch.jit.trace(mtcnn.onet.eval(), torch.zeros(1, 3, 48, 48)),
+    }
+    for attr, net in nets.items():
+        path = out_dir / MTCNN_ARTIFACTS[attr]
+        torch.jit.freeze(net).save(str(path))
+        print(f"✅ {attr}: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export FaceNet / MTCNN sang TorchScript, ONNX (tùy chọn int8)")
+    parser.add_argument("--out", type=Path, default=EXPORT_DIR, help="Thư mục lưu (mặc định AI_EXPORT_DIR)")
+    parser.add_argument("--int8", action="store_true", help="Thêm bản dynamic-quantized int8")
+    parser.add_argument("--onnx", action="store_true", help="Thêm bản ONNX (cần onnx, onnxruntime)")
+    parser.add_argument("--mtcnn", action="store_true", help="Export cả P/R/O-net của MTCNN")
+    parser.add_argument("--all", action="store_true", help="= --int8 --onnx --mtcnn")
+    args = parser.parse_args()
+    if args.all:
+        args.int8 = args.onnx = args.mtcnn = True
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    print(f"📦 Export vào {args.out}")
+
+    export_torchscript(_load_eager(), args.out)
+    if args.int8:
+        export_torchscript(_load_eager(), args.out, int8=True)
+    if args.onnx:
+        export_onnx(_load_eager(), args.out, int8=args.int8)
+    if args.mtcnn:
+        export_mtcnn(args.out)
+
+    print("👉 Kiểm tra độ chính xác: python -m backend.app.ai.training.eval_export_parity")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ if str(project_root) not in sys.path:
 # Import class Embedder
 try:
     from backend.app.ai.face.arcface_embedder import ArcfaceEmbedder
+    from backend.app.ai.face.calibration import MATCH_THRESHOLD
 except ImportError as e:
     print(f"❌ Lỗi Import: {e}")
     print("👉 Hãy kiểm tra lại file 'backend/app/ai/face/arcface_embedder.py'")
@@ -33,8 +34,9 @@ except ImportError as e:
 DATA_DIR = os.path.join(project_root, "backend", "app", "data", "face")
 OUT_FILE = os.path.join(project_root, "backend", "app", "models", "face_encodings.pkl")
 
-# NGƯỠNG NHẬN DIỆN (Dựa trên kết quả Test 0.901 của bạn)
-RECOMMENDED_THRESHOLD = 0.80 
+# NGƯỠNG NHẬN DIỆN: dùng chung ngưỡng với server (MATCH_THRESHOLD, face/calibration.py);
+# ngưỡng riêng từng SV tính sẵn offline: python -m backend.app.ai.training.calibrate_thresholds --db --write
+RECOMMENDED_THRESHOLD = MATCH_THRESHOLD
 
 def train_embeddings():
     # Khởi tạo embedder (Model ArcFace + MTCNN Align)
@@ -129,7 +131,7 @@ def train_embeddings():
         "encodings": np.vstack(encs).astype(np.float32),
         "names": names,
         "meta": meta,
-        "threshold": RECOMMENDED_THRESHOLD # <-- Lưu ngưỡng 0.80
+        "threshold": RECOMMENDED_THRESHOLD
     }
 
     os.makedirs(os.path.dirname(OUT_FILE), exist_ok=True)
@@ -0,0 +1,93 @@
+# backend/app/ai/warmup.py
+# Nạp model AI ở thread nền sau khi server đã nhận request:
+#   - endpoint không dùng AI (lớp, SV, lịch sử, ...) phục vụ ngay
+#   - /ready trả 503 cho tới khi mọi model sẵn sàng (health check / autoscale của Render)
+#   - request AI đến sớm vẫn chạy được: getter dùng lock, chỉ chờ model đang nạp dở
+
+import os
+import time
+import threading
+import traceback
+
+AI_WARMUP = os.getenv("AI_WARMUP", "1") != "0"
+
+# Tên bước -> hàm nạp (import bên trong để import module này không kéo theo torch)
+def _load_detector():
+    import numpy as np
+    from PIL import Image
+    from backend.app.ai.face.detector import get_mtcnn
+    # 1 lượt detect trên ảnh nhiễu: cấp phát sẵn cho P-net (ảnh không có mặt nên R/O-net thường không chạy)
+    noise = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    get_mtcnn().detect(Image.fromarray(noise))
+
+def _load_embedder():
+    from backend.app.ai.face.arcface_embedder import get_arcface_embedder
+    embedder = get_arcface_embedder()
+    ms = embedder.warmup()
+    return f"backend={embedder.backend}, {ms:.0f} ms/lượt sau warm-up"
+
+def _load_fake_detector():
+    from backend.app.ai.student_embedding import get_fake_detector
+    get_fake_detector()
+
+def _load_gallery():
+    from backend.app.ai.smart_face_attendance import get_gallery
+    known = get_gallery()
+    return f"{len(known['meta'])} embedding"
+
+STEPS = [
+    ("detector", _load_detector),
+    ("embedder", _load_embedder),
+    ("fake_detector", _load_fake_detector),
+    ("gallery", _load_gallery),
+]
+
+_state = {name: {"status": "pending"} for name, _ in STEPS}
+_lock = threading.Lock()
+_thread = None
+
+
+def _run():
+    # Số luồng torch / OpenCV: áp dụng trước khi model đầu tiên chạy (import torch ở đây, không ở lúc import app)
+    from backend.app.ai.inference_runtime import apply_inference_threads
+    apply_inference_threads()
+    for name, load in STEPS:
+        with _lock:
+            _state[name] = {"status": "loading"}
+        t0 = time.perf_counter()
+        try:
+            info = load()
+            entry = {"status": "ready", "seconds": round(time.perf_counter() - t0, 2)}
+            if info:
+                entry["info"] = info
+            print(f"✅ [WARMUP] {name} sẵn sàng sau {entry['seconds']}s")
+        except Exception as e:
+            entry = {"status": "error", "error": str(e)}
+            print(f"❌ [WARMUP] {name} lỗi: {e}")
+            traceback.print_exc()
+        with _lock:
+            _state[name] = entry
+
+
+def start_warmup():
+    """Chạy warm-up ở thread nền (gọi 1 lần khi startup). Gọi lại khi đang chạy thì bỏ qua."""
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_run, name="ai-warmup", daemon=True)
+        _thread.start()
+
+
+def readiness():
+    """
+    (ready, chi tiết từng model) - ready khi mọi bước đã 'ready'.
+    Có bước lỗi (vd DB chưa lên khi nạp gallery) và warm-up đã dừng -> chạy lại (bước đã nạp bỏ qua ngay).
+    """
+    with _lock:
+        models = {name: dict(entry) for name, entry in _state.items()}
+        finished = _thread is not None and not _thread.is_alive()
+    ready = all(entry["status"] == "ready" for entry in models.values())
+    if finished and any(entry["status"] == "error" for entry in models.values()):
+        start_warmup()
+    return ready, models
@@ -1,21 +1,30 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
-from fastapi.responses import JSONResponse
-import cv2
-import numpy as np
-import pymysql
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import traceback
+import uuid
 from datetime import datetime, date
-from typing import List
+from typing import List, Optional
 
 # Import Models
 from backend.app.models.student import Student
 from backend.app.models.study import Study
 from backend.app.models.attendance import Attendance
-from backend.app.database import get_db
+from backend.app.database import get_db, get_async_db
+from backend.app.ai.face.frame import decode_upload
+from backend.app.services.upload_service import read_upload, MAX_BATCH_IMAGES
+from backend.app.services.recognition_service import collect_students
+from backend.app.crud.attendance_crud import record_checkin, checkin_students
+from backend.app.services import history_service
+from backend.app.services.export_service import (
+    iter_export_batches, iter_export_rows, stream_csv, write_xlsx, write_parquet, stream_file_and_delete
+)
 
 # SQLAlchemy
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -27,31 +36,16 @@ class ManualCheckinRequest(BaseModel):
     study_id: int
     session_date: str
 
-# Helper function (giữ nguyên logic cũ của bạn)
-def get_study_id(student_id, class_id):
-    conn = pymysql.connect(
-        host="localhost",
-        user="root",
-        password="",
-        database="python_project",
-        charset="utf8mb4"
-    )
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT StudyID FROM study WHERE StudentID=%s AND ClassID=%s",
-        (student_id, class_id)
-    )
-    row = cursor.fetchone()
-    conn.close()
-    return row[0] if row else None
+# Các endpoint nóng (điểm danh, chi tiết buổi, lịch sử) dùng AsyncSession: chờ DB không giữ thread.
+# Code CRUD / service sync dùng lại nguyên vẹn qua `await db.run_sync(fn, ...)`.
 
 # ==========================================
 # 2. API ĐIỂM DANH THỦ CÔNG
 # ==========================================
 @router.post("/manual-checkin")
-def manual_checkin(
+async def manual_checkin(
     payload: ManualCheckinRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Điểm danh thủ công:
@@ -68,31 +62,21 @@ def manual_checkin(
             print(f"ERROR: Lỗi format ngày: {e}")
             raise HTTPException(status_code=400, detail="Ngày không hợp lệ (format: YYYY-MM-DD)")
         
-        # 2. Kiểm tra đã tồn tại chưa
-        existing = db.query(Attendance).filter(
-            Attendance.StudyID == payload.study_id,
-            Attendance.Date == date_obj
-        ).first()
-        
-        if existing:
+        # 2. Lưu điểm danh + cập nhật bảng tổng hợp (1 transaction)
+        # QUAN TRỌNG: Time lấy giờ hiện tại, PhotoPath để rỗng
+        status, new_attendance = await db.run_sync(record_checkin, payload.study_id, date_obj)
+
+        if status == "Duplicate":
             return {
                 "success": False,
                 "message": "Sinh viên đã được điểm danh rồi"
             }
-        
-        # 3. Tạo bản ghi mới
-        # QUAN TRỌNG: Time lấy giờ hiện tại, PhotoPath để rỗng
-        new_attendance = Attendance(
-            StudyID=payload.study_id,
-            Date=date_obj,
-            Time=datetime.now().time(), 
-            PhotoPath=""                 
-        )
-        
-        db.add(new_attendance)
-        db.commit()
-        db.refresh(new_attendance)
-        
+        if status == "NotFound":
+            return {
+                "success": False,
+                "message": "Không tìm thấy sinh viên trong lớp"
+            }
+
         return {
             "success": True,
             "message": "Điểm danh thành công",
@@ -100,7 +84,7 @@ def manual_checkin(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print("❌ LỖI DATABASE:", traceback.format_exc())
         return {
             "success": False,
@@ -114,59 +98,139 @@ def manual_checkin(
 async def recognize_attendance(
     file: UploadFile = File(...),
     class_id: int = Form(...),
+    image_format: Optional[str] = Form(None),
+    width: Optional[int] = Form(None),
+    height: Optional[int] = Form(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Nhận diện khuôn mặt cho điểm danh"""
+    """
+    Nhận diện khuôn mặt cho điểm danh.
+    Ảnh: JPEG / PNG / WebP (nên thu nhỏ sẵn ở client), hoặc RGB thô: image_format=raw_rgb + width + height
+    """
+    # Đọc ảnh theo khối, quá MAX_FILE_SIZE -> 413 (ngoài try: không bị đổi thành lỗi 500)
+    content = await read_upload(file)
     try:
-        # Đọc ảnh
-        content = await file.read()
-        nparr = np.frombuffer(content, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Giải mã (ảnh lớn decode thu nhỏ) + model AI chạy trong threadpool, không chặn event loop
+        try:
+            img = await run_in_threadpool(decode_upload, content, image_format, width, height)
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
         
         if img is None:
             return JSONResponse(status_code=400, content={"status": "error", "message": "Không đọc được ảnh"})
         
-        # Gọi smart_face_attendance
-        from backend.app.ai.smart_face_attendance import match_image_and_check_real, save_attendance_to_db
-        
-        result = match_image_and_check_real(img)
-        print("DEBUG result:", result)
-        
+        # Gọi smart_face_attendance (ảnh có thể có nhiều mặt -> danh sách faces)
+        from backend.app.ai.smart_face_attendance import match_frames
+
+        result = (await run_in_threadpool(match_frames, [img], [f"class-{class_id}"], False, class_id))[0]
+
         if result.get('status') != 'ok':
             return JSONResponse(status_code=400, content=result)
-        
-        if not result.get('found'):
+
+        students, stats = collect_students([result])
+        if not students:
+            if stats["fake_faces"]:
+                return JSONResponse(status_code=403, content={"status": "fake", "message": "Ảnh nghi ngờ giả mạo"})
             return JSONResponse(status_code=404, content={"status": "not_found", "message": "Không khớp với sinh viên nào"})
-        
-        if not result.get('is_real'):
-            return JSONResponse(status_code=403, content={"status": "fake", "message": "Ảnh nghi ngờ giả mạo", "real_conf": result.get('real_conf')})
-        
-        # Lưu điểm danh
-        student = result.get('student', {})
-        student_id = student.get('id')
-        
-        study_id = get_study_id(student_id, class_id)
-        if not study_id:
+
+        # Lưu điểm danh cho mọi SV nhận ra trong ảnh (1 transaction)
+        statuses = await db.run_sync(
+            checkin_students, [s["student_id"] for s in students], class_id, date.today(),
+            None, {s["student_id"]: f"similarity_{s['similarity']:.2f}" for s in students}
+        )
+        for s in students:
+            s["status"] = statuses[s["student_id"]]
+
+        in_class = [s for s in students if s["status"] != "NotInClass"]
+        if not in_class:
             return JSONResponse(status_code=400, content={"status": "error", "message": "Sinh viên chưa thuộc lớp này!"})
-        
-        save_attendance_to_db(study_id, result.get('similarity'))
-        
+
+        # "student" / "similarity": SV khớp tốt nhất (giữ tương thích client cũ)
+        top = in_class[0]
         return {
             "status": "ok",
-            "student": student,
-            "similarity": result.get('similarity'),
-            "real_conf": result.get('real_conf'),
+            "student": {"id": top["student_id"], "name": top["name"], "code": top["code"]},
+            "similarity": top["similarity"],
+            "students": students,
             "message": "✅ Điểm danh thành công"
         }
-        
+
     except Exception as e:
         print("ERROR in recognize_attendance:", str(e))
         return JSONResponse(status_code=500, content={"status": "error", "message": f"Lỗi server: {str(e)}"})
 
+@router.post("/recognize-batch/{class_id}")
+async def recognize_attendance_batch(
+    class_id: int,
+    files: List[UploadFile] = File(...),
+    session_date: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Điểm danh từ nhiều ảnh nhóm của cùng 1 buổi học (tối đa MAX_BATCH_IMAGES ảnh):
+    - decode song song, detect từng ảnh, embedding mọi mặt của mọi ảnh theo batch, so khớp 1 lần
+    - 1 SV có mặt ở nhiều ảnh chỉ tính 1 lần; mặt nghi giả mạo không được điểm danh
+    - điểm danh mọi SV nhận ra trong 1 transaction
+    - session_date (YYYY-MM-DD, mặc định hôm nay) để upload ảnh sau buổi học
+    """
+    if len(files) > MAX_BATCH_IMAGES:
+        raise HTTPException(status_code=413, detail=f"Tối đa {MAX_BATCH_IMAGES} ảnh / lần")
+    date_obj = _parse_date_param(session_date, "session_date") or date.today()
+
+    # Đọc ảnh theo khối, ảnh nào quá MAX_FILE_SIZE -> 413 (ngoài try: không bị đổi thành lỗi 500)
+    contents = [await read_upload(f) for f in files]
+    try:
+        from backend.app.ai.smart_face_attendance import match_frames
+
+        # cv2.imdecode nhả GIL -> decode các ảnh song song trong threadpool
+        frames = await asyncio.gather(*(run_in_threadpool(decode_upload, c) for c in contents))
+        valid = [i for i, frame in enumerate(frames) if frame is not None]
+        failed_images = [files[i].filename or str(i) for i in range(len(frames)) if frames[i] is None]
+        if not valid:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "Không đọc được ảnh nào",
+                                                          "failed_images": failed_images})
+
+        # Mỗi ảnh 1 source riêng: lịch sử liveness không trộn giữa các ảnh
+        batch_id = uuid.uuid4().hex[:8]
+        matched = await run_in_threadpool(
+            match_frames, [frames[i] for i in valid], [f"batch-{batch_id}-{i}" for i in valid], False, class_id
+        )
+        results = [{"status": "error", "faces": []} for _ in frames]
+        for i, result in zip(valid, matched):
+            results[i] = result
+
+        students, stats = collect_students(results)
+        statuses = {}
+        if students:
+            statuses = await db.run_sync(
+                checkin_students, [s["student_id"] for s in students], class_id, date_obj,
+                None, {s["student_id"]: f"similarity_{s['similarity']:.2f}" for s in students}
+            )
+        summary = {"Success": 0, "Duplicate": 0, "NotInClass": 0}
+        for s in students:
+            s["status"] = statuses[s["student_id"]]
+            summary[s["status"]] += 1
+
+        return {
+            "status": "ok",
+            "class_id": class_id,
+            "session_date": date_obj.isoformat(),
+            "summary": summary,
+            "stats": stats,
+            "failed_images": failed_images,
+            "students": students,
+        }
+
+    except Exception as e:
+        await db.rollback()
+        print("ERROR in recognize_attendance_batch:", traceback.format_exc())
+        return JSONResponse(status_code=500, content={"status": "error", "message": f"Lỗi server: {str(e)}"})
+
 # ==========================================
 # 4. API LẤY CHI TIẾT BUỔI HỌC (Cho trang Session Detail)
 # ==========================================
 @router.get("/session-detail/{class_id}/{session_date}")
-def get_session_detail(class_id: int, session_date: str, db: Session = Depends(get_db)):
+async def get_session_detail(class_id: int, session_date: str, db: AsyncSession = Depends(get_async_db)):
     """
     Lấy danh sách SV đã điểm danh và chưa điểm danh trong một ngày cụ thể
     """
@@ -176,8 +240,8 @@ def get_session_detail(class_id: int, session_date: str, db: Session = Depends(g
         raise HTTPException(status_code=400, detail="Ngày không hợp lệ (format: YYYY-MM-DD)")
     
     # Query danh sách sinh viên và join với bảng Attendance
-    students = (
-        db.query(
+    stmt = (
+        select(
             Student.StudentID,
             Student.FullName,
             Student.StudentCode,
@@ -190,9 +254,9 @@ def get_session_detail(class_id: int, session_date: str, db: Session = Depends(g
             Attendance,
             (Attendance.StudyID == Study.StudyID) & (Attendance.Date == session_date_obj)
         )
-        .filter(Study.ClassID == class_id)
-        .all()
+        .where(Study.ClassID == class_id)
     )
+    students = (await db.execute(stmt)).all()
     
     attended = []
     absent = []
@@ -226,138 +290,97 @@ def get_session_detail(class_id: int, session_date: str, db: Session = Depends(g
 # 5. API LẤY LỊCH SỬ ĐIỂM DANH CÁ NHÂN (Cho trang Student Detail)
 # ==========================================
 @router.get("/history/{class_id}/{student_id}")
-def get_student_history(class_id: int, student_id: int, db: Session = Depends(get_db)):
+async def get_student_history(class_id: int, student_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Lấy lịch sử điểm danh đầy đủ (Có mặt + Vắng) của 1 sinh viên
+    (giữ format cũ: list các buổi, mới nhất lên đầu)
     """
     try:
-        # 1. Lấy StudyID
-        study_entry = db.query(Study).filter(
-            Study.ClassID == class_id,
-            Study.StudentID == student_id
-        ).first()
-        
-        if not study_entry:
-            return []
-
-        target_study_id = study_entry.StudyID
-
-        # 2. Lấy danh sách TẤT CẢ các ngày đã điểm danh của lớp này
-        # (Tìm những ngày mà lớp có ít nhất 1 bản ghi điểm danh)
-        class_dates = (
-            db.query(Attendance.Date)
-            .join(Study, Study.StudyID == Attendance.StudyID)
-            .filter(Study.ClassID == class_id)
-            .distinct()
-            .order_by(Attendance.Date)
-            .all()
-        )
-        
-        # 3. Lấy dữ liệu điểm danh của riêng sinh viên này
-        student_attendance = db.query(Attendance).filter(
-            Attendance.StudyID == target_study_id
-        ).all()
-        
-        # Map: Date -> Attendance Record
-        attended_map = {att.Date: att for att in student_attendance}
-        
-        # 4. Tổng hợp
-        history = []
-        for idx, row in enumerate(class_dates, start=1):
-            session_date = row.Date
-            att_record = attended_map.get(session_date)
-            
-            is_present = att_record is not None
-            
-            # Xử lý hiển thị giờ
-            time_str = "--:--"
-            if is_present:
-                # Nếu có giờ thì hiện giờ, nếu không (check tay cũ) thì hiện 'Thủ công'
-                if att_record.Time:
-                    time_str = att_record.Time.strftime("%H:%M:%S")
-                else:
-                    time_str = "Thủ công"
-
-            history.append({
-                "SessionNumber": idx,                  
-                "Date": session_date.strftime("%d/%m/%Y"),
-                "IsPresent": is_present,
-                "Time": time_str
-            })
-            
-        # Trả về danh sách (Mới nhất lên đầu)
-        return history[::-1]
-
+        history = await db.run_sync(history_service.get_student_history, class_id, student_id)
+        return history["History"] if history else []
     except Exception as e:
         print(f"Error history: {e}")
         return []
 
 
-# ... (Giữ nguyên các import cũ) ...
+@router.get("/history-summary/{class_id}/{student_id}")
+async def get_student_history_summary(class_id: int, student_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Lịch sử + thống kê của 1 SV từ 1 câu SQL:
+    TotalSessions, Present, Absent, AttendanceRate (%), History (mới nhất lên đầu)
+    """
+    history = await db.run_sync(history_service.get_student_history, class_id, student_id)
+    if not history:
+        raise HTTPException(status_code=404, detail="Sinh viên không thuộc lớp này")
+    return history
+
+
+@router.get("/history/{class_id}")
+async def get_class_histories(class_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Lịch sử + thống kê của TẤT CẢ SV trong lớp (1 request, 1 câu SQL)
+    - dùng cho báo cáo chuyên cần / cảnh báo vắng của cả lớp
+    """
+    return await db.run_sync(history_service.get_class_histories, class_id)
+
+
+# ==========================================
+# 6. API XUẤT DỮ LIỆU ĐIỂM DANH (CSV / Excel / Parquet)
+# ==========================================
+def _parse_date_param(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} không hợp lệ (format: YYYY-MM-DD)")
+
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
 
 @router.get("/export/{class_id}")
-def export_class_attendance(class_id: int, db: Session = Depends(get_db)):
+def export_class_attendance(
+    class_id: int,
+    format: str = Query("json", pattern="^(json|csv|xlsx|parquet)$"),
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
     API lấy dữ liệu để xuất Excel:
     Lấy danh sách tất cả sinh viên + thời gian điểm danh (nếu có) theo từng ngày.
+    - Chỉ dùng 1 câu SQL (study x ngày học LEFT JOIN attendance), đọc theo batch từ server-side cursor
+    - format=csv | xlsx | parquet: stream file (chunked), không giữ cả học kỳ trong RAM
+    - format=json (mặc định): giữ tương thích client cũ
+    - date_from / date_to (YYYY-MM-DD) để lọc theo khoảng ngày
     """
-    try:
-        # 1. Lấy danh sách tất cả các buổi học của lớp
-        dates = (
-            db.query(Attendance.Date)
-            .join(Study, Study.StudyID == Attendance.StudyID)
-            .filter(Study.ClassID == class_id)
-            .distinct()
-            .order_by(Attendance.Date)
-            .all()
-        )
-        
-        # 2. Lấy danh sách sinh viên
-        students = (
-            db.query(Student.StudentCode, Student.FullName, Study.StudyID)
-            .join(Study, Study.StudentID == Student.StudentID)
-            .filter(Study.ClassID == class_id)
-            .all()
-        )
+    d_from = _parse_date_param(date_from, "date_from")
+    d_to = _parse_date_param(date_to, "date_to")
+
+    if format == "json":
+        try:
+            return list(iter_export_rows(db, class_id, d_from, d_to))
+        except Exception as e:
+            print(f"Export Error: {e}")
+            return []
 
-        export_data = []
-
-        # 3. Duyệt qua từng ngày và từng sinh viên để lấy trạng thái
-        for d_row in dates:
-            checkin_date = d_row.Date
-            
-            # Lấy các bản ghi điểm danh của ngày hôm đó
-            attendance_records = db.query(Attendance).filter(
-                Attendance.Date == checkin_date,
-                Attendance.StudyID.in_([s.StudyID for s in students])
-            ).all()
-            
-            # Map StudyID -> Record
-            att_map = {att.StudyID: att for att in attendance_records}
-
-            for stu in students:
-                record = att_map.get(stu.StudyID)
-                
-                time_str = ""
-                status = "Vắng"
-                
-                if record:
-                    status = "Có mặt"
-                    if record.Time:
-                        time_str = record.Time.strftime("%H:%M:%S")
-                    else:
-                        time_str = "Thủ công"
-
-                export_data.append({
-                    "MSSV": stu.StudentCode,
-                    "Họ Tên": stu.FullName,
-                    "Ngày": checkin_date.strftime("%d/%m/%Y"),
-                    "Giờ": time_str,
-                    "Trạng thái": status
-                })
-                
-        return export_data
+    batches = iter_export_batches(db, class_id, d_from, d_to)
+    file_name = f"DiemDanh_{class_id}_{datetime.now().strftime('%d%m%Y')}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{file_name}"'}
 
-    except Exception as e:
-        print(f"Export Error: {e}")
-        return []
\ No newline at end of file
+    if format == "csv":
+        body = stream_csv(batches)
+    elif format == "xlsx":
+        body = stream_file_and_delete(write_xlsx(batches))
+    else:
+        try:
+            body = stream_file_and_delete(write_parquet(batches))
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Server chưa cài pyarrow để xuất Parquet")
+
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
@@ -8,6 +8,7 @@ import shutil
 from sqlalchemy.orm import Session
 from backend.app.database import get_db
 from backend.app.models.student import Student
+from backend.app.services.vn_text import safe_name
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -30,13 +31,6 @@ class CaptureUpload(BaseModel):
     full_name: str
     images: list[str]
 
-def safe_name(s: str):
-    """Chuyển tên tiếng Việt thành ASCII an toàn"""
-    import re, unicodedata
-    s = unicodedata.normalize('NFD', s).encode('ascii', 'ignore').decode()
-    s = re.sub(r'[^A-Za-z0-9_-]+', '_', s).strip('_')
-    return s or "student"
-
 @router.post("/save-face-images")
 async def save_face_images(
     payload: CaptureUpload,
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from datetime import datetime
+from typing import Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
 
 
 from backend.app.database import get_db
-from backend.app.schemas.class_schemas import ClassCreate, ClassOut
-from backend.app.crud.class_crud import create_class, get_all_classes
-from backend.app.models.major import Major
-from backend.app.models.type import Type
-from backend.app.models.shift import Shift
+from backend.app.schemas.class_schemas import ClassCreate, ClassOut, ClassPage
+from backend.app.crud.class_crud import create_class, get_all_classes, list_classes_page
+from backend.app.crud.attendance_crud import get_session_counts, on_study_added, on_study_removed
+from backend.app.services.overview_service import get_class_version, build_class_overview
+from backend.app.services.reference_cache import get_reference_cache, not_modified
 from backend.app.models.class_model import Class
 from backend.app.models.teach import Teach
 from backend.app.models.study import Study
@@ -50,6 +52,35 @@ def api_create_class(class_data: ClassCreate, db: Session = Depends(get_db)):
 def api_list_classes(db: Session = Depends(get_db)):
     return get_all_classes(db)
 
+# ------------------ LIST CLASSES (PHÂN TRANG) ------------------
+@router.get("/page", response_model=ClassPage)
+def api_list_classes_page(
+    id_login: Optional[int] = None,
+    major_id: Optional[int] = None,
+    type_id: Optional[int] = None,
+    shift_id: Optional[int] = None,
+    semester: Optional[str] = None,
+    year: Optional[int] = Query(None, ge=1900, le=2999),
+    q: Optional[str] = None,
+    sort: str = Query("name", pattern="^(id|name|full_name|date_start)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Danh sách lớp phân trang keyset + lọc/sắp xếp ở DB (thay cho /list trả toàn bộ).
+    Trang sau: gửi lại `next_cursor`. id_login: chỉ lớp của giảng viên đó.
+    """
+    try:
+        return list_classes_page(
+            db, id_login=id_login, major_id=major_id, type_id=type_id, shift_id=shift_id,
+            semester=semester, year=year, q=q, sort=sort, descending=(order == "desc"),
+            limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # ------------------ STATS ------------------
 @router.get("/dashboard/stats")
 def api_dashboard_stats(db: Session = Depends(get_db)):
@@ -68,20 +99,30 @@ def api_dashboard_stats(db: Session = Depends(get_db)):
     }
 
 # ------------------ DROPDOWN DATA ------------------
+# Danh mục đọc từ cache trong RAM (reference_cache), hỗ trợ ETag / 304
 @router.get("/majors")
-def api_get_majors(db: Session = Depends(get_db)):
-    majors = db.query(Major).all()
-    return [{"MajorID": m.MajorID, "MajorName": m.MajorName} for m in majors]
+def api_get_majors(request: Request, response: Response):
+    ref = get_reference_cache()
+    cached = not_modified(request, response, ref)
+    if cached:
+        return cached
+    return [{"MajorID": m["MajorID"], "MajorName": m["MajorName"]} for m in ref.majors.values()]
 
 @router.get("/types")
-def api_get_types(db: Session = Depends(get_db)):
-    types = db.query(Type).all()
-    return [{"TypeID": t.TypeID, "TypeName": t.TypeName} for t in types]
+def api_get_types(request: Request, response: Response):
+    ref = get_reference_cache()
+    cached = not_modified(request, response, ref)
+    if cached:
+        return cached
+    return list(ref.types.values())
 
 @router.get("/shifts")
-def api_get_shifts(db: Session = Depends(get_db)):
-    shifts = db.query(Shift).all()
-    return [{"ShiftID": s.ShiftID, "ShiftName": s.ShiftName} for s in shifts]
+def api_get_shifts(request: Request, response: Response):
+    ref = get_reference_cache()
+    cached = not_modified(request, response, ref)
+    if cached:
+        return cached
+    return [{"ShiftID": s["ShiftID"], "ShiftName": s["ShiftName"]} for s in ref.shifts.values()]
 
 # ------------------ CLASSES OF TEACHER ------------------
 @router.get("/by_teacher/{id_login}", response_model=list[ClassOut])
@@ -115,17 +156,39 @@ def get_students_in_class(class_id: int, db: Session = Depends(get_db)):
 # ------------------ ATTENDANCE REPORT ------------------
 @router.get("/attendance_by_date/{class_id}")
 def attendance_by_date(class_id: int, db: Session = Depends(get_db)):
-    result = (
-        db.query(Attendance.Date, func.count(Study.StudentID).label("present"))
-        .join(Study, Attendance.StudyID == Study.StudyID)
-        .filter(Study.ClassID == class_id)
-        .group_by(Attendance.Date)
-        .order_by(Attendance.Date)
-        .all()
-    )
-    return [{"date": r[0], "present": r[1]} for r in result]
+    # Đọc sĩ số từng buổi từ bảng tổng hợp (không GROUP BY trên attendance)
+    result = get_session_counts(db, class_id)
+    return [{"date": r.Date, "present": r.PresentCount} for r in result]
+
+
+
 
+# ------------------ CLASS OVERVIEW (roster + buổi học + buổi đang chọn) ------------------
+@router.get("/overview/{class_id}")
+def class_overview(
+    class_id: int,
+    request: Request,
+    response: Response,
+    session_date: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    1 request thay cho students_in_class + attendance_by_date + session-detail.
+    Hỗ trợ ETag: client gửi If-None-Match, dữ liệu không đổi -> 304 (chỉ tốn 1 query version).
+    """
+    date_obj = None
+    if session_date:
+        try:
+            date_obj = datetime.strptime(session_date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ngày không hợp lệ (format: YYYY-MM-DD)")
 
+    etag = f'W/"{get_class_version(db, class_id)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return build_class_overview(db, class_id, date_obj)
 
 
 # ------------------ ATTENDANCE SESSION DETAIL ------------------
@@ -210,6 +273,10 @@ def assign_student_to_class(payload: AssignStudentRequest, db: Session = Depends
     # tăng sĩ số lớp
     cls.Quantity = (cls.Quantity or 0) + 1
 
+    # SV mới vắng tất cả các buổi đã diễn ra
+    db.flush()
+    on_study_added(db, new_study.StudyID, payload.class_id)
+
     db.commit()
 
     return {"message": "Student assigned successfully", "class_id": payload.class_id}
@@ -223,6 +290,7 @@ def remove_student_from_class(data: dict, db: Session = Depends(get_db)):
     if not study_row:
         return {"success": False, "msg": "Không tìm thấy sinh viên trong lớp"}
     study_id = study_row.StudyID
+    on_study_removed(db, study_id, class_id)
     db.query(Attendance).filter(Attendance.StudyID == study_id).delete()
     db.query(Study).filter(Study.StudyID == study_id).delete()
     db.commit()
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-
-# ĐÚNG: get_db nằm ở backend/app/database.py
-from backend.app.database import get_db  
+from fastapi import APIRouter, Request, Response
 
 from backend.app.schemas.major_schemas import MajorResponse
 from backend.app.services.major_service import get_majors_service
+from backend.app.services.reference_cache import get_reference_cache, not_modified
 
 router = APIRouter()
 
 @router.get("/", response_model=list[MajorResponse])
-def get_majors(db: Session = Depends(get_db)):
-    return get_majors_service(db)
+def get_majors(request: Request, response: Response):
+    # Danh mục ngành đọc từ cache trong RAM (không query MySQL mỗi request)
+    ref = get_reference_cache()
+    cached = not_modified(request, response, ref)
+    if cached:
+        return cached
+    return get_majors_service(ref)
@@ -1,18 +1,27 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-import cv2
-import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from backend.app.ai.face.frame import decode_upload
+from backend.app.services.upload_service import read_upload
 
 router = APIRouter()
 
 @router.post("/ai/recognize")
-async def recognize_face(file: UploadFile = File(...)):
-    """API nhận diện khuôn mặt — KHÔNG lưu điểm danh"""
+async def recognize_face(
+    file: UploadFile = File(...),
+    image_format: Optional[str] = Form(None),
+    width: Optional[int] = Form(None),
+    height: Optional[int] = Form(None)
+):
+    """API nhận diện khuôn mặt — KHÔNG lưu điểm danh (ảnh JPEG / PNG / WebP hoặc raw_rgb + width + height)"""
+    # Đọc ảnh theo khối, quá MAX_FILE_SIZE -> 413
+    content = await read_upload(file)
     try:
-        # Đọc ảnh
-        content = await file.read()
-        nparr = np.frombuffer(content, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        try:
+            img = await run_in_threadpool(decode_upload, content, image_format, width, height)
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
 
         if img is None:
             return JSONResponse(
@@ -23,7 +32,7 @@ async def recognize_face(file: UploadFile = File(...)):
         # Gọi hàm nhận diện thông minh
         from backend.app.ai.smart_face_attendance import match_image_and_check_real
 
-        result = match_image_and_check_real(img)
+        result = await run_in_threadpool(match_image_and_check_real, img)
 
         # Trả y nguyên kết quả để test
         return JSONResponse(
@@ -39,3 +48,27 @@ async def recognize_face(file: UploadFile = File(...)):
                 "message": f"Lỗi server: {str(e)}"
             }
         )
+
+
+@router.get("/ai/gallery-audit")
+async def gallery_audit(refresh: bool = False):
+    """
+    Các cặp SV khác nhau có embedding gần như trùng (kind: duplicate = cùng 1 ảnh đăng ký, lookalike = rất giống).
+    SV trong các cặp này phải khớp cách biệt hơn (CONFLICT_MARGIN) mới được điểm danh.
+    Kiểm tra O(G^2) chạy ở threadpool lần đầu gọi (hoặc refresh=true: nạp lại gallery từ DB rồi kiểm tra lại),
+    lưu tập xung đột vào DB; request nhận diện không chờ.
+    """
+    from backend.app.ai.smart_face_attendance import get_gallery
+    from backend.app.ai.face import gallery_audit as audit
+
+    known = await run_in_threadpool(get_gallery, refresh)
+    if refresh or known.get("audit_pairs") is None:
+        result = await run_in_threadpool(audit.audit_gallery, known)
+        known.update(result)
+        if len(known["meta"]):
+            await run_in_threadpool(audit.write_conflicts, known["meta"], result["conflict"])
+    return {
+        "pairs": known.get("audit_pairs") or [],
+        "conflict_students": len(set(known["labels"][known["conflict"]].tolist())) if len(known["meta"]) else 0,
+        "gallery_size": len(known["meta"]),
+    }
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from typing import Optional
 from sqlalchemy.orm import Session
 from backend.app.models.student import Student
 from backend.app.models.major import Major
@@ -8,26 +10,28 @@ from backend.app.models.class_model import Class
 from backend.app.database import get_db
 from backend.app.services.student_service import search_students, create_student
 from backend.app.schemas.student_schemas import StudentCreate
-from backend.app.crud.student_crud import get_student_detail
+from backend.app.crud.student_crud import get_student_detail, list_class_students_page
+from backend.app.services.search_index import get_student_index, student_index
+from backend.app.services.reference_cache import get_reference_cache
 
 router = APIRouter(tags=["Student"])
 
 @router.get("/search")
-def search_students(q: str = Query(..., min_length=1), limit: int = 30, db: Session = Depends(get_db)):
-    # 1. IN RA MÀN HÌNH ĐEN ĐỂ KIỂM TRA XEM FILE NÀY CÓ CHẠY KHÔNG
-    print(f"🔥🔥🔥 DEBUG SERVER: Đang tìm kiếm từ khóa = '{q}'")
+def search_students(q: str = Query(..., min_length=1), limit: int = Query(30, ge=1, le=200), db: Session = Depends(get_db)):
+    # Index trong RAM: không dấu, tiền tố từ, MSSV / chuỗi con -> StudentID đã xếp hạng
+    ids = get_student_index().search(q, limit)
+    if not ids:
+        return []
 
-    # 2. CHỈ TÌM TRONG BẢNG STUDENT (Bỏ qua Major và Type để test)
-    results = db.query(Student).filter(
-        (Student.FullName.ilike(f"%{q}%")) |
-        (Student.StudentCode.ilike(f"%{q}%"))
-    ).limit(limit).all()
+    rows = db.query(Student).filter(Student.StudentID.in_(ids)).all()
+    by_id = {s.StudentID: s for s in rows}
+    ref = get_reference_cache(db)
 
-    print(f"🔥🔥🔥 DEBUG SERVER: Tìm thấy {len(results)} kết quả")
-
-    # 3. TRẢ VỀ DỮ LIỆU ĐƠN GIẢN (Để không bị lỗi thiếu trường)
     data_response = []
-    for s in results:
+    for student_id in ids:
+        s = by_id.get(student_id)
+        if s is None:
+            continue  # SV đã bị xóa ở worker khác, index chưa rebuild
         data_response.append({
             "StudentID": s.StudentID,
             "FullName": s.FullName,
@@ -37,17 +41,14 @@ def search_students(q: str = Query(..., min_length=1), limit: int = 30, db: Sess
             "DateOfBirth": getattr(s, "DateOfBirth", None),
             "CitizenID": getattr(s, "CitizenID", ""),
             "AcademicYear": getattr(s, "AcademicYear", ""),
-            
-            # Tạm thời để trống 2 cái này để test xem SV có hiện ra không
-            "Full_name_mj": "Đang test", 
-            "TypeName": "Đang test",
-            
+            "Full_name_mj": ref.major_full_name(s.MajorID),
+            "TypeName": ref.type_name(s.TypeID),
             "ClassID": getattr(s, "ClassID", None),
             "MajorID": getattr(s, "MajorID", None),
             "TypeID": getattr(s, "TypeID", None),
             "PhotoStatus": getattr(s, "PhotoStatus", "NONE")
         })
-    
+
     return data_response
 
 @router.post("/add")
@@ -73,6 +74,7 @@ def add_student(data: StudentCreate, db: Session = Depends(get_db)):
     db.add(student)
     db.commit()
     db.refresh(student)
+    student_index.upsert(student.StudentID, student.FullName, student.StudentCode)
     return {"success": True, "student_id": student.StudentID}
 
 @router.get("/detail/{student_id}")
@@ -101,6 +103,35 @@ def get_students_in_class(class_id: int, db: Session = Depends(get_db)):
         for s in results
     ]
 
+@router.get("/page_in_class/{class_id}")
+def get_students_in_class_page(
+    class_id: int,
+    q: Optional[str] = None,
+    session_date: Optional[str] = None,
+    sort: str = Query("code", pattern="^(id|name|code)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    SV trong lớp phân trang keyset, lọc theo tiền tố tên / MSSV ở DB.
+    session_date (YYYY-MM-DD): kèm Present / AttendanceTime của buổi đó.
+    """
+    date_obj = None
+    if session_date:
+        try:
+            date_obj = datetime.strptime(session_date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Ngày không hợp lệ (format: YYYY-MM-DD)")
+    try:
+        return list_class_students_page(
+            db, class_id, q=q, session_date=date_obj, sort=sort,
+            descending=(order == "desc"), limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/update")
 def update_student(data: dict, db: Session = Depends(get_db)):
     student_id = data.get("StudentID")
@@ -112,4 +143,7 @@ def update_student(data: dict, db: Session = Depends(get_db)):
         Student.CitizenID: data.get("CitizenID"),
     })
     db.commit()
+    student = db.query(Student.StudentID, Student.FullName, Student.StudentCode).filter(Student.StudentID == student_id).first()
+    if student:
+        student_index.upsert(student.StudentID, student.FullName, student.StudentCode)
     return {"success": True}
@@ -1,10 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
+
+from backend.app.services.reference_cache import get_reference_cache, not_modified
+
 router = APIRouter()
 
 @router.get("/")
-def get_types():
-    return [
-        {"id": 1, "name": "Chính quy"},
-        {"id": 2, "name": "Liên thông"},
-        {"id": 3, "name": "Tại chức"},
-    ]
+def get_types(request: Request, response: Response):
+    # Lấy từ bảng type (qua cache trong RAM) thay cho danh sách viết cứng
+    ref = get_reference_cache()
+    cached = not_modified(request, response, ref)
+    if cached:
+        return cached
+    return [{"id": t["TypeID"], "name": t["TypeName"]} for t in ref.types.values()]
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+from typing import Optional
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from backend.app.database import get_db
+from backend.app.models.student import Student
+from backend.app.services import unknown_face_service
+
+router = APIRouter()
+
+
+class EnrollClusterRequest(BaseModel):
+    student_id: Optional[int] = None
+    student_code: Optional[str] = None   # dùng MSSV nếu không có student_id
+    add_to_class: bool = False           # thêm SV vào lớp của cụm nếu chưa ghi danh
+
+
+# ==========================================
+# 1. DANH SÁCH CỤM MẶT LẠ (cho giáo viên duyệt)
+# ==========================================
+@router.get("/clusters")
+def get_clusters(
+    class_id: Optional[int] = None,
+    status: str = Query("pending", pattern="^(pending|enrolled|ignored)$"),
+    refresh: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Danh sách cụm mặt lạ (đông nhất lên đầu).
+    refresh=true: gom cụm các mặt mới lưu trước khi liệt kê (tăng dần, chỉ xử lý mặt chưa có cụm);
+    mặc định chỉ đọc - gom cụm / dọn mặt hết hạn qua POST /cluster.
+    Ảnh từng mặt: GET /faces/{face_id}/thumbnail
+    """
+    stats = unknown_face_service.cluster_unknown_faces(db, class_id) if refresh else None
+    return {
+        "clusters": unknown_face_service.list_clusters(db, class_id, status),
+        "clustering": stats,
+    }
+
+
+@router.post("/cluster")
+def run_clustering(class_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Chạy job gom cụm (có thể gọi định kỳ bằng cron)"""
+    return unknown_face_service.cluster_unknown_faces(db, class_id)
+
+
+@router.get("/faces/{face_id}/thumbnail")
+def get_face_thumbnail(face_id: int, db: Session = Depends(get_db)):
+    thumbnail = unknown_face_service.get_thumbnail(db, face_id)
+    if not thumbnail:
+        raise HTTPException(status_code=404, detail="Không tìm thấy ảnh")
+    return Response(content=thumbnail, media_type="image/jpeg")
+
+
+# ==========================================
+# 2. DUYỆT CỤM: GHI DANH / BỎ QUA
+# ==========================================
+@router.post("/clusters/{cluster_id}/enroll")
+def enroll_cluster(cluster_id: int, payload: EnrollClusterRequest, db: Session = Depends(get_db)):
+    """Ghi danh cả cụm cho 1 SV (theo student_id hoặc MSSV), nạp lại gallery để nhận ra ngay"""
+    student_id = payload.student_id
+    if student_id is None:
+        if not payload.student_code:
+            raise HTTPException(status_code=400, detail="Cần student_id hoặc student_code")
+        row = db.query(Student.StudentID).filter(Student.StudentCode == payload.student_code).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Không tìm thấy sinh viên")
+        student_id = row.StudentID
+
+    status, embedding_id = unknown_face_service.enroll_cluster(db, cluster_id, student_id, payload.add_to_class)
+    if status == "NotFound":
+        raise HTTPException(status_code=404, detail="Không tìm thấy cụm")
+    if status == "NoStudent":
+        raise HTTPException(status_code=404, detail="Không tìm thấy sinh viên")
+    if status == "NotPending":
+        raise HTTPException(status_code=400, detail="Cụm đã được xử lý")
+
+    # Gallery có thêm embedding mới -> nạp lại
+    from backend.app.ai.smart_face_attendance import get_gallery
+    get_gallery(reload=True)
+
+    return {"success": True, "student_id": student_id, "embedding_id": embedding_id}
+
+
+@router.post("/clusters/{cluster_id}/ignore")
+def ignore_cluster(cluster_id: int, db: Session = Depends(get_db)):
+    status = unknown_face_service.ignore_cluster(db, cluster_id)
+    if status == "NotFound":
+        raise HTTPException(status_code=404, detail="Không tìm thấy cụm")
+    if status == "NotPending":
+        raise HTTPException(status_code=400, detail="Cụm đã được xử lý")
+    return {"success": True}
@@ -0,0 +1,362 @@
+# backend/app/crud/attendance_crud.py
+# Ghi điểm danh + cập nhật bảng tổng hợp (class_session_summary, study_attendance_summary)
+# trong CÙNG 1 transaction. Mọi đường điểm danh (thủ công, camera, upload ảnh) đều đi qua đây.
+# Chống trùng khi nhiều request cùng lúc (camera gửi nhiều khung hình / giây):
+#   khóa dòng (ClassID, Date) của buổi học TRƯỚC khi kiểm tra đã điểm danh chưa -> các lượt cùng buổi xếp hàng;
+#   UNIQUE attendance(StudyID, Date) là chốt cuối (IntegrityError -> Duplicate).
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.app.models.study import Study
+from backend.app.models.attendance import Attendance
+from backend.app.models.attendance_summary import ClassSessionSummary, StudyAttendanceSummary
+
+
+# ==========================================
+# 1. CẬP NHẬT BẢNG TỔNG HỢP
+# ==========================================
+def _count_sessions(db: Session, class_id: int) -> int:
+    return db.query(func.count()).select_from(ClassSessionSummary).filter(
+        ClassSessionSummary.ClassID == class_id
+    ).scalar() or 0
+
+
+def _ensure_study_summary(db: Session, study_id: int, class_id: int):
+    """Tạo dòng tổng hợp cho StudyID nếu chưa có (SV được thêm trước khi có bảng tổng hợp)"""
+    exists = db.query(StudyAttendanceSummary.StudyID).filter(
+        StudyAttendanceSummary.StudyID == study_id
+    ).first()
+    if exists:
+        return
+
+    present = db.query(func.count(func.distinct(Attendance.Date))).filter(
+        Attendance.StudyID == study_id
+    ).scalar() or 0
+    sessions = _count_sessions(db, class_id)
+
+    try:
+        # Savepoint: request khác vừa tạo cùng dòng -> dùng dòng đó
+        with db.begin_nested():
+            db.add(StudyAttendanceSummary(
+                StudyID=study_id,
+                ClassID=class_id,
+                PresentCount=present,
+                AbsentCount=max(0, sessions - present)
+            ))
+    except IntegrityError:
+        pass
+
+
+def _open_session(db: Session, class_id: int, session_date) -> bool:
+    """
+    Đảm bảo có dòng (ClassID, Date) và KHÓA dòng đó tới hết transaction. Trả về True nếu đây là buổi học mới.
+    Buổi mới -> mọi SV trong lớp +1 buổi vắng (SV vừa điểm danh sẽ được trừ lại ngay sau đó).
+    """
+    session_row = db.query(ClassSessionSummary).filter(
+        ClassSessionSummary.ClassID == class_id,
+        ClassSessionSummary.Date == session_date
+    ).with_for_update()
+    if session_row.first():
+        return False
+
+    try:
+        # Savepoint: 2 request cùng mở buổi mới -> request sau chờ request trước commit rồi khóa dòng đó
+        with db.begin_nested():
+            db.add(ClassSessionSummary(ClassID=class_id, Date=session_date, PresentCount=0))
+    except IntegrityError:
+        session_row.first()
+        return False
+
+    db.query(StudyAttendanceSummary).filter(
+        StudyAttendanceSummary.ClassID == class_id
+    ).update(
+        {StudyAttendanceSummary.AbsentCount: StudyAttendanceSummary.AbsentCount + 1},
+        synchronize_session=False
+    )
+    return True
+
+
+def _mark_present(db: Session, study_ids, class_id: int, session_date):
+    """Buổi đã khóa (_open_session): +có mặt cho buổi, chuyển buổi này của các SV từ vắng sang có mặt"""
+    db.query(ClassSessionSummary).filter(
+        ClassSessionSummary.ClassID == class_id,
+        ClassSessionSummary.Date == session_date
+    ).update(
+        {ClassSessionSummary.PresentCount: ClassSessionSummary.PresentCount + len(study_ids)},
+        synchronize_session=False
+    )
+    # Buổi này đã được tính là vắng cho SV (lúc mở buổi hoặc lúc tạo dòng tổng hợp) -> chuyển sang có mặt
+    db.query(StudyAttendanceSummary).filter(
+        StudyAttendanceSummary.StudyID.in_(study_ids)
+    ).update(
+        {
+            StudyAttendanceSummary.PresentCount: StudyAttendanceSummary.PresentCount + 1,
+            StudyAttendanceSummary.AbsentCount: StudyAttendanceSummary.AbsentCount - 1,
+        },
+        synchronize_session=False
+    )
+
+
+def _insert_checkins(db: Session, rows, class_id: int, session_date):
+    """
+    rows: list Attendance mới (buổi đã khóa, đã lọc trùng). Tổng hợp + insert trong 1 savepoint;
+    vướng UNIQUE (StudyID, Date) thì thử từng dòng, dòng vướng bị bỏ (tổng hợp không bị cộng).
+    Return: set StudyID đã ghi
+    """
+    try:
+        with db.begin_nested():
+            _mark_present(db, [r.StudyID for r in rows], class_id, session_date)
+            db.add_all(rows)
+        return {r.StudyID for r in rows}
+    except IntegrityError:
+        pass
+
+    inserted = set()
+    for row in rows:
+        try:
+            with db.begin_nested():
+                _mark_present(db, [row.StudyID], class_id, session_date)
+                db.add(row)
+            inserted.add(row.StudyID)
+        except IntegrityError:
+            continue
+    return inserted
+
+
+def on_study_added(db: Session, study_id: int, class_id: int):
+    """SV mới vào lớp: vắng tất cả các buổi đã diễn ra. Không commit (caller commit)."""
+    _ensure_study_summary(db, study_id, class_id)
+
+
+def on_study_removed(db: Session, study_id: int, class_id: int):
+    """
+    Gọi TRƯỚC khi xóa attendance/study của SV. Không commit (caller commit).
+    - Trừ sĩ số có mặt của các buổi SV đã đi học
+    - Buổi nào không còn ai có mặt thì không còn là buổi học -> xóa, các SV khác bớt 1 buổi vắng
+    """
+    dates = [
+        r.Date for r in db.query(Attendance.Date).filter(Attendance.StudyID == study_id).distinct()
+    ]
+    for d in dates:
+        db.query(ClassSessionSummary).filter(
+            ClassSessionSummary.ClassID == class_id,
+            ClassSessionSummary.Date == d
+        ).update(
+            {ClassSessionSummary.PresentCount: ClassSessionSummary.PresentCount - 1},
+            synchronize_session=False
+        )
+
+    emptied = db.query(ClassSessionSummary).filter(
+        ClassSessionSummary.ClassID == class_id,
+        ClassSessionSummary.PresentCount <= 0
+    ).delete(synchronize_session=False)
+
+    db.query(StudyAttendanceSummary).filter(
+        StudyAttendanceSummary.StudyID == study_id
+    ).delete(synchronize_session=False)
+
+    if emptied:
+        db.query(StudyAttendanceSummary).filter(
+            StudyAttendanceSummary.ClassID == class_id
+        ).update(
+            {StudyAttendanceSummary.AbsentCount: StudyAttendanceSummary.AbsentCount - emptied},
+            synchronize_session=False
+        )
+
+
+# ==========================================
+# 2. GHI ĐIỂM DANH
+# ==========================================
+def record_checkin(db: Session, study_id: int, session_date, checkin_time=None,
+                   photo_path: str = "", class_id: int = None, commit: bool = True):
+    """
+    Lưu 1 lượt điểm danh và cập nhật bảng tổng hợp trong cùng transaction.
+    Return: ("Success", Attendance) | ("Duplicate", None) | ("NotFound", None)
+    """
+    if class_id is None:
+        study = db.query(Study.ClassID).filter(Study.StudyID == study_id).first()
+        if not study:
+            return "NotFound", None
+        class_id = study.ClassID
+
+    # Tạo dòng tổng hợp TRƯỚC khi mở buổi / add attendance (không đếm trùng lượt này)
+    _ensure_study_summary(db, study_id, class_id)
+    _open_session(db, class_id, session_date)
+
+    # Kiểm tra trùng SAU khi khóa buổi (đọc bản mới nhất, không phải snapshot cũ)
+    existing = db.query(Attendance.AttendanceID).filter(
+        Attendance.StudyID == study_id,
+        Attendance.Date == session_date
+    ).with_for_update().first()
+
+    attendance = Attendance(
+        StudyID=study_id,
+        Date=session_date,
+        Time=checkin_time or datetime.now().time(),
+        PhotoPath=photo_path or ""
+    )
+    if existing or not _insert_checkins(db, [attendance], class_id, session_date):
+        if commit:
+            db.rollback()
+        return "Duplicate", None
+
+    if commit:
+        db.commit()
+        db.refresh(attendance)
+    else:
+        db.flush()
+    return "Success", attendance
+
+
+def checkin_student(db: Session, student_id: int, class_id: int, session_date,
+                    checkin_time=None, photo_path: str = "", commit: bool = True):
+    """
+    Điểm danh theo StudentID + ClassID (dùng cho nhận diện khuôn mặt).
+    Return: ("Success", Attendance) | ("Duplicate", None) | ("NotInClass", None)
+    """
+    study = db.query(Study.StudyID).filter(
+        Study.StudentID == student_id,
+        Study.ClassID == class_id
+    ).first()
+    if not study:
+        return "NotInClass", None
+
+    return record_checkin(
+        db, study.StudyID, session_date, checkin_time, photo_path,
+        class_id=class_id, commit=commit
+    )
+
+
+def checkin_students(db: Session, student_ids, class_id: int, session_date,
+                     checkin_time=None, photo_paths: dict = None, commit: bool = True):
+    """
+    Điểm danh nhiều SV của 1 lớp trong 1 transaction (nhận diện ảnh nhóm):
+    2 query tra Study / Attendance cho cả danh sách, bảng tổng hợp cập nhật 1 lần cho mọi SV mới.
+    photo_paths: {student_id: PhotoPath}
+    Return: {student_id: "Success" | "Duplicate" | "NotInClass"}
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    if not student_ids:
+        return {}
+    photo_paths = photo_paths or {}
+
+    studies = dict(
+        db.query(Study.StudentID, Study.StudyID)
+        .filter(Study.ClassID == class_id, Study.StudentID.in_(student_ids))
+        .all()
+    )
+    result = {sid: "NotInClass" for sid in student_ids if sid not in studies}
+    if not studies:
+        return result
+
+    # Như record_checkin: tổng hợp -> khóa buổi -> kiểm tra trùng -> ghi
+    for study_id in studies.values():
+        _ensure_study_summary(db, study_id, class_id)
+    _open_session(db, class_id, session_date)
+    existing = {
+        r.StudyID for r in db.query(Attendance.StudyID).filter(
+            Attendance.StudyID.in_(list(studies.values())),
+            Attendance.Date == session_date
+        ).with_for_update()
+    }
+
+    now = checkin_time or datetime.now().time()
+    new_rows = [
+        Attendance(StudyID=studies[sid], Date=session_date, Time=now, PhotoPath=photo_paths.get(sid, ""))
+        for sid in student_ids if sid in studies and studies[sid] not in existing
+    ]
+    inserted = _insert_checkins(db, new_rows, class_id, session_date) if new_rows else set()
+    for sid in student_ids:
+        if sid in studies:
+            result[sid] = "Success" if studies[sid] in inserted else "Duplicate"
+
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+    return result
+
+
+# ==========================================
+# 3. ĐỌC BẢNG TỔNG HỢP
+# ==========================================
+def get_session_counts(db: Session, class_id: int):
+    """Danh sách (Date, PresentCount) của lớp, sắp theo ngày - O(số buổi)"""
+    return (
+        db.query(ClassSessionSummary.Date, ClassSessionSummary.PresentCount)
+        .filter(ClassSessionSummary.ClassID == class_id, ClassSessionSummary.PresentCount > 0)
+        .order_by(ClassSessionSummary.Date)
+        .all()
+    )
+
+
+# ==========================================
+# 4. REBUILD (chạy tay khi dữ liệu lệch hoặc lần đầu tạo bảng)
+# ==========================================
+def rebuild_summaries(db: Session, class_id: int = None):
+    """Tính lại toàn bộ bảng tổng hợp từ attendance JOIN study (1 lớp hoặc tất cả)"""
+    session_q = db.query(ClassSessionSummary)
+    study_q = db.query(StudyAttendanceSummary)
+    if class_id is not None:
+        session_q = session_q.filter(ClassSessionSummary.ClassID == class_id)
+        study_q = study_q.filter(StudyAttendanceSummary.ClassID == class_id)
+    session_q.delete(synchronize_session=False)
+    study_q.delete(synchronize_session=False)
+
+    sessions = (
+        db.query(Study.ClassID, Attendance.Date, func.count(func.distinct(Attendance.StudyID)))
+        .join(Study, Study.StudyID == Attendance.StudyID)
+    )
+    presence = (
+        db.query(Study.StudyID, Study.ClassID, func.count(func.distinct(Attendance.Date)))
+        .outerjoin(Attendance, Attendance.StudyID == Study.StudyID)
+    )
+    if class_id is not None:
+        sessions = sessions.filter(Study.ClassID == class_id)
+        presence = presence.filter(Study.ClassID == class_id)
+
+    session_rows = sessions.group_by(Study.ClassID, Attendance.Date).all()
+    sessions_per_class = {}
+    for cid, _, _ in session_rows:
+        sessions_per_class[cid] = sessions_per_class.get(cid, 0) + 1
+
+    db.bulk_insert_mappings(ClassSessionSummary, [
+        {"ClassID": cid, "Date": d, "PresentCount": n} for cid, d, n in session_rows
+    ])
+    db.bulk_insert_mappings(StudyAttendanceSummary, [
+        {
+            "StudyID": sid,
+            "ClassID": cid,
+            "PresentCount": n,
+            "AbsentCount": max(0, sessions_per_class.get(cid, 0) - n),
+        }
+        for sid, cid, n in presence.group_by(Study.StudyID, Study.ClassID).all()
+    ])
+    db.commit()
+    return {"sessions": len(session_rows), "classes": len(sessions_per_class)}
+
+
+if __name__ == "__main__":
+    # python -m backend.app.crud.attendance_crud rebuild [class_id]
+    from backend.app.database import SessionLocal, engine, Base
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python -m backend.app.crud.attendance_crud rebuild [class_id]")
+        sys.exit(1)
+
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[ClassSessionSummary.__table__, StudyAttendanceSummary.__table__]
+    )
+    target = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    db = SessionLocal()
+    try:
+        result = rebuild_summaries(db, target)
+        print(f"✅ Rebuild xong: {result['sessions']} buổi / {result['classes']} lớp")
+    finally:
+        db.close()
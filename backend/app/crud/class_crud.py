@@ -3,7 +3,9 @@ from backend.app.models.teach import Teach
 from backend.app.models.class_model import Class
 from backend.app.schemas.class_schemas import ClassCreate
 import sqlalchemy
-from sqlalchemy import text
+from sqlalchemy import text, func, or_
+from datetime import date
+from backend.app.crud.pagination import keyset_page, like_prefix, LIKE_ESCAPE
 
 def create_class(db: Session, class_data: ClassCreate):
     print(f"[create_class] START data={class_data.model_dump()}")
@@ -51,6 +53,57 @@ def create_class(db: Session, class_data: ClassCreate):
 def get_all_classes(db: Session):
     return db.query(Class).all()
 
+# Lớp chưa có ngày bắt đầu: sắp như ngày nhỏ nhất MySQL hỗ trợ (keyset_page cần cột sắp xếp không NULL)
+NULL_DATE_START = date(1000, 1, 1)
+
+# Cột sắp xếp cho danh sách lớp: tên tham số -> (biểu thức SQL, thuộc tính trên Class, giá trị thay NULL)
+CLASS_SORTS = {
+    "id": (Class.ClassID, "ClassID", None),
+    "name": (func.coalesce(Class.ClassName, ""), "ClassName", ""),
+    "full_name": (func.coalesce(Class.FullClassName, ""), "FullClassName", ""),
+    "date_start": (func.coalesce(Class.DateStart, NULL_DATE_START), "DateStart", NULL_DATE_START),
+}
+
+def list_classes_page(db: Session, id_login=None, major_id=None, type_id=None, shift_id=None,
+                      semester=None, year=None, q=None, sort="name", descending=False,
+                      limit=50, cursor=None):
+    """
+    Danh sách lớp có lọc + sắp xếp + phân trang keyset ở phía DB.
+    q: tìm theo tiền tố ClassName / FullClassName, hoặc đúng CourseCode nếu là số.
+    Return: {"items": [Class], "total", "next_cursor", "limit"}
+    """
+    query = db.query(Class)
+    if id_login is not None:
+        query = query.join(Teach, Teach.ClassID == Class.ClassID).filter(Teach.id_login == id_login)
+    if major_id is not None:
+        query = query.filter(Class.MajorID == major_id)
+    if type_id is not None:
+        query = query.filter(Class.TypeID == type_id)
+    if shift_id is not None:
+        query = query.filter(Class.ShiftID == shift_id)
+    if semester:
+        query = query.filter(Class.Semester == semester)
+    if year:
+        # Theo khoảng ngày (dùng được index DateStart), không dùng YEAR(DateStart)
+        query = query.filter(Class.DateStart >= date(year, 1, 1), Class.DateStart < date(year + 1, 1, 1))
+    if q:
+        q = q.strip()
+        pattern = like_prefix(q)
+        conds = [
+            Class.ClassName.like(pattern, escape=LIKE_ESCAPE),
+            Class.FullClassName.like(pattern, escape=LIKE_ESCAPE),
+        ]
+        if q.isdigit():
+            conds.append(Class.CourseCode == int(q))
+        query = query.filter(or_(*conds))
+
+    sort_col, attr, null_value = CLASS_SORTS.get(sort, CLASS_SORTS["name"])
+    return keyset_page(
+        query, sort_col, Class.ClassID,
+        key_fn=lambda c: (getattr(c, attr) if getattr(c, attr) is not None else null_value, c.ClassID),
+        limit=limit, cursor=cursor, descending=descending,
+    )
+
 def get_all_majors(db: Session):
     rows = db.execute(text("SELECT MajorID, MajorName FROM major")).fetchall()
     return [{"MajorID": row[0], "MajorName": row[1]} for row in rows]
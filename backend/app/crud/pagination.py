@@ -0,0 +1,70 @@
+# backend/app/crud/pagination.py
+# Phân trang keyset (seek) dùng chung cho các API danh sách:
+#   WHERE (sort_col, id) > (giá trị cuối trang trước) ORDER BY sort_col, id LIMIT n
+# -> trang thứ 100 cũng nhanh như trang đầu (không OFFSET), cursor là chuỗi base64 gửi lại cho client
+
+import base64
+import json
+from datetime import date
+
+from sqlalchemy import Date, and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+LIKE_ESCAPE = "\\"
+
+
+def encode_cursor(sort_value, last_id) -> str:
+    if isinstance(sort_value, date):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, last_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort_col):
+    """Cursor -> (sort_value, last_id). Cursor hỏng -> ValueError"""
+    try:
+        sort_value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Cursor không hợp lệ")
+    if sort_value is not None and isinstance(sort_col.type, Date):
+        sort_value = date.fromisoformat(sort_value)
+    return sort_value, int(last_id)
+
+
+def like_prefix(text: str) -> str:
+    """'abc' -> 'abc%' (escape %, _ của người dùng) - dùng với .like(pattern, escape=LIKE_ESCAPE)"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def keyset_page(query, sort_col, id_col, key_fn, limit=DEFAULT_PAGE_SIZE, cursor=None, descending=False):
+    """
+    query   : query đã lọc (chưa ORDER BY / LIMIT)
+    sort_col: cột / biểu thức sắp xếp chính (không NULL - dùng coalesce nếu cần)
+    id_col  : khóa chính, phá hòa khi sort_col trùng
+    key_fn  : row -> (giá trị sort_col, id) của 1 dòng kết quả, để tạo cursor trang sau
+    Return: {"items": rows, "total": int, "next_cursor": str | None, "limit": int}
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+    # Tổng số dòng khớp bộ lọc (không phụ thuộc cursor)
+    total = query.order_by(None).count()
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort_col)
+        if descending:
+            seek = or_(sort_col < sort_value, and_(sort_col == sort_value, id_col < last_id))
+        else:
+            seek = or_(sort_col > sort_value, and_(sort_col == sort_value, id_col > last_id))
+        query = query.filter(seek)
+
+    order = (sort_col.desc(), id_col.desc()) if descending else (sort_col.asc(), id_col.asc())
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*key_fn(rows[-1]))
+
+    return {"items": rows, "total": total, "next_cursor": next_cursor, "limit": limit}
@@ -1,23 +1,17 @@
 from sqlalchemy.orm import Session
 from backend.app.models.student import Student
-from backend.app.models.major import Major
-from backend.app.models.type import Type
+from backend.app.models.study import Study
+from backend.app.models.attendance import Attendance
+from backend.app.crud.pagination import keyset_page, like_prefix, LIKE_ESCAPE
+from backend.app.services.reference_cache import get_reference_cache
+from sqlalchemy import and_, or_
 
 def get_student_detail(db: Session, student_id: int):
-    result = (
-        db.query(
-            Student,
-            Major.Full_name_mj,
-            Type.TypeName
-        )
-        .join(Major, Student.MajorID == Major.MajorID)
-        .join(Type, Student.TypeID == Type.TypeID)
-        .filter(Student.StudentID == student_id)
-        .first()
-    )
-    if not result:
+    s = db.get(Student, student_id)
+    if not s:
         return None
-    s, full_name_mj, type_name = result
+    # Tên ngành / hệ đào tạo tra trong cache danh mục (không JOIN major, type)
+    ref = get_reference_cache(db)
     return {
         "StudentID": s.StudentID,
         "FullName": s.FullName,
@@ -29,6 +23,64 @@ def get_student_detail(db: Session, student_id: int):
         "CitizenID": getattr(s, "CitizenID", ""),
         "PhotoStatus": getattr(s, "PhotoStatus", ""),
         "StudentPhoto": getattr(s, "StudentPhoto", ""),
-        "Full_name_mj": full_name_mj,
-        "TypeName": type_name
-    }
\ No newline at end of file
+        "Full_name_mj": ref.major_full_name(s.MajorID),
+        "TypeName": ref.type_name(s.TypeID)
+    }
+
+
+# Cột sắp xếp cho danh sách SV trong lớp: tên tham số -> (biểu thức SQL, tên cột trong kết quả)
+STUDENT_SORTS = {
+    "id": (Study.StudyID, "StudyID"),
+    "name": (Student.FullName, "FullName"),
+    "code": (Student.StudentCode, "StudentCode"),
+}
+
+def list_class_students_page(db: Session, class_id: int, q=None, session_date=None,
+                             sort="code", descending=False, limit=50, cursor=None):
+    """
+    SV trong lớp, phân trang keyset. q: tiền tố họ tên hoặc MSSV.
+    session_date: kèm trạng thái có mặt buổi đó (LEFT JOIN attendance) -> không cần gọi thêm session-detail.
+    """
+    columns = [Study.StudyID, Student.StudentID, Student.FullName, Student.StudentCode]
+    if session_date is not None:
+        columns += [Attendance.AttendanceID, Attendance.Time.label("AttendanceTime")]
+
+    query = (
+        db.query(*columns)
+        .select_from(Study)
+        .join(Student, Student.StudentID == Study.StudentID)
+        .filter(Study.ClassID == class_id)
+    )
+    if session_date is not None:
+        query = query.outerjoin(
+            Attendance,
+            and_(Attendance.StudyID == Study.StudyID, Attendance.Date == session_date)
+        )
+    if q:
+        pattern = like_prefix(q.strip())
+        query = query.filter(or_(
+            Student.FullName.like(pattern, escape=LIKE_ESCAPE),
+            Student.StudentCode.like(pattern, escape=LIKE_ESCAPE),
+        ))
+
+    sort_col, attr = STUDENT_SORTS.get(sort, STUDENT_SORTS["code"])
+    page = keyset_page(
+        query, sort_col, Study.StudyID,
+        key_fn=lambda r: (getattr(r, attr), r.StudyID),
+        limit=limit, cursor=cursor, descending=descending,
+    )
+
+    items = []
+    for r in page["items"]:
+        item = {
+            "StudentID": r.StudentID,
+            "FullName": r.FullName,
+            "StudentCode": r.StudentCode,
+            "StudyID": r.StudyID,
+        }
+        if session_date is not None:
+            item["Present"] = r.AttendanceID is not None
+            item["AttendanceTime"] = r.AttendanceTime.strftime("%H:%M:%S") if r.AttendanceTime else None
+        items.append(item)
+    page["items"] = items
+    return page
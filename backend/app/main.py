@@ -2,7 +2,14 @@ import time
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from backend.app.api.v1 import auth, class_api, student_api, major_api, type_api, capture_api ,attendance_api ,recognize_api
+
+# Chia luồng CPU cho torch / OpenCV trước khi router import model AI (xem ai/inference_runtime.py):
+# chỉ đặt biến OMP_* / MKL_* (không import torch), số luồng torch / cv2 áp dụng ở thread warm-up
+from backend.app.ai.inference_runtime import configure_inference_runtime, runtime_info
+configure_inference_runtime()
+
+from backend.app.services.upload_service import UploadSizeLimitMiddleware
+from backend.app.api.v1 import auth, class_api, student_api, major_api, type_api, capture_api ,attendance_api ,recognize_api, unknown_face_api
 
 import logging
 
@@ -17,6 +24,9 @@ app = FastAPI(
     openapi_url="/openapi.json"
 )
 
+# Chặn ảnh upload vượt MAX_FILE_SIZE ngay khi đang nhận body (413)
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://*.streamlit.app",      # Streamlit Cloud
@@ -54,6 +64,7 @@ app.include_router(type_api.router, prefix="/api/v1/type", tags=["type"])
 app.include_router(capture_api.router, prefix="/api/v1/capture", tags=["capture"])
 app.include_router(attendance_api.router, prefix="/api/v1/attendance", tags=["attendance"])
 app.include_router(recognize_api.router, prefix="/api/v1/ai", tags=["ai"])
+app.include_router(unknown_face_api.router, prefix="/api/v1/unknown-faces", tags=["unknown-faces"])
 
 print("🔥 Registered routes:")
 for route in app.routes:
@@ -67,3 +78,38 @@ def root():
 def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready():
+    """Sẵn sàng nhận request AI chưa (model đã nạp xong) - khác /health chỉ báo process còn sống"""
+    from backend.app.ai.warmup import AI_WARMUP, readiness
+    if not AI_WARMUP:
+        return {"status": "ready", "ai": "lazy", "runtime": runtime_info()}
+    is_ready, models = readiness()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "warming_up", "models": models, "runtime": runtime_info()}
+    )
+
+@app.on_event("startup")
+def start_ai_warmup():
+    # Model AI nạp ở thread nền -> API thường phục vụ ngay, /ready báo khi AI sẵn sàng
+    from backend.app.ai.warmup import AI_WARMUP, start_warmup
+    if AI_WARMUP:
+        start_warmup()
+
+@app.on_event("startup")
+def load_reference_cache():
+    # Nạp sẵn danh mục major / type / shift vào RAM; lỗi DB lúc khởi động thì nạp lại ở request đầu tiên
+    from backend.app.services.reference_cache import get_reference_cache
+    try:
+        ref = get_reference_cache()
+        print(f"📚 [REFERENCE CACHE] {len(ref.majors)} ngành, {len(ref.types)} hệ, {len(ref.shifts)} ca")
+    except Exception as e:
+        print(f"❌ [REFERENCE CACHE] Chưa nạp được: {e}")
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    # Đóng pool aiomysql khi tắt server (tránh cảnh báo kết nối chưa đóng)
+    from backend.app.database import async_engine
+    await async_engine.dispose()
+
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, Date, Time, ForeignKey, Text
+from sqlalchemy import Column, Integer, Date, Time, ForeignKey, Text, Index
 from backend.app.database import Base
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        Index("ix_attendance_study_date", "StudyID", "Date", unique=True),   # chống trùng điểm danh, lịch sử 1 SV
+        Index("ix_attendance_date", "Date"),                     # chi tiết buổi học / export theo ngày
+    )
     AttendanceID = Column(Integer, primary_key=True, index=True)
     StudyID = Column(Integer, ForeignKey("study.StudyID"), nullable=False)
     Date = Column(Date, nullable=False)
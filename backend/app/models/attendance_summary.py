@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from backend.app.database import Base
+
+
+class ClassSessionSummary(Base):
+    """Số SV có mặt theo từng buổi (ClassID, Date) - cập nhật mỗi lần điểm danh"""
+    __tablename__ = "class_session_summary"
+    ClassID = Column(Integer, ForeignKey("class.ClassID"), primary_key=True)
+    Date = Column(Date, primary_key=True)
+    PresentCount = Column(Integer, nullable=False, default=0)
+
+
+class StudyAttendanceSummary(Base):
+    """Số buổi có mặt / vắng của từng StudyID (1 SV trong 1 lớp)"""
+    __tablename__ = "study_attendance_summary"
+    StudyID = Column(Integer, ForeignKey("study.StudyID"), primary_key=True)
+    ClassID = Column(Integer, ForeignKey("class.ClassID"), nullable=False, index=True)
+    PresentCount = Column(Integer, nullable=False, default=0)
+    AbsentCount = Column(Integer, nullable=False, default=0)
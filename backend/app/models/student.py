@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, Index
 from backend.app.database import Base
 
 class Student(Base):
     __tablename__ = "student"
+    __table_args__ = (
+        Index("uq_student_code", "StudentCode", unique=True),  # tra MSSV khi thêm / import / ghi danh
+    )
     StudentID = Column(Integer, primary_key=True, index=True)
     FullName = Column(String(100), nullable=False)
     StudentCode = Column(String(20), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, LargeBinary, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Float, Boolean, LargeBinary, ForeignKey, TIMESTAMP
 from backend.app.database import Base
 
 class StudentEmbeddings(Base):
@@ -11,4 +11,13 @@ class StudentEmbeddings(Base):
     Quality = Column(Float)
     Source = Column(String(100))
     CreatedAt = Column(TIMESTAMP, nullable=False)
-    
\ No newline at end of file
+    # Cập nhật mẫu dần theo các lần điểm danh (services/template_service.py)
+    AnchorEmbedding = Column(LargeBinary, nullable=True)   # embedding lúc đăng ký (mốc chống trôi), lưu ở lần cập nhật đầu
+    UpdateCount = Column(Integer, nullable=False, default=0)
+    UpdatedAt = Column(TIMESTAMP, nullable=True)
+    # Thống kê mạo danh + ngưỡng riêng tính sẵn (training/calibrate_thresholds.py --db --write), NULL = ngưỡng chung
+    ImpostorMean = Column(Float, nullable=True)
+    ImpostorStd = Column(Float, nullable=True)
+    MatchThreshold = Column(Float, nullable=True)
+    # SV có embedding gần như trùng SV khác (training/audit_gallery.py --write) -> khớp phải cách biệt CONFLICT_MARGIN
+    AuditConflict = Column(Boolean, nullable=False, default=False)
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from backend.app.database import Base
 
 class Study(Base):
     __tablename__ = "study"
+    __table_args__ = (
+        Index("ix_study_class_student", "ClassID", "StudentID"),  # SV trong lớp, kiểm tra đã ghi danh
+    )
     StudyID = Column(Integer, primary_key=True, index=True)
     StudentID = Column(Integer, ForeignKey("student.StudentID"), nullable=False)
     ClassID = Column(Integer, ForeignKey("class.ClassID"), nullable=False)
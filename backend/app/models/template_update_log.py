@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, LargeBinary, ForeignKey, TIMESTAMP, Index
+from backend.app.database import Base
+
+
+class TemplateUpdateLog(Base):
+    """Nhật ký cập nhật mẫu khuôn mặt từ điểm danh (giữ embedding cũ để khôi phục)"""
+    __tablename__ = "template_update_log"
+    __table_args__ = (
+        Index("ix_template_update_log_embedding", "EmbeddingID", "CreatedAt"),
+    )
+    LogID = Column(Integer, primary_key=True, index=True)
+    EmbeddingID = Column(Integer, ForeignKey("student_embeddings.EmbeddingID"), nullable=False)
+    StudentID = Column(Integer, ForeignKey("student.StudentID"), nullable=False)
+    Status = Column(String(20), nullable=False)          # applied | rejected_drift
+    Similarity = Column(Float)                           # độ giống của mặt điểm danh với mẫu hiện tại
+    AnchorSimilarity = Column(Float)                     # độ giống của mẫu mới với mẫu lúc đăng ký
+    Alpha = Column(Float)
+    OldEmbedding = Column(LargeBinary, nullable=False)   # pickle float32
+    NewEmbedding = Column(LargeBinary, nullable=True)
+    Source = Column(String(100))
+    CreatedAt = Column(TIMESTAMP, nullable=False)
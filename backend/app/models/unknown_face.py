@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Float, LargeBinary, ForeignKey, TIMESTAMP, Index
+from backend.app.database import Base
+
+
+class UnknownCluster(Base):
+    """Nhóm các khuôn mặt lạ của cùng 1 người (chờ giáo viên duyệt: ghi danh / bỏ qua)"""
+    __tablename__ = "unknown_cluster"
+    __table_args__ = (
+        Index("ix_unknown_cluster_class_status", "ClassID", "Status"),
+    )
+    ClusterID = Column(Integer, primary_key=True, index=True)
+    ClassID = Column(Integer, ForeignKey("class.ClassID"), nullable=True)
+    Centroid = Column(LargeBinary, nullable=False)      # vector trung bình (đã chuẩn hóa L2), pickle float32
+    Size = Column(Integer, nullable=False, default=0)
+    Status = Column(String(20), nullable=False, default="pending")   # pending | enrolled | ignored
+    StudentID = Column(Integer, ForeignKey("student.StudentID"), nullable=True)  # SV được ghi danh từ cụm
+    CreatedAt = Column(TIMESTAMP, nullable=False)
+    UpdatedAt = Column(TIMESTAMP, nullable=False)
+
+
+class UnknownFace(Base):
+    """1 khuôn mặt không khớp SV nào khi nhận diện: embedding + ảnh thu nhỏ + lớp + thời gian"""
+    __tablename__ = "unknown_face"
+    __table_args__ = (
+        Index("ix_unknown_face_cluster", "ClusterID"),
+        Index("ix_unknown_face_class_created", "ClassID", "CreatedAt"),
+    )
+    UnknownFaceID = Column(Integer, primary_key=True, index=True)
+    ClassID = Column(Integer, ForeignKey("class.ClassID"), nullable=True)
+    ClusterID = Column(Integer, ForeignKey("unknown_cluster.ClusterID"), nullable=True)  # NULL = chưa gom cụm
+    Embedding = Column(LargeBinary, nullable=False)     # pickle float32 (như student_embeddings)
+    EmbeddingDim = Column(Integer, nullable=False)
+    Thumbnail = Column(LargeBinary, nullable=True)      # JPEG mặt thu nhỏ
+    Similarity = Column(Float)                          # độ giống cao nhất với gallery lúc nhận diện
+    CreatedAt = Column(TIMESTAMP, nullable=False)
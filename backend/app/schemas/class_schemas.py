@@ -56,8 +56,16 @@ class ClassOut(BaseModel):
     Session: str | None = None
     CourseCode: int | None = None
     ShiftID: int | None = None   # <-- Thêm dòng này
+    MajorID: int | None = None
+    TypeID: int | None = None
     model_config = ConfigDict(from_attributes=True)
 
+class ClassPage(BaseModel):
+    items: list[ClassOut]
+    total: int
+    next_cursor: str | None = None
+    limit: int
+
 class ManualAttendanceRequest(BaseModel):
     study_id: int
     session_date: str
\ No newline at end of file
@@ -4,7 +4,7 @@ from pathlib import Path
 import numpy as np
 import cv2
 from sqlalchemy.orm import Session
-from backend.app.ai.face.arcface_embedder import ArcfaceEmbedder
+from backend.app.ai.face.arcface_embedder import get_arcface_embedder
 from backend.app.crud.capture_crud import save_best_embedding
 from backend.app.embeddings_db import insert_embedding
 from backend.app.models.student import Student
@@ -13,15 +13,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-# Singleton embedder
-_embedder = None
-
 def get_embedder():
-    global _embedder
-    if _embedder is None:
-        _embedder = ArcfaceEmbedder()
-        logger.info(f"✅ ArcfaceEmbedder khởi tạo trên {_embedder.device}")
-    return _embedder
+    # Dùng chung singleton với nhận diện (không nạp FaceNet 2 lần)
+    return get_arcface_embedder()
 
 def calculate_quality_score(img_bgr: np.ndarray) -> float:
     """
@@ -0,0 +1,185 @@
+# backend/app/services/export_service.py
+# Xuất dữ liệu điểm danh của lớp: 1 câu SQL (study x ngày học LEFT JOIN attendance),
+# đọc theo từng batch từ server-side cursor và stream ra CSV / XLSX / Parquet
+
+import csv
+import io
+import os
+import tempfile
+
+from sqlalchemy import and_, true
+from sqlalchemy.orm import Session
+
+from backend.app.models.student import Student
+from backend.app.models.study import Study
+from backend.app.models.attendance import Attendance
+from backend.app.models.attendance_summary import ClassSessionSummary
+
+EXPORT_COLUMNS = ["MSSV", "Họ Tên", "Ngày", "Giờ", "Trạng thái"]
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 2000))
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def build_export_query(db: Session, class_id: int, date_from=None, date_to=None):
+    """
+    Query duy nhất cho toàn bộ ma trận điểm danh:
+      study JOIN student
+      CROSS JOIN (các buổi học trong class_session_summary)
+      LEFT JOIN attendance ON StudyID + Date
+    Sắp xếp theo Ngày rồi StudyID (giống thứ tự file Excel cũ).
+    """
+    date_filters = [ClassSessionSummary.ClassID == class_id, ClassSessionSummary.PresentCount > 0]
+    if date_from:
+        date_filters.append(ClassSessionSummary.Date >= date_from)
+    if date_to:
+        date_filters.append(ClassSessionSummary.Date <= date_to)
+
+    # Danh sách buổi học của lớp = bảng tổng hợp class_session_summary (không DISTINCT trên attendance)
+    dates_sq = (
+        db.query(ClassSessionSummary.Date.label("SessionDate"))
+        .filter(*date_filters)
+        .subquery()
+    )
+
+    return (
+        db.query(
+            Student.StudentCode,
+            Student.FullName,
+            dates_sq.c.SessionDate,
+            Attendance.AttendanceID,
+            Attendance.Time,
+        )
+        .select_from(Study)
+        .join(Student, Student.StudentID == Study.StudentID)
+        .join(dates_sq, true())
+        .outerjoin(
+            Attendance,
+            and_(Attendance.StudyID == Study.StudyID, Attendance.Date == dates_sq.c.SessionDate),
+        )
+        .filter(Study.ClassID == class_id)
+        .order_by(dates_sq.c.SessionDate, Study.StudyID)
+    )
+
+
+def format_row(row):
+    """Chuyển 1 dòng kết quả SQL thành dict theo cột file Excel"""
+    if row.AttendanceID:
+        status = "Có mặt"
+        time_str = row.Time.strftime("%H:%M:%S") if row.Time else "Thủ công"
+    else:
+        status = "Vắng"
+        time_str = ""
+
+    return {
+        "MSSV": row.StudentCode,
+        "Họ Tên": row.FullName,
+        "Ngày": row.SessionDate.strftime("%d/%m/%Y"),
+        "Giờ": time_str,
+        "Trạng thái": status,
+    }
+
+
+def iter_export_batches(db: Session, class_id: int, date_from=None, date_to=None, batch_size=EXPORT_BATCH_ROWS):
+    """
+    Generator trả về từng batch (list[dict]) đọc bằng server-side cursor (yield_per),
+    API không bao giờ giữ toàn bộ ma trận học kỳ trong RAM.
+    Session `db` (get_db) chỉ đóng sau khi StreamingResponse gửi xong.
+    """
+    query = build_export_query(db, class_id, date_from, date_to).yield_per(batch_size)
+    batch = []
+    for row in query:
+        batch.append(format_row(row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_export_rows(db: Session, class_id: int, date_from=None, date_to=None):
+    """Generator từng dòng export (dict)"""
+    for batch in iter_export_batches(db, class_id, date_from, date_to):
+        yield from batch
+
+
+# ==========================================
+# WRITERS
+# ==========================================
+def stream_csv(batches):
+    """Stream CSV (UTF-8 có BOM để Excel đọc đúng tiếng Việt), mỗi batch DB -> 1 chunk HTTP"""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    buf.write("\ufeff")
+    writer.writeheader()
+    yield buf.getvalue().encode("utf-8")
+
+    for batch in batches:
+        buf.seek(0)
+        buf.truncate(0)
+        writer.writerows(batch)
+        yield buf.getvalue().encode("utf-8")
+
+
+def write_xlsx(batches, sheet_name="DiemDanh"):
+    """
+    Ghi XLSX ra file tạm bằng xlsxwriter (constant_memory: ghi từng dòng, không giữ cả sheet trong RAM).
+    Trả về đường dẫn file tạm.
+    """
+    import xlsxwriter
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="export_")
+    os.close(fd)
+
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    sheet = workbook.add_worksheet(sheet_name)
+    header_fmt = workbook.add_format({"bold": True})
+
+    for col, name in enumerate(EXPORT_COLUMNS):
+        sheet.write(0, col, name, header_fmt)
+
+    r = 1
+    for batch in batches:
+        for row in batch:
+            for col, name in enumerate(EXPORT_COLUMNS):
+                sheet.write(r, col, row[name])
+            r += 1
+
+    workbook.close()
+    return path
+
+
+def write_parquet(batches):
+    """
+    Ghi Parquet ra file tạm, mỗi batch DB -> 1 row group (pyarrow là dependency tùy chọn).
+    Trả về đường dẫn file tạm.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.string()) for name in EXPORT_COLUMNS])
+    fd, path = tempfile.mkstemp(suffix=".parquet", prefix="export_")
+    os.close(fd)
+
+    with pq.ParquetWriter(path, schema, compression="snappy") as writer:
+        for batch in batches:
+            columns = {name: [row[name] for row in batch] for name in EXPORT_COLUMNS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+
+    return path
+
+
+def stream_file_and_delete(path):
+    """Đọc file theo chunk để trả về StreamingResponse, xóa file tạm khi xong"""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,113 @@
+# backend/app/services/history_service.py
+# Lịch sử điểm danh (từng buổi + tổng có mặt / vắng / tỷ lệ) bằng 1 câu SQL duy nhất:
+#   study LEFT JOIN class_session_summary (các buổi của lớp) LEFT JOIN attendance
+#   + study_attendance_summary (tổng có mặt / vắng, cập nhật mỗi lần điểm danh)
+#   + window function ROW_NUMBER (số buổi)
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from backend.app.models.student import Student
+from backend.app.models.study import Study
+from backend.app.models.attendance import Attendance
+from backend.app.models.attendance_summary import ClassSessionSummary, StudyAttendanceSummary
+
+
+def build_history_query(db: Session, class_id: int, student_id: int = None):
+    """
+    1 dòng / (SV, buổi học), mới nhất lên đầu. SV chưa có buổi nào vẫn có 1 dòng (SessionDate = NULL).
+    Tổng có mặt / vắng đọc từ study_attendance_summary -> không cần đếm lại, không cần query thứ 2.
+    """
+    per_study = {"partition_by": Study.StudyID}
+
+    query = (
+        db.query(
+            Study.StudyID,
+            Student.StudentID,
+            Student.StudentCode,
+            Student.FullName,
+            ClassSessionSummary.Date.label("SessionDate"),
+            Attendance.AttendanceID,
+            Attendance.Time,
+            func.row_number().over(order_by=ClassSessionSummary.Date, **per_study).label("SessionNumber"),
+            StudyAttendanceSummary.PresentCount,
+            StudyAttendanceSummary.AbsentCount,
+        )
+        .select_from(Study)
+        .join(Student, Student.StudentID == Study.StudentID)
+        .outerjoin(StudyAttendanceSummary, StudyAttendanceSummary.StudyID == Study.StudyID)
+        .outerjoin(
+            ClassSessionSummary,
+            and_(
+                ClassSessionSummary.ClassID == Study.ClassID,
+                ClassSessionSummary.PresentCount > 0,
+            ),
+        )
+        .outerjoin(
+            Attendance,
+            and_(Attendance.StudyID == Study.StudyID, Attendance.Date == ClassSessionSummary.Date),
+        )
+        .filter(Study.ClassID == class_id)
+    )
+    if student_id is not None:
+        query = query.filter(Study.StudentID == student_id)
+
+    return query.order_by(Study.StudyID, ClassSessionSummary.Date.desc())
+
+
+def format_history_item(row):
+    """1 buổi học -> dict giống API /history cũ"""
+    is_present = row.AttendanceID is not None
+
+    # Nếu có giờ thì hiện giờ, nếu không (check tay cũ) thì hiện 'Thủ công'
+    time_str = "--:--"
+    if is_present:
+        time_str = row.Time.strftime("%H:%M:%S") if row.Time else "Thủ công"
+
+    return {
+        "SessionNumber": row.SessionNumber,
+        "Date": row.SessionDate.strftime("%d/%m/%Y"),
+        "IsPresent": is_present,
+        "Time": time_str,
+    }
+
+
+def _new_summary(row):
+    # SV chưa có dòng tổng hợp (chưa chạy rebuild) -> 0 / 0
+    present = row.PresentCount or 0
+    absent = row.AbsentCount or 0
+    total = present + absent
+    return {
+        "StudentID": row.StudentID,
+        "StudentCode": row.StudentCode,
+        "FullName": row.FullName,
+        "TotalSessions": total,
+        "Present": present,
+        "Absent": absent,
+        "AttendanceRate": round(present * 100 / total, 1) if total else 0.0,
+        "History": [],
+    }
+
+
+def group_histories(rows):
+    """Gom các dòng (đã sắp theo StudyID) thành danh sách lịch sử từng SV"""
+    result = []
+    current_id = None
+    for row in rows:
+        if row.StudyID != current_id:
+            current_id = row.StudyID
+            result.append(_new_summary(row))
+        if row.SessionDate is not None:
+            result[-1]["History"].append(format_history_item(row))
+    return result
+
+
+def get_student_history(db: Session, class_id: int, student_id: int):
+    """Lịch sử + thống kê của 1 SV. None nếu SV không thuộc lớp."""
+    histories = group_histories(build_history_query(db, class_id, student_id))
+    return histories[0] if histories else None
+
+
+def get_class_histories(db: Session, class_id: int):
+    """Lịch sử + thống kê của toàn bộ SV trong lớp (1 query cho cả lớp)"""
+    return group_histories(build_history_query(db, class_id))
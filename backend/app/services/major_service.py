@@ -1,5 +1,4 @@
-from sqlalchemy.orm import Session
-from backend.app.crud.major_crud import get_all_majors
+from backend.app.services.reference_cache import ReferenceCache
 
-def get_majors_service(db: Session):
-    return get_all_majors(db)
+def get_majors_service(ref: ReferenceCache):
+    return list(ref.majors.values())
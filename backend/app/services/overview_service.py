@@ -0,0 +1,133 @@
+# backend/app/services/overview_service.py
+# Dữ liệu tổng hợp 1 lớp cho các trang frontend (class_detail, select_session, dashboard, session_detail):
+#   - roster (danh sách SV + tổng buổi có mặt / vắng từ study_attendance_summary)
+#   - danh sách buổi học + sĩ số có mặt / vắng
+#   - trạng thái điểm danh của buổi đang chọn
+# + version rẻ (1 query aggregate) để làm ETag / If-None-Match
+
+import hashlib
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from backend.app.models.student import Student
+from backend.app.models.study import Study
+from backend.app.models.attendance import Attendance
+from backend.app.models.attendance_summary import ClassSessionSummary, StudyAttendanceSummary
+from backend.app.crud.attendance_crud import get_session_counts
+
+
+def get_class_version(db: Session, class_id: int) -> str:
+    """
+    Version của dữ liệu lớp, đổi khi:
+    - thêm / xóa SV khỏi lớp (số dòng study, tổng StudyID)
+    - sửa tên / MSSV của SV trong lớp (tổng CRC32 của FullName|StudentCode - roster trả về 2 cột này)
+    - có lượt điểm danh mới (số buổi, tổng sĩ số trong class_session_summary)
+    """
+    roster = select(
+        func.count(Study.StudyID).label("n_study"),
+        func.coalesce(func.sum(Study.StudyID), 0).label("sum_study"),
+        func.coalesce(
+            func.sum(func.crc32(Student.FullName.concat("|").concat(Student.StudentCode))), 0
+        ).label("sum_roster")
+    ).select_from(Study).join(Student, Student.StudentID == Study.StudentID).where(
+        Study.ClassID == class_id
+    ).subquery()
+    sessions = select(
+        func.count(ClassSessionSummary.Date).label("n_session"),
+        func.coalesce(func.sum(ClassSessionSummary.PresentCount), 0).label("sum_present")
+    ).where(ClassSessionSummary.ClassID == class_id).subquery()
+
+    row = db.execute(select(roster, sessions)).first()
+    raw = f"{class_id}:" + ":".join(str(v) for v in row)
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _session_status(rows, session_date):
+    """Các dòng roster LEFT JOIN attendance -> dict giống API /attendance/session-detail"""
+    attended = []
+    absent = []
+    for s in rows:
+        student_info = {
+            "StudentID": s.StudentID,
+            "FullName": s.FullName,
+            "StudentCode": s.StudentCode,
+            "StudyID": s.StudyID,
+            "AttendanceTime": s.AttendanceTime.strftime("%H:%M:%S") if s.AttendanceTime else None,
+            "Status": "Có mặt" if s.AttendanceID else "Vắng"
+        }
+        if s.AttendanceID:
+            attended.append(student_info)
+        else:
+            absent.append(student_info)
+
+    return {
+        "success": True,
+        "session_date": session_date.strftime("%Y-%m-%d"),
+        "total_students": len(rows),
+        "total_attended": len(attended),
+        "total_absent": len(absent),
+        "attended_list": attended,
+        "absent_list": absent
+    }
+
+
+def build_class_overview(db: Session, class_id: int, session_date=None):
+    """
+    Roster + buổi học + (tùy chọn) trạng thái buổi `session_date` bằng 2 query:
+      1. study JOIN student LEFT JOIN study_attendance_summary [LEFT JOIN attendance ngày đang chọn]
+      2. class_session_summary của lớp
+    """
+    columns = [
+        Study.StudyID, Student.StudentID, Student.FullName, Student.StudentCode,
+        StudyAttendanceSummary.PresentCount, StudyAttendanceSummary.AbsentCount,
+    ]
+    query = (
+        db.query(*columns)
+        .select_from(Study)
+        .join(Student, Student.StudentID == Study.StudentID)
+        .outerjoin(StudyAttendanceSummary, StudyAttendanceSummary.StudyID == Study.StudyID)
+    )
+
+    if session_date is not None:
+        query = (
+            db.query(*columns, Attendance.Time.label("AttendanceTime"), Attendance.AttendanceID)
+            .select_from(Study)
+            .join(Student, Student.StudentID == Study.StudentID)
+            .outerjoin(StudyAttendanceSummary, StudyAttendanceSummary.StudyID == Study.StudyID)
+            .outerjoin(
+                Attendance,
+                and_(Attendance.StudyID == Study.StudyID, Attendance.Date == session_date)
+            )
+        )
+
+    rows = query.filter(Study.ClassID == class_id).order_by(Study.StudyID).all()
+    total = len(rows)
+
+    roster = [
+        {
+            "StudentID": r.StudentID,
+            "FullName": r.FullName,
+            "StudentCode": r.StudentCode,
+            "StudyID": r.StudyID,
+            "PresentCount": r.PresentCount or 0,
+            "AbsentCount": r.AbsentCount or 0
+        }
+        for r in rows
+    ]
+    sessions = [
+        {
+            "date": s.Date.strftime("%Y-%m-%d"),
+            "present": s.PresentCount,
+            "absent": max(0, total - s.PresentCount)
+        }
+        for s in get_session_counts(db, class_id)
+    ]
+
+    return {
+        "class_id": class_id,
+        "total_students": total,
+        "roster": roster,
+        "sessions": sessions,
+        "selected_session": _session_status(rows, session_date) if session_date is not None else None,
+    }
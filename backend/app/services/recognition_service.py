@@ -0,0 +1,45 @@
+# backend/app/services/recognition_service.py
+# Gom kết quả nhận diện (smart_face_attendance.match_frames) của 1 hoặc nhiều ảnh thành danh sách SV cần điểm danh:
+#   - 1 SV xuất hiện ở nhiều ảnh / nhiều lần -> 1 dòng (giữ similarity cao nhất, liệt kê các ảnh có mặt)
+#   - mặt nghi giả mạo (liveness) không được điểm danh, mặt không khớp ai chỉ đếm
+
+def collect_students(results):
+    """
+    results: list {'status', 'faces'} (cùng thứ tự ảnh upload)
+    Return: (students, stats)
+      students: list {student_id, name, code, similarity, images} - sắp theo similarity giảm dần
+      stats: {images, no_face_images, faces, unknown_faces, fake_faces}
+    """
+    best = {}
+    stats = {"images": len(results), "no_face_images": 0, "faces": 0, "unknown_faces": 0, "fake_faces": 0}
+
+    for idx, result in enumerate(results):
+        faces = result.get("faces") or []
+        if not faces:
+            stats["no_face_images"] += 1
+        for face in faces:
+            stats["faces"] += 1
+            student = face.get("student") or {}
+            if not face.get("found") or not student.get("id"):
+                stats["unknown_faces"] += 1
+                continue
+            if not face.get("is_real", True):
+                stats["fake_faces"] += 1
+                continue
+
+            sid = student["id"]
+            entry = best.get(sid)
+            if entry is None:
+                entry = best[sid] = {
+                    "student_id": sid,
+                    "name": student.get("name"),
+                    "code": student.get("code"),
+                    "similarity": 0.0,
+                    "images": [],
+                }
+            entry["similarity"] = max(entry["similarity"], round(float(face.get("similarity", 0.0)), 4))
+            if idx not in entry["images"]:
+                entry["images"].append(idx)
+
+    students = sorted(best.values(), key=lambda s: s["similarity"], reverse=True)
+    return students, stats
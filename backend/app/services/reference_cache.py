@@ -0,0 +1,113 @@
+# backend/app/services/reference_cache.py
+# Cache dữ liệu danh mục (major / type / shift) trong RAM của process:
+#   - nạp 1 lần lúc khởi động (main.py startup), phục vụ /class/majors, /class/types, /class/shifts, /major, /type
+#   - tra tên ngành / hệ đào tạo khi trả chi tiết SV (không JOIN major, type mỗi request)
+#   - tự làm mới khi có ghi vào 3 bảng qua ORM (mapper event), và sau REFERENCE_CACHE_TTL giây
+#     (sửa trực tiếp trong MySQL / worker uvicorn khác)
+#   - version (ETag) đổi khi dữ liệu đổi -> client gửi If-None-Match nhận 304
+
+import os
+import time
+import hashlib
+import json
+import threading
+
+from fastapi import Request, Response
+from sqlalchemy import event
+
+from backend.app.models.major import Major
+from backend.app.models.type import Type
+from backend.app.models.shift import Shift
+
+REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", 600))
+
+
+class ReferenceCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.majors = {}   # MajorID -> {"MajorID", "MajorName", "Full_name_mj"}
+        self.types = {}    # TypeID -> {"TypeID", "TypeName"}
+        self.shifts = {}   # ShiftID -> {"ShiftID", "ShiftName", "TimeStart", "TimeEnd"}
+        self.version = ""
+        self.loaded_at = 0.0
+
+    def load(self, db):
+        """Đọc lại 3 bảng danh mục (3 query nhỏ) rồi tráo vào"""
+        majors = {
+            m.MajorID: {"MajorID": m.MajorID, "MajorName": m.MajorName, "Full_name_mj": m.Full_name_mj}
+            for m in db.query(Major).order_by(Major.MajorID)
+        }
+        types = {
+            t.TypeID: {"TypeID": t.TypeID, "TypeName": t.TypeName}
+            for t in db.query(Type).order_by(Type.TypeID)
+        }
+        shifts = {
+            s.ShiftID: {
+                "ShiftID": s.ShiftID, "ShiftName": s.ShiftName,
+                "TimeStart": s.TimeStart.strftime("%H:%M") if s.TimeStart else None,
+                "TimeEnd": s.TimeEnd.strftime("%H:%M") if s.TimeEnd else None,
+            }
+            for s in db.query(Shift).order_by(Shift.ShiftID)
+        }
+        raw = json.dumps([list(majors.values()), list(types.values()), list(shifts.values())],
+                         ensure_ascii=False, sort_keys=True)
+        with self._lock:
+            self.majors, self.types, self.shifts = majors, types, shifts
+            self.version = hashlib.md5(raw.encode("utf-8")).hexdigest()[:16]
+            self.loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Đánh dấu hết hạn - lần đọc tiếp theo sẽ nạp lại"""
+        self.loaded_at = 0.0
+
+    def is_stale(self):
+        return not self.loaded_at or time.monotonic() - self.loaded_at > REFERENCE_CACHE_TTL
+
+    @property
+    def etag(self):
+        return f'W/"ref-{self.version}"'
+
+    # ---------- tra cứu ----------
+    def major_full_name(self, major_id):
+        m = self.majors.get(major_id)
+        return m["Full_name_mj"] if m else None
+
+    def type_name(self, type_id):
+        t = self.types.get(type_id)
+        return t["TypeName"] if t else None
+
+
+reference_cache = ReferenceCache()
+_load_lock = threading.Lock()
+
+
+def get_reference_cache(db=None):
+    """Cache đã nạp (nạp lại nếu hết hạn / vừa có ghi). db: session sẵn có của request, không có thì tự mở."""
+    if reference_cache.is_stale():
+        with _load_lock:
+            if reference_cache.is_stale():
+                if db is not None:
+                    reference_cache.load(db)
+                else:
+                    from backend.app.database import SessionLocal
+                    with SessionLocal() as own_db:
+                        reference_cache.load(own_db)
+    return reference_cache
+
+
+def not_modified(request: Request, response: Response, ref: ReferenceCache):
+    """304 nếu client đã có đúng version (If-None-Match), ngược lại gắn ETag vào response và trả None"""
+    if request.headers.get("if-none-match") == ref.etag:
+        return Response(status_code=304, headers={"ETag": ref.etag})
+    response.headers["ETag"] = ref.etag
+    return None
+
+
+# Ghi vào major / type / shift qua ORM -> làm mới cache
+def _invalidate_on_write(mapper, connection, target):
+    reference_cache.invalidate()
+
+
+for _model in (Major, Type, Shift):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _invalidate_on_write)
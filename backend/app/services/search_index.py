@@ -0,0 +1,245 @@
+# backend/app/services/search_index.py
+# Index tìm kiếm sinh viên trong RAM (thay cho ILIKE '%q%' quét cả bảng):
+#   - chuẩn hóa tiếng Việt không dấu (vn_text)
+#   - từ điển token đã sắp xếp -> tìm theo tiền tố từ (bisect)
+#   - trigram -> tìm chuỗi con (vd giữa MSSV)
+#   - xếp hạng theo tầng: trùng MSSV > trùng nguyên từ > tiền tố từ > chuỗi con
+# Cập nhật từng SV khi thêm / sửa, tự rebuild nền sau SEARCH_INDEX_TTL giây (nhiều worker uvicorn)
+
+import os
+import time
+import heapq
+import bisect
+import threading
+from collections import defaultdict
+
+from backend.app.services.vn_text import normalize_search_text
+
+SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", 300))
+
+
+def _trigrams(token: str):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class StudentSearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}                       # StudentID -> (tokens, text, code)
+        self._token_ids = defaultdict(set)    # token -> {StudentID}
+        self._vocab = []                      # token duy nhất, đã sắp xếp (tìm tiền tố)
+        self._trigram_ids = defaultdict(set)  # trigram -> {StudentID}
+        self._code_ids = defaultdict(set)     # MSSV chuẩn hóa -> {StudentID}
+        self._order = {}                      # StudentID -> (độ dài tên, StudentID): phá hòa trong cùng tầng
+        self.built_at = 0.0
+        self._rebuilding = False
+
+    # ==========================================
+    # CẬP NHẬT
+    # ==========================================
+    def _add_token(self, token, student_id):
+        ids = self._token_ids[token]
+        if not ids:
+            bisect.insort(self._vocab, token)
+        ids.add(student_id)
+        for tri in _trigrams(token):
+            self._trigram_ids[tri].add(student_id)
+
+    def _remove_token(self, token, student_id):
+        ids = self._token_ids.get(token)
+        if ids is None:
+            return
+        ids.discard(student_id)
+        if not ids:
+            del self._token_ids[token]
+            i = bisect.bisect_left(self._vocab, token)
+            if i < len(self._vocab) and self._vocab[i] == token:
+                del self._vocab[i]
+        for tri in _trigrams(token):
+            tri_ids = self._trigram_ids.get(tri)
+            if tri_ids is not None:
+                tri_ids.discard(student_id)
+                if not tri_ids:
+                    del self._trigram_ids[tri]
+
+    def remove(self, student_id):
+        with self._lock:
+            doc = self._docs.pop(student_id, None)
+            if doc is None:
+                return
+            tokens, _, code = doc
+            for token in tokens:
+                self._remove_token(token, student_id)
+            self._code_ids[code].discard(student_id)
+            if not self._code_ids[code]:
+                del self._code_ids[code]
+            self._order.pop(student_id, None)
+
+    def upsert(self, student_id, full_name, student_code):
+        """Thêm / cập nhật 1 SV (gọi sau khi commit /student/add, /student/update)"""
+        name_norm = normalize_search_text(full_name)
+        code_norm = normalize_search_text(student_code).replace(" ", "")
+        tokens = set(name_norm.split())
+        if code_norm:
+            tokens.add(code_norm)
+
+        with self._lock:
+            self.remove(student_id)
+            for token in tokens:
+                self._add_token(token, student_id)
+            self._docs[student_id] = (tokens, f"{name_norm} {code_norm}", code_norm)
+            self._code_ids[code_norm].add(student_id)
+            self._order[student_id] = (len(name_norm), student_id)
+
+    def build(self, rows):
+        """Tạo index mới từ [(StudentID, FullName, StudentCode)] rồi tráo vào (không khóa lâu)"""
+        fresh = StudentSearchIndex()
+        for student_id, full_name, student_code in rows:
+            fresh.upsert(student_id, full_name or "", student_code or "")
+        with self._lock:
+            self._docs = fresh._docs
+            self._token_ids = fresh._token_ids
+            self._vocab = fresh._vocab
+            self._trigram_ids = fresh._trigram_ids
+            self._code_ids = fresh._code_ids
+            self._order = fresh._order
+            self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._docs)
+
+    # ==========================================
+    # TÌM KIẾM
+    # ==========================================
+    def _prefix_sets(self, term):
+        """Tập SV của từng token bắt đầu bằng `term`, theo thứ tự từ điển (generator, chưa gộp)"""
+        vocab = self._vocab
+        i = bisect.bisect_left(vocab, term)
+        while i < len(vocab) and vocab[i].startswith(term):
+            yield self._token_ids[vocab[i]]
+            i += 1
+
+    def _prefix_match(self, terms, exclude):
+        """
+        SV mà mọi từ khóa đều là tiền tố của 1 từ trong tên / MSSV.
+        Bắt đầu từ từ khóa có ít SV nhất, thu hẹp dần bằng phép giao (chạy trong C, không lặp từng SV).
+        """
+        groups = sorted(((t, list(self._prefix_sets(t))) for t in terms), key=lambda g: sum(map(len, g[1])))
+        candidates = set().union(*groups[0][1]) - exclude
+        docs = self._docs
+        for term, sets in groups[1:]:
+            if not candidates:
+                break
+            if len(sets) <= len(candidates):
+                candidates = set().union(*(ids & candidates for ids in sets))
+            else:
+                # Quá nhiều token (vd tiền tố MSSV): kiểm tra trực tiếp token của từng ứng viên
+                candidates = {i for i in candidates if any(tok.startswith(term) for tok in docs[i][0])}
+        return candidates
+
+    def _substring_ids(self, term):
+        """Ứng viên chứa `term` (giao các trigram) - cần kiểm tra lại bằng `in`"""
+        grams = sorted((self._trigram_ids.get(t, set()) for t in _trigrams(term)), key=len)
+        if not grams or not grams[0]:
+            return set()
+        return set.intersection(*grams)
+
+    def search(self, q, limit=30):
+        """Trả về list StudentID đã xếp hạng (tối đa `limit`)"""
+        query = normalize_search_text(q)
+        terms = query.split()
+        if not terms:
+            return []
+
+        with self._lock:
+            order_key = self._order.__getitem__
+            code = query.replace(" ", "")
+            results = []
+            seen = set()
+
+            def take(ids):
+                ids = ids - seen
+                if not ids:
+                    return
+                need = limit - len(results)
+                picked = heapq.nsmallest(need, ids, key=order_key)
+                results.extend(picked)
+                seen.update(picked)
+
+            # Tầng 1: trùng MSSV
+            take(self._code_ids.get(code, set()))
+            if len(results) >= limit:
+                return results
+
+            # Tầng 2, 3: mọi từ khóa trùng nguyên từ / là tiền tố của 1 từ
+            exact = set.intersection(*[self._token_ids.get(t, set()) for t in terms])
+            take(exact)
+            if len(results) >= limit:
+                return results
+
+            if len(terms) == 1:
+                # 1 từ khóa: duyệt từ điển theo thứ tự, đủ `limit` thì dừng (không gom cả tập)
+                for ids in self._prefix_sets(terms[0]):
+                    take(ids)
+                    if len(results) >= limit:
+                        return results
+            else:
+                take(self._prefix_match(terms, seen))
+                if len(results) >= limit:
+                    return results
+
+            # Tầng 4: chuỗi con (chỉ với từ khóa >= 3 ký tự), AND với tiền tố của các từ ngắn
+            long_terms = [t for t in terms if len(t) >= 3]
+            if not long_terms:
+                return results
+            candidates = set.intersection(*[self._substring_ids(t) for t in long_terms])
+            short_terms = [t for t in terms if len(t) < 3]
+            if short_terms and candidates:
+                candidates &= self._prefix_match(short_terms, seen)
+            docs = self._docs
+            take({i for i in candidates - seen if all(t in docs[i][1] for t in long_terms)})
+            return results
+
+
+# ==========================================
+# INDEX DÙNG CHUNG CHO API
+# ==========================================
+student_index = StudentSearchIndex()
+_load_lock = threading.Lock()
+
+
+def _load_rows():
+    from backend.app.database import SessionLocal
+    from backend.app.models.student import Student
+
+    db = SessionLocal()
+    try:
+        return db.query(Student.StudentID, Student.FullName, Student.StudentCode).all()
+    finally:
+        db.close()
+
+
+def _background_rebuild():
+    try:
+        student_index.build(_load_rows())
+    except Exception as e:
+        print(f"❌ [SEARCH INDEX] Rebuild lỗi: {e}")
+    finally:
+        student_index._rebuilding = False
+
+
+def get_student_index():
+    """
+    Index đã nạp. Lần đầu: nạp đồng bộ.
+    Quá TTL: rebuild ở thread nền (vẫn phục vụ index cũ) để đồng bộ thay đổi từ worker khác.
+    """
+    if not student_index.built_at:
+        with _load_lock:
+            if not student_index.built_at:
+                t0 = time.perf_counter()
+                student_index.build(_load_rows())
+                print(f"🔎 [SEARCH INDEX] Nạp {len(student_index)} SV trong {(time.perf_counter() - t0) * 1000:.0f} ms")
+    elif time.monotonic() - student_index.built_at > SEARCH_INDEX_TTL and not student_index._rebuilding:
+        student_index._rebuilding = True
+        threading.Thread(target=_background_rebuild, daemon=True).start()
+    return student_index
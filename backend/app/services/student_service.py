@@ -1,27 +1,26 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from backend.app.models.student import Student
 from backend.app.models.study import Study
+from backend.app.services.search_index import get_student_index, student_index
 
 def search_students(db: Session, q: str, limit: int = 30):
     q = (q or "").strip()
     if len(q) < 2:
         return {"success": True, "data": []}
 
-    like = f"%{q}%"
+    # Xếp hạng bằng index trong RAM, DB chỉ lấy chi tiết theo StudentID
+    ids = get_student_index().search(q, limit)
+    if not ids:
+        return {"success": True, "data": []}
 
     rows = (
         db.query(Student, Study.ClassID)
         .outerjoin(Study, Study.StudentID == Student.StudentID)
-        .filter(
-            or_(
-                Student.FullName.ilike(like),
-                Student.StudentCode.ilike(like)
-            )
-        )
-        .limit(limit)
+        .filter(Student.StudentID.in_(ids))
         .all()
     )
+    rank = {student_id: i for i, student_id in enumerate(ids)}
+    rows.sort(key=lambda r: rank[r.Student.StudentID])
 
     return {
         "success": True,
@@ -32,7 +31,7 @@ def search_students(db: Session, q: str, limit: int = 30):
                 "ClassID": r.ClassID,      # <-- ClassID từ Study
                 "Phone": r.Student.Phone
             }
-            for r in rows
+            for r in rows[:limit]
         ]
     }
 
@@ -53,4 +52,5 @@ def create_student(db: Session, data):
     db.add(student)
     db.commit()
     db.refresh(student)
+    student_index.upsert(student.StudentID, student.FullName, student.StudentCode)
     return {"success": True, "student_id": student.StudentID}
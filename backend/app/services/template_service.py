@@ -0,0 +1,155 @@
+# backend/app/services/template_service.py
+# Cập nhật mẫu khuôn mặt (student_embeddings) dần theo các lần điểm danh chắc chắn (bật bằng TEMPLATE_ADAPTATION=1):
+#   - chỉ nhận mặt người thật (qua liveness), giống mẫu hiện tại >= TEMPLATE_ADAPT_MIN_SIM và cách SV giống thứ 2
+#     ít nhất TEMPLATE_ADAPT_MARGIN; mỗi mẫu tối đa 1 lần / TEMPLATE_ADAPT_INTERVAL giây
+#   - mẫu mới = EMA: (1 - alpha) x mẫu cũ + alpha x mặt mới (chuẩn hóa lại)
+#   - chống trôi: mẫu mới phải còn giống mẫu lúc đăng ký (AnchorEmbedding) >= TEMPLATE_ANCHOR_MIN_SIM,
+#     không thì từ chối; mọi lần cập nhật / từ chối ghi template_update_log (kèm embedding cũ để khôi phục)
+#   - gallery trong RAM sửa đúng dòng đó + hiệu chỉnh lại ngưỡng của SV đó, nâng ngưỡng SV khác nay giống hơn,
+#     sửa cặp / tập xung đột (gallery_audit) của dòng đó - chỉ tính 1 dòng x G, không nạp lại cả gallery
+
+import os
+import time
+import pickle
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backend.app.models.student_embeddings import StudentEmbeddings
+from backend.app.models.template_update_log import TemplateUpdateLog
+from backend.app.ai.face import calibration, gallery_audit
+
+TEMPLATE_ADAPTATION = os.getenv("TEMPLATE_ADAPTATION", "0") == "1"
+TEMPLATE_ADAPT_ALPHA = float(os.getenv("TEMPLATE_ADAPT_ALPHA", 0.05))
+TEMPLATE_ADAPT_MIN_SIM = float(os.getenv("TEMPLATE_ADAPT_MIN_SIM", 0.70))
+TEMPLATE_ADAPT_MARGIN = float(os.getenv("TEMPLATE_ADAPT_MARGIN", 0.15))
+TEMPLATE_ANCHOR_MIN_SIM = float(os.getenv("TEMPLATE_ANCHOR_MIN_SIM", 0.80))
+TEMPLATE_ADAPT_INTERVAL = int(os.getenv("TEMPLATE_ADAPT_INTERVAL", 6 * 3600))
+# Không có liveness thì ảnh chụp / màn hình có thể "dạy" sai mẫu -> mặc định bắt buộc LIVENESS_CHECK=1
+TEMPLATE_ADAPT_REQUIRE_LIVENESS = os.getenv("TEMPLATE_ADAPT_REQUIRE_LIVENESS", "1") == "1"
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="template-update")
+_last_update = {}        # EmbeddingID -> thời điểm cập nhật / thử cập nhật gần nhất
+_last_update_lock = threading.Lock()
+_gallery_lock = threading.Lock()
+
+
+def _to_blob(emb):
+    return pickle.dumps(np.asarray(emb, dtype=np.float32))
+
+
+def _normalize(v):
+    return (v / (np.linalg.norm(v) + 1e-9)).astype(np.float32)
+
+
+def is_candidate(known, sims_row, best_idx, face, liveness_checked):
+    """Mặt đủ chắc chắn để cập nhật mẫu? (điểm cao, tách biệt SV khác, người thật)"""
+    if not face["found"] or not face["is_real"]:
+        return False
+    if TEMPLATE_ADAPT_REQUIRE_LIVENESS and not (liveness_checked and "liveness" in face):
+        return False
+    score = float(sims_row[best_idx])
+    if score < TEMPLATE_ADAPT_MIN_SIM:
+        return False
+    # Điểm cao nhất của SV khác (1 SV nhiều dòng -> bỏ mọi dòng của SV đó)
+    others = sims_row[known["labels"] != known["labels"][best_idx]]
+    return not others.size or score - float(others.max()) >= TEMPLATE_ADAPT_MARGIN
+
+
+def _claim(embedding_id, now):
+    """Giới hạn tần suất: mỗi mẫu 1 lần / TEMPLATE_ADAPT_INTERVAL"""
+    with _last_update_lock:
+        last = _last_update.get(embedding_id)
+        if last is not None and now - last < TEMPLATE_ADAPT_INTERVAL:
+            return False
+        _last_update[embedding_id] = now
+        return True
+
+
+def update_template(known, row, embedding, similarity, source=None):
+    """
+    Cập nhật 1 mẫu (chạy trong luồng nền). Return: applied | rejected_drift | skipped
+    """
+    from backend.app.database import SessionLocal
+
+    meta = known["meta"][row]
+    embedding_id = meta.get("embedding_id")
+    if embedding_id is None or not _claim(embedding_id, time.time()):
+        return "skipped"
+
+    db = SessionLocal()
+    try:
+        record = (
+            db.query(StudentEmbeddings)
+            .filter(StudentEmbeddings.EmbeddingID == embedding_id)
+            .with_for_update()
+            .first()
+        )
+        if record is None:
+            return "skipped"
+
+        old = _normalize(pickle.loads(record.Embedding).astype(np.float32))
+        anchor = _normalize(pickle.loads(record.AnchorEmbedding).astype(np.float32)) \
+            if record.AnchorEmbedding else old
+        new = _normalize((1.0 - TEMPLATE_ADAPT_ALPHA) * old + TEMPLATE_ADAPT_ALPHA * _normalize(embedding))
+        anchor_sim = float(new @ anchor)
+        status = "applied" if anchor_sim >= TEMPLATE_ANCHOR_MIN_SIM else "rejected_drift"
+
+        now = datetime.now()
+        db.add(TemplateUpdateLog(
+            EmbeddingID=embedding_id,
+            StudentID=record.StudentID,
+            Status=status,
+            Similarity=float(similarity),
+            AnchorSimilarity=anchor_sim,
+            Alpha=TEMPLATE_ADAPT_ALPHA,
+            OldEmbedding=record.Embedding,
+            NewEmbedding=_to_blob(new) if status == "applied" else None,
+            Source=source,
+            CreatedAt=now,
+        ))
+        if status == "applied":
+            if record.AnchorEmbedding is None:
+                record.AnchorEmbedding = record.Embedding   # giữ mẫu lúc đăng ký làm mốc
+            record.Embedding = _to_blob(new)
+            record.UpdateCount = (record.UpdateCount or 0) + 1
+            record.UpdatedAt = now
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ ERROR update_template: {e}")
+        return "skipped"
+    finally:
+        db.close()
+
+    if status == "applied":
+        _apply_in_memory(known, row, embedding_id, new)
+    return status
+
+
+def _apply_in_memory(known, row, embedding_id, new):
+    """
+    Sửa đúng dòng gallery (nếu gallery chưa bị nạp lại) + hiệu chỉnh lại ngưỡng các dòng của SV đó,
+    nâng ngưỡng SV khác nay giống dòng này hơn, sửa audit_pairs / conflict cho cả 2 phía.
+    Request đang so khớp cùng lúc có thể thấy dòng cũ hoặc mới - cả 2 đều hợp lệ.
+    """
+    with _gallery_lock:
+        if row >= len(known["meta"]) or known["meta"][row].get("embedding_id") != embedding_id:
+            return
+        known["encodings"][row] = new
+        rows = np.flatnonzero(known["labels"] == known["labels"][row])
+        calibration.recalibrate_rows(known, rows)
+
+        sims = calibration.normalize_rows(known["encodings"]) @ new     # 1 dòng x G
+        calibration.raise_for_row(known, row, sims)
+        gallery_audit.update_row(known, row, sims)
+
+
+def submit_template_updates(known, updates):
+    """updates: list (row gallery, embedding, similarity, source) -> cập nhật ở luồng nền (không chờ)"""
+    if not TEMPLATE_ADAPTATION:
+        return
+    for row, embedding, similarity, source in updates:
+        _writer.submit(update_template, known, row, np.array(embedding, dtype=np.float32), similarity, source)
@@ -0,0 +1,367 @@
+# backend/app/services/unknown_face_service.py
+# Kho khuôn mặt lạ (không khớp SV nào khi nhận diện) + gom cụm để giáo viên duyệt:
+#   - record / submit_unknown_faces: lưu embedding + ảnh mặt thu nhỏ + lớp + thời gian (ghi nền, không chặn request);
+#     cùng 1 người đứng trước camera liên tục chỉ lưu 1 lần mỗi UNKNOWN_DEDUP_SECONDS
+#   - cluster_unknown_faces: gom cụm tăng dần, chỉ xử lý mặt chưa có cụm, tính bằng phép nhân ma trận
+#     (mặt mới x tâm cụm cũ, rồi mặt còn lại x nhau)
+#   - enroll_cluster: ghi danh cả cụm cho 1 SV (thêm embedding trung bình vào student_embeddings)
+#     -> các buổi sau nhận ra luôn, không lặp lại nhận diện thất bại cho cùng 1 người
+
+import os
+import time
+import pickle
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.app.models.unknown_face import UnknownFace, UnknownCluster
+from backend.app.models.student import Student
+from backend.app.models.study import Study
+from backend.app.models.student_embeddings import StudentEmbeddings
+from backend.app.crud import attendance_crud
+
+# Bật / tắt lưu mặt lạ
+UNKNOWN_FACE_STORE = os.getenv("UNKNOWN_FACE_STORE", "1") == "1"
+# Mặt nhỏ hơn (px, ảnh gốc) thì không lưu: embedding kém, gom cụm sai
+UNKNOWN_MIN_FACE = int(os.getenv("UNKNOWN_MIN_FACE", 60))
+# Cùng 1 mặt (cosine >= UNKNOWN_DEDUP_SIM) trong UNKNOWN_DEDUP_SECONDS chỉ lưu 1 lần / lớp
+UNKNOWN_DEDUP_SECONDS = int(os.getenv("UNKNOWN_DEDUP_SECONDS", 120))
+UNKNOWN_DEDUP_SIM = float(os.getenv("UNKNOWN_DEDUP_SIM", 0.80))
+# Ngưỡng cosine để 2 mặt / mặt và tâm cụm coi là cùng 1 người
+UNKNOWN_CLUSTER_THRESHOLD = float(os.getenv("UNKNOWN_CLUSTER_THRESHOLD", 0.60))
+# Số mặt tối thiểu để lập cụm mới (mặt lẻ chờ lần chạy sau)
+UNKNOWN_MIN_CLUSTER = int(os.getenv("UNKNOWN_MIN_CLUSTER", 2))
+# Mặt lẻ chưa vào cụm quá số ngày này thì xóa
+UNKNOWN_RETENTION_DAYS = int(os.getenv("UNKNOWN_RETENTION_DAYS", 30))
+# Số mặt chưa có cụm tối đa / lần gom (ma trận n x n)
+CLUSTER_BATCH = int(os.getenv("UNKNOWN_CLUSTER_BATCH", 2000))
+
+THUMB_SIZE = 112
+EMB_DIM = 512
+
+# 1 luồng ghi nền: ghi DB tuần tự, request nhận diện không phải chờ
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="unknown-face")
+_recent = {}            # ClassID -> list (thời điểm, embedding) các mặt lạ vừa lưu
+_recent_lock = threading.Lock()
+
+
+def _to_blob(emb):
+    return pickle.dumps(np.asarray(emb, dtype=np.float32))
+
+
+def _from_blobs(blobs):
+    """list blob pickle -> ma trận (N, 512) đã chuẩn hóa L2"""
+    if not blobs:
+        return np.zeros((0, EMB_DIM), dtype=np.float32)
+    embs = np.vstack([pickle.loads(b) for b in blobs]).astype(np.float32)
+    norms = np.linalg.norm(embs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embs / norms
+
+
+def _normalize(v):
+    return v / (np.linalg.norm(v) + 1e-9)
+
+
+def make_thumbnail(face_rgb):
+    """Vùng mặt RGB -> JPEG THUMB_SIZE x THUMB_SIZE (bytes); None nếu lỗi"""
+    try:
+        thumb = cv2.resize(np.ascontiguousarray(face_rgb), (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", cv2.cvtColor(thumb, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 85])
+        return buf.tobytes() if ok else None
+    except Exception as e:
+        print(f"❌ Error make_thumbnail: {e}")
+        return None
+
+
+def _drop_recent_duplicates(class_id, embs, now):
+    """Mask các mặt cần lưu: bỏ mặt trùng (cùng người) với mặt vừa lưu gần đây hoặc với mặt trước trong cùng lô"""
+    with _recent_lock:
+        recent = [(t, e) for t, e in _recent.get(class_id, []) if now - t < UNKNOWN_DEDUP_SECONDS]
+        keep = np.zeros(len(embs), dtype=bool)
+        for i, emb in enumerate(embs):
+            if recent and float(np.max(np.stack([e for _, e in recent]) @ emb)) >= UNKNOWN_DEDUP_SIM:
+                continue
+            keep[i] = True
+            recent.append((now, emb))
+        _recent[class_id] = recent
+    return keep
+
+
+def record_unknown_faces(class_id, embeddings, faces_rgb, similarities):
+    """
+    Lưu các mặt lạ của 1 lần nhận diện (chạy trong luồng nền).
+    embeddings: (N, 512) đã chuẩn hóa; faces_rgb: vùng mặt RGB; similarities: độ giống cao nhất với gallery
+    Return: số mặt đã lưu
+    """
+    from backend.app.database import SessionLocal
+
+    embs = np.asarray(embeddings, dtype=np.float32)
+    keep = _drop_recent_duplicates(class_id, embs, time.time())
+    if not keep.any():
+        return 0
+
+    db = SessionLocal()
+    try:
+        now = datetime.now()
+        records = [
+            UnknownFace(
+                ClassID=class_id,
+                Embedding=_to_blob(embs[i]),
+                EmbeddingDim=EMB_DIM,
+                Thumbnail=make_thumbnail(faces_rgb[i]),
+                Similarity=float(similarities[i]),
+                CreatedAt=now,
+            )
+            for i in np.flatnonzero(keep)
+        ]
+        db.add_all(records)
+        db.commit()
+        return len(records)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ ERROR record_unknown_faces: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def submit_unknown_faces(class_id, embeddings, faces_rgb, similarities):
+    """Đưa việc lưu mặt lạ vào luồng ghi nền (không chờ)"""
+    if not UNKNOWN_FACE_STORE or class_id is None or not len(embeddings):
+        return None
+    # Crop là view của ảnh khung hình, caller vẽ khung / nhãn lên ảnh đó ngay sau khi trả kết quả
+    # -> copy trước khi sang luồng nền (thumbnail không dính khung vẽ, không đọc lúc đang ghi)
+    faces_rgb = [np.array(f, copy=True) for f in faces_rgb]
+    embeddings = np.array(embeddings, dtype=np.float32, copy=True)
+    return _writer.submit(record_unknown_faces, class_id, embeddings, faces_rgb, similarities)
+
+
+# ==========================================
+# GOM CỤM TĂNG DẦN
+# ==========================================
+def _cluster_class(db: Session, class_id, rows, now):
+    """Gom cụm các mặt chưa có cụm của 1 lớp. rows: list (UnknownFaceID, Embedding)"""
+    face_ids = np.array([r[0] for r in rows])
+    embs = _from_blobs([r[1] for r in rows])
+    stats = {"faces": len(rows), "assigned": 0, "new_clusters": 0, "ignored": 0}
+
+    # 1. Gán vào cụm sẵn có (đang chờ duyệt hoặc đã bỏ qua) - 1 phép nhân (mặt mới x tâm cụm)
+    clusters = (
+        db.query(UnknownCluster)
+        .filter(UnknownCluster.ClassID == class_id, UnknownCluster.Status.in_(("pending", "ignored")))
+        .all()
+    )
+    rest = np.arange(len(rows))
+    if clusters:
+        centroids = _from_blobs([c.Centroid for c in clusters])
+        sims = embs @ centroids.T
+        best = np.argmax(sims, axis=1)
+        matched = sims[np.arange(len(rows)), best] >= UNKNOWN_CLUSTER_THRESHOLD
+        for k, cluster in enumerate(clusters):
+            members = np.flatnonzero(matched & (best == k))
+            if len(members):
+                _add_members(db, cluster, face_ids[members], embs[members], now)
+                if cluster.Status == "ignored":
+                    stats["ignored"] += len(members)
+                else:
+                    stats["assigned"] += len(members)
+        rest = np.flatnonzero(~matched)
+
+    # 2. Mặt còn lại: gom theo "mặt dẫn đầu" trên ma trận giống nhau (n x n), nhóm đủ lớn -> cụm mới
+    if len(rest):
+        sub = embs[rest]
+        sims = sub @ sub.T
+        done = np.zeros(len(rest), dtype=bool)
+        for i in range(len(rest)):
+            if done[i]:
+                continue
+            members = np.flatnonzero((sims[i] >= UNKNOWN_CLUSTER_THRESHOLD) & ~done)
+            if len(members) < UNKNOWN_MIN_CLUSTER:
+                continue   # mặt lẻ: chờ thêm mặt giống ở lần sau
+            done[members] = True
+            cluster = UnknownCluster(ClassID=class_id, Centroid=_to_blob(np.zeros(EMB_DIM)), Size=0,
+                                     Status="pending", CreatedAt=now, UpdatedAt=now)
+            db.add(cluster)
+            db.flush()   # lấy ClusterID
+            _add_members(db, cluster, face_ids[rest[members]], sub[members], now)
+            stats["new_clusters"] += 1
+            stats["assigned"] += len(members)
+    return stats
+
+
+def _add_members(db: Session, cluster, face_ids, embs, now):
+    """Gắn mặt vào cụm + cập nhật tâm cụm (trung bình cộng dồn); cụm đã bỏ qua thì xóa luôn mặt mới"""
+    centroid = pickle.loads(cluster.Centroid).astype(np.float32) * cluster.Size + embs.sum(axis=0)
+    cluster.Centroid = _to_blob(_normalize(centroid))
+    cluster.Size += len(face_ids)
+    cluster.UpdatedAt = now
+
+    query = db.query(UnknownFace).filter(UnknownFace.UnknownFaceID.in_([int(i) for i in face_ids]))
+    if cluster.Status == "ignored":
+        query.delete(synchronize_session=False)
+    else:
+        query.update({UnknownFace.ClusterID: cluster.ClusterID}, synchronize_session=False)
+
+
+def cluster_unknown_faces(db: Session, class_id: int = None):
+    """
+    Job gom cụm tăng dần (gọi định kỳ hoặc trước khi liệt kê cụm):
+    chỉ đọc mặt chưa có cụm (tối đa CLUSTER_BATCH), xóa mặt lẻ quá hạn UNKNOWN_RETENTION_DAYS.
+    """
+    now = datetime.now()
+    stats = {"faces": 0, "assigned": 0, "new_clusters": 0, "ignored": 0, "expired": 0}
+
+    expired = db.query(UnknownFace).filter(
+        UnknownFace.ClusterID.is_(None),
+        UnknownFace.CreatedAt < now - timedelta(days=UNKNOWN_RETENTION_DAYS),
+    )
+    if class_id is not None:
+        expired = expired.filter(UnknownFace.ClassID == class_id)
+    stats["expired"] = expired.delete(synchronize_session=False)
+
+    query = db.query(UnknownFace.ClassID, UnknownFace.UnknownFaceID, UnknownFace.Embedding) \
+        .filter(UnknownFace.ClusterID.is_(None))
+    if class_id is not None:
+        query = query.filter(UnknownFace.ClassID == class_id)
+    rows = query.order_by(UnknownFace.UnknownFaceID.desc()).limit(CLUSTER_BATCH).all()
+
+    by_class = {}
+    for cid, face_id, blob in rows:
+        by_class.setdefault(cid, []).append((face_id, blob))
+    for cid, class_rows in by_class.items():
+        for key, value in _cluster_class(db, cid, class_rows, now).items():
+            stats[key] += value
+
+    db.commit()
+    return stats
+
+
+# ==========================================
+# DUYỆT CỤM
+# ==========================================
+def list_clusters(db: Session, class_id: int = None, status: str = "pending", sample: int = 4):
+    """Danh sách cụm (đông nhất lên đầu) kèm lần đầu / cuối xuất hiện và id vài mặt mới nhất để xem ảnh"""
+    query = db.query(UnknownCluster).filter(UnknownCluster.Status == status)
+    if class_id is not None:
+        query = query.filter(UnknownCluster.ClassID == class_id)
+    clusters = query.order_by(UnknownCluster.Size.desc(), UnknownCluster.UpdatedAt.desc()).all()
+    if not clusters:
+        return []
+
+    ids = [c.ClusterID for c in clusters]
+    seen = {
+        r.ClusterID: r
+        for r in db.query(
+            UnknownFace.ClusterID,
+            func.min(UnknownFace.CreatedAt).label("FirstSeen"),
+            func.max(UnknownFace.CreatedAt).label("LastSeen"),
+        ).filter(UnknownFace.ClusterID.in_(ids)).group_by(UnknownFace.ClusterID)
+    }
+    faces = {}
+    for cluster_id, face_id in (
+        db.query(UnknownFace.ClusterID, UnknownFace.UnknownFaceID)
+        .filter(UnknownFace.ClusterID.in_(ids))
+        .order_by(UnknownFace.UnknownFaceID.desc())
+    ):
+        bucket = faces.setdefault(cluster_id, [])
+        if len(bucket) < sample:
+            bucket.append(face_id)
+
+    result = []
+    for c in clusters:
+        r = seen.get(c.ClusterID)
+        result.append({
+            "cluster_id": c.ClusterID,
+            "class_id": c.ClassID,
+            "size": c.Size,
+            "status": c.Status,
+            "student_id": c.StudentID,
+            "first_seen": r.FirstSeen.isoformat() if r and r.FirstSeen else None,
+            "last_seen": r.LastSeen.isoformat() if r and r.LastSeen else None,
+            "face_ids": faces.get(c.ClusterID, []),
+        })
+    return result
+
+
+def get_thumbnail(db: Session, face_id: int):
+    row = db.query(UnknownFace.Thumbnail).filter(UnknownFace.UnknownFaceID == face_id).first()
+    return row.Thumbnail if row else None
+
+
+def enroll_cluster(db: Session, cluster_id: int, student_id: int, add_to_class: bool = False):
+    """
+    Ghi danh cụm cho SV (1 transaction):
+    - embedding trung bình của cụm (bỏ mặt lệch xa tâm) -> student_embeddings (Source='unknown_cluster')
+    - add_to_class: thêm SV vào lớp của cụm nếu chưa có (SV chưa được ghi danh vào lớp)
+    - cụm -> 'enrolled', xóa các mặt của cụm
+    Return: (status, embedding_id) - status: Success | NotFound | NotPending | NoStudent
+    """
+    cluster = db.query(UnknownCluster).filter(UnknownCluster.ClusterID == cluster_id).first()
+    if cluster is None:
+        return "NotFound", None
+    if cluster.Status != "pending":
+        return "NotPending", None
+    if db.query(Student.StudentID).filter(Student.StudentID == student_id).first() is None:
+        return "NoStudent", None
+
+    blobs = [r.Embedding for r in db.query(UnknownFace.Embedding).filter(UnknownFace.ClusterID == cluster_id)]
+    embs = _from_blobs(blobs) if blobs else _from_blobs([cluster.Centroid])
+
+    # Lọc nhiễu giống import_data: chỉ giữ mặt giống tâm cụm > 0.6
+    sims = embs @ _normalize(embs.mean(axis=0))
+    if (sims > 0.6).any():
+        embs, sims = embs[sims > 0.6], sims[sims > 0.6]
+    mean_emb = _normalize(embs.mean(axis=0))
+
+    now = datetime.now()
+    record = StudentEmbeddings(
+        StudentID=student_id,
+        Embedding=_to_blob(mean_emb),
+        EmbeddingDim=EMB_DIM,
+        PhotoPath=None,
+        Quality=float(sims.mean()),
+        Source="unknown_cluster",
+        CreatedAt=now,
+    )
+    db.add(record)
+
+    if add_to_class and cluster.ClassID is not None:
+        in_class = db.query(Study.StudyID).filter(
+            Study.ClassID == cluster.ClassID, Study.StudentID == student_id
+        ).first()
+        if in_class is None:
+            study = Study(StudentID=student_id, ClassID=cluster.ClassID)
+            db.add(study)
+            db.flush()
+            # Giống class_api: tạo dòng tổng hợp (vắng các buổi đã qua) trong cùng transaction
+            attendance_crud.on_study_added(db, study.StudyID, cluster.ClassID)
+
+    cluster.Status = "enrolled"
+    cluster.StudentID = student_id
+    cluster.UpdatedAt = now
+    db.query(UnknownFace).filter(UnknownFace.ClusterID == cluster_id).delete(synchronize_session=False)
+    db.commit()
+    return "Success", record.EmbeddingID
+
+
+def ignore_cluster(db: Session, cluster_id: int):
+    """
+    Bỏ qua cụm (không phải SV: khách, giáo viên...): giữ tâm cụm để mặt mới của người này
+    bị gán vào cụm và xóa luôn ở lần gom sau, xóa các mặt đã lưu.
+    """
+    cluster = db.query(UnknownCluster).filter(UnknownCluster.ClusterID == cluster_id).first()
+    if cluster is None:
+        return "NotFound"
+    if cluster.Status != "pending":
+        return "NotPending"
+    cluster.Status = "ignored"
+    cluster.UpdatedAt = datetime.now()
+    db.query(UnknownFace).filter(UnknownFace.ClusterID == cluster_id).delete(synchronize_session=False)
+    db.commit()
+    return "Success"
@@ -0,0 +1,115 @@
+# backend/app/services/upload_service.py
+# Giới hạn kích thước ảnh upload (config.MAX_FILE_SIZE):
+#   - UploadSizeLimitMiddleware: chặn ngay khi nhận body (Content-Length khai báo quá lớn, hoặc đếm byte khi
+#     stream vượt ngưỡng) -> 413, không để server đọc / ghi tạm hết file hàng chục MB rồi mới từ chối
+#   - read_upload: đọc file trong handler theo từng khối, vượt MAX_FILE_SIZE -> 413
+
+import os
+import json
+
+from fastapi import HTTPException, UploadFile
+
+from backend.config import MAX_FILE_SIZE
+
+# Số ảnh tối đa / request nhận diện nhiều ảnh (/attendance/recognize-batch/{class_id})
+MAX_BATCH_IMAGES = int(os.getenv("MAX_BATCH_IMAGES", 10))
+
+# Endpoint nhận ảnh upload -> giới hạn cả body. Đường dẫn kết thúc "/" là tiền tố (có tham số path).
+UPLOAD_LIMITS = {
+    "/api/v1/attendance/recognize": MAX_FILE_SIZE,
+    "/api/v1/ai/ai/recognize": MAX_FILE_SIZE,
+    "/api/v1/attendance/recognize-batch/": MAX_FILE_SIZE * MAX_BATCH_IMAGES,
+}
+# Phần multipart ngoài file (boundary, header, các form field nhỏ)
+MULTIPART_OVERHEAD = 64 * 1024
+READ_CHUNK = 1024 * 1024
+
+
+def _too_large_body(max_bytes):
+    return json.dumps({
+        "status": "error",
+        "message": f"Ảnh vượt quá giới hạn {max_bytes // (1024 * 1024)}MB"
+    }, ensure_ascii=False).encode("utf-8")
+
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware: request POST tới UPLOAD_LIMITS có body > giới hạn (+ overhead multipart) -> 413"""
+
+    def __init__(self, app, limits=None):
+        self.app = app
+        self.limits = limits or UPLOAD_LIMITS
+
+    def _max_bytes(self, path):
+        for prefix, max_bytes in self.limits.items():
+            if path == prefix or (prefix.endswith("/") and path.startswith(prefix)):
+                return max_bytes
+        return None
+
+    async def _reject(self, send, max_bytes):
+        body = _too_large_body(max_bytes)
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self._max_bytes(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if max_bytes is None:
+            return await self.app(scope, receive, send)
+        limit = max_bytes + MULTIPART_OVERHEAD
+
+        # 1. Content-Length khai báo quá lớn -> từ chối trước khi đọc byte nào
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > limit:
+            return await self._reject(send, max_bytes)
+
+        # 2. Upload chunked / khai báo sai: đếm byte khi stream, vượt ngưỡng thì cắt body
+        #    (app sẽ báo lỗi parse) và thay response của app bằng 413
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.request", "body": b"", "more_body": False}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded:
+                if not started:
+                    started = True
+                    await self._reject(send, max_bytes)
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+
+async def read_upload(file: UploadFile, max_bytes: int = MAX_FILE_SIZE) -> bytes:
+    """Đọc UploadFile theo từng khối; vượt max_bytes -> HTTPException 413 (dừng đọc ngay)"""
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Ảnh vượt quá giới hạn {max_bytes // (1024 * 1024)}MB")
+    chunks = []
+    total = 0
+    while True:
+        chunk = await file.read(READ_CHUNK)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Ảnh vượt quá giới hạn {max_bytes // (1024 * 1024)}MB")
+        chunks.append(chunk)
+    return b"".join(chunks)
@@ -0,0 +1,31 @@
+# backend/app/services/vn_text.py
+# Chuẩn hóa chuỗi tiếng Việt dùng chung: bỏ dấu (NFD), đ -> d, tên thư mục an toàn, chuỗi tìm kiếm
+
+import re
+import unicodedata
+
+# NFD không tách được đ/Đ (là chữ riêng, không phải d + dấu) -> map tay
+_SPECIAL_CHARS = str.maketrans({"đ": "d", "Đ": "D"})
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def fold_accents(s: str) -> str:
+    """'Nguyễn Văn Đức' -> 'Nguyen Van Duc' (giữ hoa/thường)"""
+    s = unicodedata.normalize("NFD", (s or "").translate(_SPECIAL_CHARS))
+    return "".join(ch for ch in s if not unicodedata.combining(ch))
+
+
+def safe_name(s: str) -> str:
+    """Chuyển tên tiếng Việt thành ASCII an toàn (làm tên thư mục / file)"""
+    s = fold_accents(s).encode("ascii", "ignore").decode()
+    s = re.sub(r"[^A-Za-z0-9_-]+", "_", s).strip("_")
+    return s or "student"
+
+
+def normalize_search_text(s: str) -> str:
+    """Chuỗi để index / tìm kiếm: bỏ dấu, chữ thường, chỉ giữ chữ + số, cách nhau 1 khoảng trắng"""
+    return _NON_ALNUM.sub(" ", fold_accents(s).lower()).strip()
+
+
+def tokenize(s: str) -> list:
+    return normalize_search_text(s).split()
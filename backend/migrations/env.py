@@ -0,0 +1,50 @@
+# backend/migrations/env.py
+# Môi trường chạy Alembic: dùng chung DATABASE_URL + SSL của backend/app/database.py
+
+import importlib
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from backend.app.database import Base, DATABASE_URL, connect_args
+# Import đủ model để Base.metadata có toàn bộ bảng (cho --autogenerate) - chỉ cần import module, không dùng tên class
+MODEL_MODULES = (
+    "major", "type", "shift", "class_model", "student", "study", "attendance", "login", "teach",
+    "student_embeddings", "attendance_summary", "unknown_face", "template_update_log",
+)
+for _module in MODEL_MODULES:
+    importlib.import_module(f"backend.app.models.{_module}")
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Xuất SQL ra màn hình (alembic upgrade head --sql) - không cần kết nối DB"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = create_engine(DATABASE_URL, connect_args=connect_args, pool_pre_ping=True)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
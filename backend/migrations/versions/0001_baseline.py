@@ -0,0 +1,149 @@
+"""Baseline: schema như file dump `python_project (3).sql`
+
+DB đã import từ file dump thì KHÔNG chạy upgrade revision này, chỉ đánh dấu:
+    alembic -c backend/alembic.ini stamp 0001_baseline
+DB trống thì `upgrade head` tạo toàn bộ bảng từ đầu.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2025-11-14
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLE_OPTS = {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4", "mysql_collate": "utf8mb4_general_ci"}
+
+
+def upgrade():
+    op.create_table(
+        "major",
+        sa.Column("MajorID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("MajorName", sa.String(100), nullable=False),
+        sa.Column("Full_name_mj", sa.String(500)),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "type",
+        sa.Column("TypeID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("TypeName", sa.String(100), nullable=False),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "shift",
+        sa.Column("ShiftID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("ShiftName", sa.String(50), nullable=False),
+        sa.Column("TimeStart", sa.Time, nullable=False),
+        sa.Column("TimeEnd", sa.Time, nullable=False),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "login",
+        sa.Column("id_login", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("email", sa.String(50)),
+        sa.Column("phone", sa.String(10)),
+        sa.Column("name", sa.String(100)),
+        sa.Column("pass", sa.String(100)),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "class",
+        sa.Column("ClassID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("Quantity", sa.Integer, nullable=False),
+        sa.Column("Rank", sa.String(50)),
+        sa.Column("Semester", sa.String(45), nullable=False),
+        sa.Column("DateStart", sa.Date, nullable=False),
+        sa.Column("DateEnd", sa.Date, nullable=False),
+        sa.Column("Session", sa.String(45)),
+        sa.Column("ClassName", sa.String(100), nullable=False),
+        sa.Column("FullClassName", sa.String(200)),
+        sa.Column("CourseCode", sa.Integer, nullable=False),
+        sa.Column("Teacher_class", sa.String(100)),
+        sa.Column("TypeID", sa.Integer, sa.ForeignKey("type.TypeID", name="class_ibfk_1"), nullable=False),
+        sa.Column("MajorID", sa.Integer, sa.ForeignKey("major.MajorID", name="class_ibfk_2"), nullable=False),
+        sa.Column("ShiftID", sa.Integer, sa.ForeignKey("shift.ShiftID", name="class_ibfk_3"), nullable=False),
+        sa.Index("TypeID", "TypeID"),
+        sa.Index("MajorID", "MajorID"),
+        sa.Index("ShiftID", "ShiftID"),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "student",
+        sa.Column("StudentID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("FullName", sa.String(100), nullable=False),
+        sa.Column("StudentCode", sa.String(20), nullable=False),
+        sa.Column("DefaultClass", sa.String(45)),
+        sa.Column("Phone", sa.String(20)),
+        sa.Column("AcademicYear", sa.String(10)),
+        sa.Column("DateOfBirth", sa.Date),
+        sa.Column("CitizenID", sa.String(20)),
+        sa.Column("PhotoStatus", sa.String(10)),
+        sa.Column("StudentPhoto", sa.String(255)),
+        sa.Column("MajorID", sa.Integer, sa.ForeignKey("major.MajorID", name="student_ibfk_1"), nullable=False),
+        sa.Column("TypeID", sa.Integer, sa.ForeignKey("type.TypeID", name="student_ibfk_2"), nullable=False),
+        sa.Index("MajorID", "MajorID"),
+        sa.Index("TypeID", "TypeID"),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "student_embeddings",
+        sa.Column("EmbeddingID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "StudentID", sa.Integer,
+            sa.ForeignKey("student.StudentID", name="fk_student_embeddings_student", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("Embedding", mysql.LONGBLOB, nullable=False),
+        sa.Column("EmbeddingDim", sa.Integer, nullable=False),
+        sa.Column("PhotoPath", sa.String(1024)),
+        sa.Column("Quality", sa.Float),
+        sa.Column("Source", sa.String(100)),
+        sa.Column("CreatedAt", sa.TIMESTAMP, nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Index("idx_student_embeddings_student", "StudentID"),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "study",
+        sa.Column("StudyID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("StudentID", sa.Integer, sa.ForeignKey("student.StudentID", name="study_ibfk_1"), nullable=False),
+        sa.Column("ClassID", sa.Integer, sa.ForeignKey("class.ClassID", name="study_ibfk_2"), nullable=False),
+        sa.Index("StudentID", "StudentID"),
+        sa.Index("ClassID", "ClassID"),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "attendance",
+        sa.Column("AttendanceID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("StudyID", sa.Integer, sa.ForeignKey("study.StudyID", name="attendance_ibfk_1"), nullable=False),
+        sa.Column("Date", sa.Date, nullable=False),
+        sa.Column("Time", sa.Time, nullable=False),
+        sa.Column("PhotoPath", sa.String(255)),
+        sa.Index("StudyID", "StudyID"),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "teach",
+        sa.Column("id_teach", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "id_login", sa.Integer,
+            sa.ForeignKey("login.id_login", name="login", ondelete="CASCADE", onupdate="CASCADE"),
+        ),
+        sa.Column(
+            "ClassID", sa.Integer,
+            sa.ForeignKey("class.ClassID", name="class_teach", ondelete="CASCADE", onupdate="CASCADE"),
+        ),
+        sa.Index("login", "id_login"),
+        sa.Index("class_teach", "ClassID"),
+        **TABLE_OPTS,
+    )
+
+
+def downgrade():
+    for table in ("teach", "attendance", "study",
+                  "student_embeddings", "student", "class", "login", "shift", "type", "major"):
+        op.drop_table(table)
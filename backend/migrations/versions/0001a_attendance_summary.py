@@ -0,0 +1,57 @@
+"""Bảng tổng hợp điểm danh (cập nhật mỗi lần điểm danh, xem crud/attendance_crud.py)
+
+- class_session_summary: số SV có mặt theo từng buổi (ClassID, Date)
+- study_attendance_summary: số buổi có mặt / vắng của từng StudyID
+
+Bảng tạo rỗng. DB đã có dữ liệu điểm danh (import từ file dump) thì sau `upgrade head` chạy:
+    python -m backend.app.crud.attendance_crud rebuild
+
+Revision ID: 0001a_attendance_summary
+Revises: 0001_baseline
+Create Date: 2025-11-14
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001a_attendance_summary"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+TABLE_OPTS = {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4", "mysql_collate": "utf8mb4_general_ci"}
+
+
+def upgrade():
+    op.create_table(
+        "class_session_summary",
+        sa.Column(
+            "ClassID", sa.Integer,
+            sa.ForeignKey("class.ClassID", name="css_class", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("Date", sa.Date, primary_key=True),
+        sa.Column("PresentCount", sa.Integer, nullable=False, server_default="0"),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "study_attendance_summary",
+        sa.Column(
+            "StudyID", sa.Integer,
+            sa.ForeignKey("study.StudyID", name="sas_study", ondelete="CASCADE"),
+            primary_key=True, autoincrement=False,
+        ),
+        sa.Column(
+            "ClassID", sa.Integer,
+            sa.ForeignKey("class.ClassID", name="sas_class", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("PresentCount", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("AbsentCount", sa.Integer, nullable=False, server_default="0"),
+        sa.Index("ClassID", "ClassID"),
+        **TABLE_OPTS,
+    )
+
+
+def downgrade():
+    op.drop_table("study_attendance_summary")
+    op.drop_table("class_session_summary")
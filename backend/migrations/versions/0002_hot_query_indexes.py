@@ -0,0 +1,76 @@
+"""Index cho các truy vấn nóng
+
+- UNIQUE attendance(StudyID, Date): chặn trùng điểm danh (2 request đồng thời cùng SV cùng buổi),
+  JOIN lịch sử / chi tiết buổi / export (thay index cũ `StudyID` - cột đầu của index ghép vẫn phục vụ khóa ngoại).
+  Dòng điểm danh trùng (StudyID, Date) sẵn có được xóa, giữ lượt sớm nhất (AttendanceID nhỏ nhất)
+  -> sau `upgrade head` chạy lại `python -m backend.app.crud.attendance_crud rebuild` cho bảng tổng hợp.
+- attendance(Date): lọc theo ngày học
+- study(ClassID, StudentID): danh sách SV trong lớp, kiểm tra SV đã ghi danh
+  (thay index cũ `ClassID`)
+- UNIQUE student(StudentCode): tra MSSV khi thêm / import / ghi danh, chặn trùng MSSV
+- UNIQUE login(email): đăng nhập / đăng ký
+
+Dữ liệu đang trùng MSSV / email thì dừng migration và in danh sách để xử lý tay trước.
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001a_attendance_summary
+Create Date: 2025-11-20
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002_hot_query_indexes"
+down_revision = "0001a_attendance_summary"
+branch_labels = None
+depends_on = None
+
+
+def _check_unique(table, column):
+    """Dừng migration nếu cột sắp UNIQUE đang có giá trị trùng"""
+    rows = op.get_bind().execute(sa.text(
+        f"SELECT `{column}`, COUNT(*) AS n FROM `{table}` "
+        f"WHERE `{column}` IS NOT NULL GROUP BY `{column}` HAVING COUNT(*) > 1 LIMIT 20"
+    )).fetchall()
+    if rows:
+        dupes = ", ".join(f"{r[0]} (x{r[1]})" for r in rows)
+        raise RuntimeError(f"{table}.{column} đang bị trùng, xử lý trước khi tạo UNIQUE: {dupes}")
+
+
+def _dedupe_attendance():
+    """Xóa lượt điểm danh trùng (StudyID, Date), giữ lượt có AttendanceID nhỏ nhất"""
+    result = op.get_bind().execute(sa.text(
+        "DELETE a FROM attendance a JOIN attendance b "
+        "ON a.StudyID = b.StudyID AND a.Date = b.Date AND a.AttendanceID > b.AttendanceID"
+    ))
+    if not context.is_offline_mode() and result.rowcount:
+        print(f"⚠️ Đã xóa {result.rowcount} lượt điểm danh trùng (StudyID, Date)")
+
+
+def upgrade():
+    if not context.is_offline_mode():   # --sql: không có dữ liệu để kiểm tra
+        _check_unique("student", "StudentCode")
+        _check_unique("login", "email")
+    _dedupe_attendance()
+
+    op.create_index("ix_attendance_study_date", "attendance", ["StudyID", "Date"], unique=True)
+    op.create_index("ix_attendance_date", "attendance", ["Date"])
+    op.drop_index("StudyID", table_name="attendance")
+
+    op.create_index("ix_study_class_student", "study", ["ClassID", "StudentID"])
+    op.drop_index("ClassID", table_name="study")
+
+    op.create_index("uq_student_code", "student", ["StudentCode"], unique=True)
+    op.create_index("ix_login_email", "login", ["email"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_login_email", table_name="login")
+    op.drop_index("uq_student_code", table_name="student")
+
+    op.create_index("ClassID", "study", ["ClassID"])
+    op.drop_index("ix_study_class_student", table_name="study")
+
+    op.create_index("StudyID", "attendance", ["StudyID"])
+    op.drop_index("ix_attendance_date", table_name="attendance")
+    op.drop_index("ix_attendance_study_date", table_name="attendance")
+
@@ -0,0 +1,70 @@
+"""Kho khuôn mặt lạ chờ duyệt
+
+- unknown_face: mặt không khớp SV nào khi nhận diện (embedding, ảnh thu nhỏ, lớp, thời gian)
+- unknown_cluster: nhóm các mặt lạ của cùng 1 người (giáo viên duyệt -> ghi danh / bỏ qua)
+
+Revision ID: 0003_unknown_faces
+Revises: 0002_hot_query_indexes
+Create Date: 2025-12-08
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0003_unknown_faces"
+down_revision = "0002_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+TABLE_OPTS = {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4", "mysql_collate": "utf8mb4_general_ci"}
+
+
+def upgrade():
+    op.create_table(
+        "unknown_cluster",
+        sa.Column("ClusterID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "ClassID", sa.Integer,
+            sa.ForeignKey("class.ClassID", name="fk_unknown_cluster_class", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("Centroid", mysql.BLOB, nullable=False),
+        sa.Column("Size", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("Status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column(
+            "StudentID", sa.Integer,
+            sa.ForeignKey("student.StudentID", name="fk_unknown_cluster_student", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("CreatedAt", sa.TIMESTAMP, nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Column("UpdatedAt", sa.TIMESTAMP, nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Index("ix_unknown_cluster_class_status", "ClassID", "Status"),
+        **TABLE_OPTS,
+    )
+    op.create_table(
+        "unknown_face",
+        sa.Column("UnknownFaceID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "ClassID", sa.Integer,
+            sa.ForeignKey("class.ClassID", name="fk_unknown_face_class", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column(
+            "ClusterID", sa.Integer,
+            sa.ForeignKey("unknown_cluster.ClusterID", name="fk_unknown_face_cluster", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("Embedding", mysql.BLOB, nullable=False),
+        sa.Column("EmbeddingDim", sa.Integer, nullable=False),
+        sa.Column("Thumbnail", mysql.MEDIUMBLOB, nullable=True),
+        sa.Column("Similarity", sa.Float),
+        sa.Column("CreatedAt", sa.TIMESTAMP, nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Index("ix_unknown_face_cluster", "ClusterID"),
+        sa.Index("ix_unknown_face_class_created", "ClassID", "CreatedAt"),
+        **TABLE_OPTS,
+    )
+
+
+def downgrade():
+    op.drop_table("unknown_face")
+    op.drop_table("unknown_cluster")
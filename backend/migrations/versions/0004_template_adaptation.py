@@ -0,0 +1,57 @@
+"""Cập nhật mẫu khuôn mặt dần theo các lần điểm danh
+
+- student_embeddings: AnchorEmbedding (mẫu lúc đăng ký, mốc chống trôi), UpdateCount, UpdatedAt
+- template_update_log: nhật ký từng lần cập nhật / từ chối (giữ embedding cũ để khôi phục)
+
+Revision ID: 0004_template_adaptation
+Revises: 0003_unknown_faces
+Create Date: 2025-12-15
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0004_template_adaptation"
+down_revision = "0003_unknown_faces"
+branch_labels = None
+depends_on = None
+
+TABLE_OPTS = {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4", "mysql_collate": "utf8mb4_general_ci"}
+
+
+def upgrade():
+    op.add_column("student_embeddings", sa.Column("AnchorEmbedding", mysql.LONGBLOB, nullable=True))
+    op.add_column("student_embeddings", sa.Column("UpdateCount", sa.Integer, nullable=False, server_default="0"))
+    op.add_column("student_embeddings", sa.Column("UpdatedAt", sa.TIMESTAMP, nullable=True))
+
+    op.create_table(
+        "template_update_log",
+        sa.Column("LogID", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "EmbeddingID", sa.Integer,
+            sa.ForeignKey("student_embeddings.EmbeddingID", name="fk_template_log_embedding", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "StudentID", sa.Integer,
+            sa.ForeignKey("student.StudentID", name="fk_template_log_student", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("Status", sa.String(20), nullable=False),
+        sa.Column("Similarity", sa.Float),
+        sa.Column("AnchorSimilarity", sa.Float),
+        sa.Column("Alpha", sa.Float),
+        sa.Column("OldEmbedding", mysql.BLOB, nullable=False),
+        sa.Column("NewEmbedding", mysql.BLOB, nullable=True),
+        sa.Column("Source", sa.String(100)),
+        sa.Column("CreatedAt", sa.TIMESTAMP, nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Index("ix_template_update_log_embedding", "EmbeddingID", "CreatedAt"),
+        **TABLE_OPTS,
+    )
+
+
+def downgrade():
+    op.drop_table("template_update_log")
+    op.drop_column("student_embeddings", "UpdatedAt")
+    op.drop_column("student_embeddings", "UpdateCount")
+    op.drop_column("student_embeddings", "AnchorEmbedding")
@@ -0,0 +1,28 @@
+"""Ngưỡng nhận diện riêng từng SV tính sẵn (không tính lúc nạp gallery)
+
+- student_embeddings: ImpostorMean, ImpostorStd, MatchThreshold - ghi bởi
+  `python -m backend.app.ai.training.calibrate_thresholds --db --write`; NULL -> dùng ngưỡng chung MATCH_THRESHOLD
+
+Revision ID: 0005_gallery_calibration
+Revises: 0004_template_adaptation
+Create Date: 2025-12-22
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_gallery_calibration"
+down_revision = "0004_template_adaptation"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("student_embeddings", sa.Column("ImpostorMean", sa.Float, nullable=True))
+    op.add_column("student_embeddings", sa.Column("ImpostorStd", sa.Float, nullable=True))
+    op.add_column("student_embeddings", sa.Column("MatchThreshold", sa.Float, nullable=True))
+
+
+def downgrade():
+    op.drop_column("student_embeddings", "MatchThreshold")
+    op.drop_column("student_embeddings", "ImpostorStd")
+    op.drop_column("student_embeddings", "ImpostorMean")
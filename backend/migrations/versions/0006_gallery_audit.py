@@ -0,0 +1,27 @@
+"""Tập xung đột của gallery tính sẵn (không kiểm tra O(G^2) lúc nạp gallery)
+
+- student_embeddings: AuditConflict - dòng thuộc SV có embedding gần như trùng SV khác; ghi bởi
+  `python -m backend.app.ai.training.audit_gallery --write` hoặc `GET /api/v1/ai/ai/gallery-audit?refresh=true`
+
+Revision ID: 0006_gallery_audit
+Revises: 0005_gallery_calibration
+Create Date: 2025-12-22
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_gallery_audit"
+down_revision = "0005_gallery_calibration"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "student_embeddings",
+        sa.Column("AuditConflict", sa.Boolean, nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade():
+    op.drop_column("student_embeddings", "AuditConflict")
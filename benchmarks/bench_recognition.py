@@ -0,0 +1,416 @@
+# benchmarks/bench_recognition.py
+"""
+Benchmark throughput nhận diện khuôn mặt.
+
+Đo:
+  1. So khớp gallery (cosine similarity) với gallery giả lập 1k -> 200k vector
+  2. Từng bước của match_image_and_check_real trên khung hình lớp học có N khuôn mặt
+  3. Ghi điểm danh vào DB (SQLite thay thế hoặc MySQL local qua --db-url)
+  4. Toàn bộ HTTP endpoint qua client in-process (TestClient)
+
+Kết quả ghi ra file JSON có cấu trúc cố định để so sánh giữa các commit.
+
+Chạy từ thư mục gốc project:
+    python -m benchmarks.bench_recognition
+    python -m benchmarks.bench_recognition --gallery-sizes 1000,50000 --faces 1,10 --repeat 3
+    python -m benchmarks.bench_recognition --compare benchmarks/results/recognition-abc123.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.synthetic import random_gallery, load_enrollment_images, classroom_frame, encode_jpeg
+
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+
+
+# ==========================================
+# 1. HÀM ĐO THỜI GIAN
+# ==========================================
+def timed(fn, repeat=5, warmup=1):
+    """Chạy fn() `warmup` lần (bỏ qua) rồi `repeat` lần, trả về (list thời gian ms, kết quả cuối)"""
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples, result
+
+
+def summarize(samples_ms):
+    """Thống kê mean/p50/p95/min/max (ms)"""
+    if not samples_ms:
+        return {"n": 0}
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "n": int(arr.size),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "min_ms": round(float(arr.min()), 3),
+        "max_ms": round(float(arr.max()), 3),
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+# ==========================================
+# 2. BENCHMARK SO KHỚP GALLERY
+# ==========================================
+def bench_gallery_match(sizes, queries=16, repeat=5):
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    rng = np.random.default_rng(1)
+    q = rng.standard_normal((queries, 512)).astype(np.float32)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+
+    results = []
+    for size in sizes:
+        gallery = random_gallery(size)["encodings"]
+
+        # Giống code production: mỗi khuôn mặt gọi cosine_similarity 1 lần
+        def per_face():
+            for emb in q:
+                sims = cosine_similarity([emb], gallery)[0]
+                int(np.argmax(sims))
+
+        # Cả khung hình 1 lần (ma trận queries x gallery)
+        def batched():
+            sims = gallery @ q.T
+            np.argmax(sims, axis=0)
+
+        per_face_ms, _ = timed(per_face, repeat=repeat)
+        batched_ms, _ = timed(batched, repeat=repeat)
+
+        results.append({
+            "gallery_size": size,
+            "queries": queries,
+            "per_face_cosine": summarize(per_face_ms),
+            "batched_matmul": summarize(batched_ms),
+            "gallery_mb": round(gallery.nbytes / 1024 / 1024, 2),
+        })
+        print(f"  gallery={size:>7}: per_face p50={results[-1]['per_face_cosine']['p50_ms']}ms "
+              f"batched p50={results[-1]['batched_matmul']['p50_ms']}ms")
+    return results
+
+
+def bench_decode(resolutions, repeat=5):
+    """Decode ảnh upload: imdecode đủ độ phân giải vs Frame.decode (thu nhỏ trong bộ giải mã JPEG)"""
+    import cv2
+    from backend.app.ai.face.frame import Frame
+
+    sources = load_enrollment_images(limit=30)
+    results = []
+    for width, height in resolutions:
+        jpeg = encode_jpeg(classroom_frame(12, sources, width=width, height=height, seed=width))
+        full_ms, _ = timed(lambda: cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR), repeat=repeat)
+        reduced_ms, frame = timed(lambda: Frame.decode(jpeg), repeat=repeat)
+        results.append({
+            "resolution": f"{width}x{height}",
+            "jpeg_kb": round(len(jpeg) / 1024, 1),
+            "full_decode": summarize(full_ms),
+            "frame_decode": summarize(reduced_ms),
+            "detect_resolution": f"{frame.width}x{frame.height}",
+        })
+        print(f"  {width}x{height}: full p50={results[-1]['full_decode']['p50_ms']}ms "
+              f"reduced p50={results[-1]['frame_decode']['p50_ms']}ms -> {frame.width}x{frame.height}")
+    return results
+
+
+# ==========================================
+# 3. BENCHMARK PIPELINE NHẬN DIỆN (TỪNG BƯỚC)
+# ==========================================
+def load_pipeline(gallery_size):
+    """
+    Import module nhận diện với gallery giả lập thay vì đọc MySQL.
+    Thay load_all_embeddings trước khi import smart_face_attendance.
+    """
+    from backend.app.ai import student_embedding
+
+    gallery = random_gallery(gallery_size)
+    student_embedding.load_all_embeddings = lambda: gallery
+
+    from backend.app.ai import smart_face_attendance as sfa
+    sfa.get_gallery(reload=True)   # nạp gallery giả lập như khi chạy thật (chưa có ngưỡng tính sẵn -> ngưỡng chung)
+    return sfa
+
+
+def bench_pipeline(sfa, face_counts, repeat=5):
+    from sklearn.metrics.pairwise import cosine_similarity
+    from backend.app.ai.face.detector import detect_faces_rgb
+    from backend.app.ai.face.frame import Frame
+
+    sources = load_enrollment_images(limit=30)
+    gallery = sfa._known["encodings"]
+    results = []
+
+    for n in face_counts:
+        jpeg = encode_jpeg(classroom_frame(n, sources, seed=n))
+        stages = {k: [] for k in ("decode", "detect", "crop", "embed", "match", "total")}
+        detected = 0
+
+        # Cùng các bước với match_image_and_check_real: 1 buffer RGB, crop là view, embedding theo batch
+        for i in range(repeat + 1):
+            t = {}
+            t0 = time.perf_counter()
+            frame = Frame.decode(jpeg)
+            t["decode"] = time.perf_counter()
+            boxes, _ = detect_faces_rgb(frame.rgb)
+            t["detect"] = time.perf_counter()
+            boxes = [] if boxes is None else boxes
+            crops = [c for c in (frame.crop(box) for box in boxes) if c is not None]
+            t["crop"] = time.perf_counter()
+            embs = sfa.get_embedder().get_embeddings_from_rgb(crops)
+            t["embed"] = time.perf_counter()
+            if len(crops) and gallery.size > 0:
+                np.argmax(cosine_similarity(embs, gallery), axis=1)
+            t["match"] = time.perf_counter()
+
+            if i == 0:
+                continue  # lần đầu là warm-up
+            detected = len(boxes)
+            prev = t0
+            for stage in ("decode", "detect", "crop", "embed", "match"):
+                stages[stage].append((t[stage] - prev) * 1000)
+                prev = t[stage]
+
+        # Đo hàm production nguyên vẹn (bao gồm mọi overhead)
+        frame = Frame.decode(jpeg)
+        total_ms, _ = timed(lambda: sfa.match_image_and_check_real(frame), repeat=repeat)
+        stages["total"] = total_ms
+
+        entry = {
+            "faces_in_frame": n,
+            "faces_detected": detected,
+            "jpeg_kb": round(len(jpeg) / 1024, 1),
+            "stages": {k: summarize(v) for k, v in stages.items()},
+        }
+        total_p50 = entry["stages"]["total"].get("p50_ms", 0) or 0
+        entry["faces_per_second"] = round(detected / (total_p50 / 1000), 2) if total_p50 and detected else 0.0
+        results.append(entry)
+        print(f"  faces={n:>3} (detected {detected}): total p50={total_p50}ms")
+    return results
+
+
+# ==========================================
+# 4. BENCHMARK GHI DB
+# ==========================================
+def bench_db_writes(db_url, rows=200):
+    from benchmarks.fixtures import make_session_factory, seed_database
+    from backend.app.models.attendance import Attendance
+
+    engine, SessionBench = make_session_factory(db_url)
+    with SessionBench() as db:
+        info = seed_database(db, num_classes=1, students_per_class=rows, num_sessions=0)
+
+    bench_date = date(2026, 1, 5)
+    now_time = datetime.now().time()
+
+    # Giống manual_checkin: kiểm tra trùng -> insert -> commit cho từng sinh viên
+    def per_row():
+        with SessionBench() as db:
+            for study_id in range(1, info["studies"] + 1):
+                exists = db.query(Attendance).filter(
+                    Attendance.StudyID == study_id, Attendance.Date == bench_date
+                ).first()
+                if not exists:
+                    db.add(Attendance(StudyID=study_id, Date=bench_date, Time=now_time, PhotoPath=""))
+                    db.commit()
+            db.query(Attendance).filter(Attendance.Date == bench_date).delete()
+            db.commit()
+
+    # Ghi cả lớp trong 1 transaction
+    def one_transaction():
+        with SessionBench() as db:
+            db.bulk_insert_mappings(Attendance, [
+                {"StudyID": s, "Date": bench_date, "Time": now_time, "PhotoPath": ""}
+                for s in range(1, info["studies"] + 1)
+            ])
+            db.commit()
+            db.query(Attendance).filter(Attendance.Date == bench_date).delete()
+            db.commit()
+
+    per_row_ms, _ = timed(per_row, repeat=3)
+    tx_ms, _ = timed(one_transaction, repeat=3)
+    engine.dispose()
+
+    result = {
+        "backend": engine.dialect.name,
+        "rows": info["studies"],
+        "per_row_commit": summarize(per_row_ms),
+        "single_transaction": summarize(tx_ms),
+    }
+    print(f"  {result['backend']}: per_row p50={result['per_row_commit']['p50_ms']}ms "
+          f"single_tx p50={result['single_transaction']['p50_ms']}ms ({rows} rows)")
+    return result
+
+
+# ==========================================
+# 5. BENCHMARK HTTP ENDPOINT (IN-PROCESS)
+# ==========================================
+def bench_http(db_url, face_counts, repeat=5):
+    from fastapi.testclient import TestClient
+    from benchmarks.fixtures import make_session_factory, seed_database, override_get_db, override_get_async_db
+    from backend.app.database import get_db, get_async_db
+    from backend.app.main import app
+
+    engine, SessionBench = make_session_factory(db_url)
+    with SessionBench() as db:
+        info = seed_database(db, num_classes=1, students_per_class=60, num_sessions=12)
+    app.dependency_overrides[get_db] = override_get_db(SessionBench)
+    app.dependency_overrides[get_async_db] = override_get_async_db(db_url)
+
+    sources = load_enrollment_images(limit=30)
+    results = {"recognize": [], "session_detail": None}
+
+    try:
+        with TestClient(app) as client:
+            for n in face_counts:
+                jpeg = encode_jpeg(classroom_frame(n, sources, seed=n))
+
+                def call():
+                    resp = client.post(
+                        "/api/v1/ai/ai/recognize",
+                        files={"file": ("frame.jpg", jpeg, "image/jpeg")},
+                    )
+                    return resp.status_code
+
+                samples, status = timed(call, repeat=repeat)
+                results["recognize"].append({"faces_in_frame": n, "status": status, **summarize(samples)})
+                print(f"  POST /ai/ai/recognize faces={n:>3}: p50={results['recognize'][-1]['p50_ms']}ms")
+
+            class_id = info["class_ids"][0]
+            session_date = info["session_dates"][0]
+            samples, status = timed(
+                lambda: client.get(f"/api/v1/attendance/session-detail/{class_id}/{session_date}").status_code,
+                repeat=repeat * 4,
+            )
+            results["session_detail"] = {"status": status, **summarize(samples)}
+            print(f"  GET /attendance/session-detail: p50={results['session_detail']['p50_ms']}ms")
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_async_db, None)
+        engine.dispose()
+
+    return results
+
+
+# ==========================================
+# 6. SO SÁNH 2 BÁO CÁO
+# ==========================================
+def _flatten(prefix, obj, out):
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            _flatten(f"{prefix}.{k}" if prefix else k, v, out)
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            key = v.get("gallery_size", v.get("faces_in_frame", i)) if isinstance(v, dict) else i
+            _flatten(f"{prefix}[{key}]", v, out)
+    elif isinstance(obj, (int, float)) and prefix.endswith("p50_ms"):
+        out[prefix] = obj
+
+
+def compare_reports(old, new):
+    """In chênh lệch p50 giữa 2 báo cáo (âm = nhanh hơn)"""
+    a, b = {}, {}
+    _flatten("", old.get("results", {}), a)
+    _flatten("", new.get("results", {}), b)
+
+    print(f"\n📊 So sánh {old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    for key in sorted(set(a) & set(b)):
+        if a[key] <= 0:
+            continue
+        delta = (b[key] - a[key]) / a[key] * 100
+        flag = "🔴" if delta > 10 else ("🟢" if delta < -10 else "  ")
+        print(f"{flag} {key:<70} {a[key]:>10.2f} -> {b[key]:>10.2f} ms ({delta:+.1f}%)")
+
+
+# ==========================================
+# MAIN
+# ==========================================
+def parse_int_list(s):
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark nhận diện khuôn mặt")
+    parser.add_argument("--gallery-sizes", default="1000,10000,50000,200000")
+    parser.add_argument("--faces", default="1,5,10,30", help="Số khuôn mặt trong khung hình")
+    parser.add_argument("--pipeline-gallery", type=int, default=10000, help="Kích thước gallery khi đo pipeline")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DB_URL", "sqlite:///./bench.sqlite3"))
+    parser.add_argument("--skip-model", action="store_true", help="Bỏ qua các phần cần load model (pipeline, HTTP)")
+    parser.add_argument("--liveness", action="store_true",
+                        help="Bật liveness (như LIVENESS_CHECK=1) khi đo pipeline - so với lần chạy không bật")
+    parser.add_argument("--out", default=None, help="File JSON kết quả")
+    parser.add_argument("--compare", default=None, help="So sánh với báo cáo JSON cũ")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": {},
+    }
+
+    print("🔹 [1] So khớp gallery")
+    report["results"]["gallery_match"] = bench_gallery_match(parse_int_list(args.gallery_sizes), repeat=args.repeat)
+
+    print("🔹 [1b] Decode ảnh upload")
+    report["results"]["decode"] = bench_decode([(1280, 720), (1920, 1080), (4032, 3024)], repeat=args.repeat)
+
+    print("🔹 [2] Ghi DB")
+    report["results"]["db_writes"] = bench_db_writes(args.db_url)
+
+    if not args.skip_model:
+        print("🔹 [3] Pipeline nhận diện")
+        sfa = load_pipeline(args.pipeline_gallery)
+        sfa.LIVENESS_CHECK = sfa.LIVENESS_CHECK or args.liveness
+        report["results"]["pipeline"] = bench_pipeline(sfa, parse_int_list(args.faces), repeat=args.repeat)
+
+        print("🔹 [4] HTTP endpoint")
+        report["results"]["http"] = bench_http(args.db_url, parse_int_list(args.faces), repeat=args.repeat)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"recognition-{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n💾 Đã lưu báo cáo: {out}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        compare_reports(old, report)
+
+
+if __name__ == "__main__":
+    main()
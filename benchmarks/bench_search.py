@@ -0,0 +1,143 @@
+# benchmarks/bench_search.py
+"""
+Benchmark index tìm kiếm sinh viên (backend/app/services/search_index.py).
+
+Sinh N sinh viên tên tiếng Việt ngẫu nhiên, build index, đo độ trễ search cho các loại truy vấn:
+  - tiền tố họ / tên (có dấu, không dấu)
+  - họ tên đầy đủ
+  - MSSV đầy đủ / tiền tố / chuỗi con
+So sánh với cách cũ: quét tuần tự `q in name or q in code` (tương đương ILIKE '%q%').
+
+Chạy từ thư mục gốc project:
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --students 100000 --queries 2000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.bench_recognition import summarize, git_commit, RESULTS_DIR
+from backend.app.services.search_index import StudentSearchIndex
+from backend.app.services.vn_text import normalize_search_text
+
+HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ",
+      "Hồ", "Ngô", "Dương", "Lý", "Đinh", "Trương", "Lâm", "Mai"]
+DEM = ["Văn", "Thị", "Hữu", "Minh", "Thanh", "Ngọc", "Quốc", "Gia", "Đức", "Thu", "Hoài", "Kim", ""]
+TEN = ["An", "Bình", "Châu", "Dũng", "Duy", "Đạt", "Giang", "Hà", "Hải", "Hạnh", "Hiếu", "Hoa", "Hùng",
+       "Huy", "Khang", "Khánh", "Linh", "Long", "Mai", "Minh", "Nam", "Ngân", "Nhi", "Phúc", "Phương",
+       "Quân", "Quang", "Sơn", "Tâm", "Thảo", "Thắng", "Trang", "Trí", "Trung", "Tú", "Tuấn", "Vy", "Yến"]
+
+
+def synthetic_students(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(1, n + 1):
+        name = " ".join(p for p in (rng.choice(HO), rng.choice(DEM), rng.choice(TEN)) if p)
+        rows.append((i, name, f"{2300000000 + i}"))
+    return rows
+
+
+def make_queries(rows, n, seed=1):
+    rng = random.Random(seed)
+    kinds = []
+    for _ in range(n):
+        _, name, code = rng.choice(rows)
+        parts = name.split()
+        kind = rng.choice(["ten_prefix", "ho_ten", "khong_dau", "mssv", "mssv_prefix", "mssv_sub"])
+        if kind == "ten_prefix":
+            q = parts[-1][:rng.randint(1, len(parts[-1]))]
+        elif kind == "ho_ten":
+            q = name
+        elif kind == "khong_dau":
+            q = normalize_search_text(f"{parts[0]} {parts[-1]}")
+        elif kind == "mssv":
+            q = code
+        elif kind == "mssv_prefix":
+            q = code[:6]
+        else:
+            q = code[4:9]
+        kinds.append((kind, q))
+    return kinds
+
+
+def linear_scan(rows, q, limit):
+    """Cách cũ: ILIKE '%q%' trên FullName / StudentCode (ở đây bỏ dấu để cùng điều kiện)"""
+    q = normalize_search_text(q)
+    out = []
+    for sid, name, code in rows:
+        if q in normalize_search_text(name) or q in code:
+            out.append(sid)
+            if len(out) >= limit:
+                break
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark index tìm kiếm sinh viên")
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--scan-queries", type=int, default=20, help="Số truy vấn đo cho quét tuần tự (chậm)")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    rows = synthetic_students(args.students)
+
+    index = StudentSearchIndex()
+    t0 = time.perf_counter()
+    index.build(rows)
+    build_ms = (time.perf_counter() - t0) * 1000
+    print(f"Build index {len(index)} SV: {build_ms:.0f} ms")
+
+    t0 = time.perf_counter()
+    index.upsert(args.students + 1, "Nguyễn Thị Thu Hà", "2399999999")
+    upsert_ms = (time.perf_counter() - t0) * 1000
+
+    queries = make_queries(rows, args.queries)
+    per_kind = {}
+    all_samples = []
+    for kind, q in queries:
+        t0 = time.perf_counter()
+        index.search(q, args.limit)
+        ms = (time.perf_counter() - t0) * 1000
+        per_kind.setdefault(kind, []).append(ms)
+        all_samples.append(ms)
+
+    scan_samples = []
+    for _, q in queries[:args.scan_queries]:
+        t0 = time.perf_counter()
+        linear_scan(rows, q, args.limit)
+        scan_samples.append((time.perf_counter() - t0) * 1000)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "students": args.students,
+        "limit": args.limit,
+        "build_ms": round(build_ms, 1),
+        "upsert_ms": round(upsert_ms, 3),
+        "index": {"all": summarize(all_samples), **{k: summarize(v) for k, v in per_kind.items()}},
+        "linear_scan": summarize(scan_samples),
+    }
+
+    for k, v in report["index"].items():
+        print(f"  {k:<12} p50={v['p50_ms']:.3f} ms  p95={v['p95_ms']:.3f} ms")
+    print(f"  {'quét cũ':<12} p50={report['linear_scan']['p50_ms']:.3f} ms")
+
+    out = Path(args.output) if args.output else RESULTS_DIR / f"search-{report['commit']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Đã ghi {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# benchmarks/bench_threads.py
+"""
+Tìm cách chia CPU tốt nhất giữa số worker (process) và số luồng torch / worker.
+
+Mỗi cấu hình (W worker x T luồng) chạy W process song song, mỗi process gọi
+configure_inference_runtime(workers=W, threads=T) rồi chạy workload liên tục `--duration` giây.
+Đo tổng throughput (mặt/giây hoặc khung hình/giây) và p95 độ trễ 1 lượt.
+
+Workload:
+  embed     FaceNet trên 1 ảnh mặt 160x160 (phần nặng nhất khi điểm danh)
+  pipeline  match_image_and_check_real trên khung hình lớp học có --faces khuôn mặt (gallery giả lập)
+
+Chạy từ thư mục gốc project:
+    python -m benchmarks.bench_threads
+    python -m benchmarks.bench_threads --workload pipeline --workers 1,2,4 --threads 1,2,4 --pin
+Kết quả đưa vào biến môi trường: WEB_CONCURRENCY=W INFERENCE_THREADS=T (xem backend/app/ai/inference_runtime.py)
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.bench_recognition import summarize, git_commit, parse_int_list, RESULTS_DIR
+
+
+# ==========================================
+# 1. WORKLOAD (chạy trong process con)
+# ==========================================
+def _make_workload(name, faces):
+    """Trả về (fn, số mặt / lượt); import model bên trong sau khi đã cấu hình luồng"""
+    if name == "embed":
+        import torch
+        from backend.app.ai.face.arcface_embedder import ArcfaceEmbedder
+
+        model = ArcfaceEmbedder(device="cpu").model
+        x = torch.randn(1, 3, 160, 160)
+
+        def embed():
+            with torch.no_grad():
+                model(x)
+        return embed, 1
+
+    from benchmarks.bench_recognition import load_pipeline
+    from benchmarks.synthetic import load_enrollment_images, classroom_frame
+
+    sfa = load_pipeline(1000)
+    frame = classroom_frame(faces, load_enrollment_images(limit=30), seed=faces)
+    return (lambda: sfa.match_image_and_check_real(frame)), faces
+
+
+def _worker(workload, faces, workers, threads, pin, duration, barrier, results):
+    from backend.app.ai.inference_runtime import configure_inference_runtime, apply_inference_threads
+
+    configure_inference_runtime(workers=workers, threads=threads, pin=pin)
+    settings = apply_inference_threads()
+    fn, items_per_call = _make_workload(workload, faces)
+    for _ in range(3):  # warm-up
+        fn()
+
+    barrier.wait()
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    results.put({"calls": len(latencies), "items": len(latencies) * items_per_call,
+                 "latencies": latencies, "settings": settings})
+
+
+# ==========================================
+# 2. CHẠY 1 CẤU HÌNH (W process x T luồng)
+# ==========================================
+def run_config(workload, faces, workers, threads, pin, duration):
+    ctx = mp.get_context("spawn")  # process sạch: torch chưa khởi tạo pool luồng
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(workload, faces, workers, threads, pin, duration, barrier, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    outs = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    latencies = [ms for o in outs for ms in o["latencies"]]
+    items = sum(o["items"] for o in outs)
+    return {
+        "workers": workers,
+        "threads_per_worker": threads,
+        "total_threads": workers * threads,
+        "pinned": [o["settings"].get("pinned_cores") for o in outs] if pin else None,
+        "throughput_per_s": round(items / duration, 2),
+        "latency": summarize(latencies),
+    }
+
+
+def main(argv=None):
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    parser = argparse.ArgumentParser(description="Benchmark chia worker / luồng torch cho inference")
+    parser.add_argument("--workload", choices=["embed", "pipeline"], default="embed")
+    parser.add_argument("--faces", type=int, default=5, help="Số khuôn mặt / khung hình (workload pipeline)")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--threads", default="1,2,4,8")
+    parser.add_argument("--duration", type=float, default=10.0, help="Số giây đo mỗi cấu hình")
+    parser.add_argument("--pin", action="store_true", help="Ghim mỗi worker vào dải core riêng (Linux)")
+    parser.add_argument("--oversubscribe", action="store_true",
+                        help="Đo cả cấu hình worker x luồng > số core (để thấy mức tụt khi tranh CPU)")
+    parser.add_argument("--out", default=None, help="File JSON kết quả")
+    args = parser.parse_args(argv)
+
+    configs = [
+        (w, t) for w in parse_int_list(args.workers) for t in parse_int_list(args.threads)
+        if args.oversubscribe or w * t <= cores
+    ]
+    print(f"🔹 {cores} core, workload={args.workload}, {len(configs)} cấu hình x {args.duration}s")
+
+    results = []
+    for w, t in configs:
+        entry = run_config(args.workload, args.faces, w, t, args.pin, args.duration)
+        results.append(entry)
+        print(f"  {w:>2} worker x {t:>2} luồng: {entry['throughput_per_s']:>8}/s  "
+              f"p95={entry['latency'].get('p95_ms')}ms")
+
+    best = max(results, key=lambda r: r["throughput_per_s"])
+    print(f"\n🏆 Tốt nhất: {best['workers']} worker x {best['threads_per_worker']} luồng "
+          f"({best['throughput_per_s']}/s, p95={best['latency'].get('p95_ms')}ms)")
+    print(f"👉 WEB_CONCURRENCY={best['workers']} INFERENCE_THREADS={best['threads_per_worker']}"
+          + (" INFERENCE_PIN_CORES=1" if args.pin else ""))
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cores": cores,
+            "args": vars(args),
+        },
+        "results": results,
+        "best": best,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"threads-{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n💾 Đã lưu báo cáo: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/check_query_plans.py
+"""
+Kiểm tra kế hoạch thực thi (EXPLAIN) của các truy vấn nóng trên MySQL / MariaDB:
+mỗi bảng lớn (attendance, study, student, login, ...) phải đi qua index, không quét toàn bảng.
+
+Dùng 1 database riêng (các bảng phải trống nếu --seed), schema tạo bằng migration:
+    DB_NAME=python_project_check alembic -c backend/alembic.ini upgrade head
+    DB_NAME=python_project_check python -m benchmarks.check_query_plans --seed
+
+Thoát với mã 1 nếu có truy vấn quét toàn bảng (dùng được trong CI).
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy import and_, text
+
+from backend.app.database import SessionLocal
+from benchmarks.fixtures import seed_database
+from backend.app.models.student import Student
+from backend.app.models.study import Study
+from backend.app.models.attendance import Attendance
+from backend.app.models.login import Login
+from backend.app.models.attendance_summary import StudyAttendanceSummary
+from backend.app.services.history_service import build_history_query
+from backend.app.services.export_service import build_export_query
+
+# Bảng tăng theo số SV / buổi học -> bắt buộc dùng index. Bảng danh mục (major, type, shift) bỏ qua.
+BIG_TABLES = {"attendance", "study", "student", "login", "student_embeddings",
+              "class_session_summary", "study_attendance_summary", "teach"}
+
+
+def hot_queries(db, class_id, student_id, study_id, student_code, email, session_date):
+    """(tên, query) - cùng điều kiện lọc với CRUD / API thật"""
+    return [
+        ("checkin_duplicate", db.query(Attendance.AttendanceID).filter(
+            Attendance.StudyID == study_id, Attendance.Date == session_date)),
+        ("study_lookup", db.query(Study.StudyID).filter(
+            Study.StudentID == student_id, Study.ClassID == class_id)),
+        ("student_by_code", db.query(Student.StudentID).filter(Student.StudentCode == student_code)),
+        ("login_by_email", db.query(Login.id_login).filter(Login.email == email)),
+        ("session_detail", db.query(Study.StudentID)
+            .join(Attendance, Attendance.StudyID == Study.StudyID)
+            .filter(Study.ClassID == class_id, Attendance.Date == session_date)),
+        ("class_roster_with_status", db.query(Student.StudentID, Attendance.AttendanceID)
+            .select_from(Study)
+            .join(Student, Student.StudentID == Study.StudentID)
+            .outerjoin(Attendance, and_(Attendance.StudyID == Study.StudyID, Attendance.Date == session_date))
+            .filter(Study.ClassID == class_id)),
+        ("study_summary", db.query(StudyAttendanceSummary).filter(StudyAttendanceSummary.ClassID == class_id)),
+        ("history_student", build_history_query(db, class_id, student_id)),
+        ("history_class", build_history_query(db, class_id)),
+        ("export", build_export_query(db, class_id)),
+    ]
+
+
+def explain(db, query):
+    """Chạy EXPLAIN cho 1 query ORM, trả về list dict (table, type, key, rows)"""
+    compiled = query.statement.compile(dialect=db.bind.dialect)
+    result = db.connection().exec_driver_sql(f"EXPLAIN {compiled}", compiled.params)
+    columns = list(result.keys())
+    return [dict(zip(columns, row)) for row in result.fetchall()]
+
+
+def full_scans(plan):
+    """Các dòng EXPLAIN quét toàn bảng lớn (type=ALL hoặc không dùng key)"""
+    return [
+        row for row in plan
+        if row.get("table") in BIG_TABLES and (row.get("type") == "ALL" or not row.get("key"))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN các truy vấn nóng, báo lỗi nếu quét toàn bảng")
+    parser.add_argument("--seed", action="store_true", help="Sinh dữ liệu mẫu trước (DB phải trống)")
+    parser.add_argument("--classes", type=int, default=20)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--sessions", type=int, default=12)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if db.bind.dialect.name != "mysql":
+            print("❌ Chỉ hỗ trợ MySQL / MariaDB (EXPLAIN của SQLite khác định dạng)")
+            return 2
+
+        if args.seed:
+            fixture = seed_database(db, num_classes=args.classes, students_per_class=args.students,
+                                    num_sessions=args.sessions)
+            db.commit()
+            session_date = date.fromisoformat(fixture["session_dates"][0])
+        else:
+            session_date = db.query(Attendance.Date).order_by(Attendance.Date).limit(1).scalar() or date.today()
+
+        # Thống kê mới để optimizer chọn kế hoạch như trên dữ liệu thật
+        for table in sorted(BIG_TABLES):
+            db.execute(text(f"ANALYZE TABLE `{table}`")).fetchall()
+
+        study = db.query(Study).order_by(Study.StudyID.desc()).first()
+        if study is None:
+            print("❌ DB chưa có dữ liệu - chạy lại với --seed")
+            return 2
+        student = db.get(Student, study.StudentID)
+        email = db.query(Login.email).limit(1).scalar() or "bench@vaa.edu.vn"
+
+        failed = 0
+        for name, query in hot_queries(db, study.ClassID, study.StudentID, study.StudyID,
+                                       student.StudentCode, email, session_date):
+            plan = explain(db, query)
+            bad = full_scans(plan)
+            used = ", ".join(f"{r['table']}:{r.get('key') or '-'}" for r in plan if r.get("table"))
+            print(f"{'❌' if bad else '✅'} {name:<26} {used}")
+            for row in bad:
+                print(f"     quét toàn bảng `{row['table']}` (type={row.get('type')}, rows={row.get('rows')})")
+            failed += bool(bad)
+
+        print(f"\n{failed} truy vấn quét toàn bảng" if failed else "\nMọi truy vấn nóng đều dùng index")
+        return 1 if failed else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
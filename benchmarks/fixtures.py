@@ -0,0 +1,176 @@
+# benchmarks/fixtures.py
+# Database giả lập cho benchmark / load test (SQLite mặc định, hoặc MySQL local qua --db-url)
+
+import importlib
+import random
+import zlib
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from backend.app.database import Base
+# Import đủ model để Base.metadata có toàn bộ bảng
+from backend.app.models.major import Major
+from backend.app.models.type import Type
+from backend.app.models.shift import Shift
+from backend.app.models.class_model import Class
+from backend.app.models.student import Student
+from backend.app.models.study import Study
+from backend.app.models.attendance import Attendance
+from backend.app.models.login import Login
+from backend.app.models.teach import Teach
+from backend.app.crud.attendance_crud import rebuild_summaries
+
+# Model seed không dùng trực tiếp nhưng phải có trong Base.metadata (create_all) - chỉ import module
+for _module in ("student_embeddings", "attendance_summary"):
+    importlib.import_module(f"backend.app.models.{_module}")
+
+DEFAULT_DB_URL = "sqlite:///./bench.sqlite3"
+
+
+def _sqlite_date_format(value, fmt):
+    """DATE_FORMAT(date, '%Y-%m') của MySQL cho SQLite (chỉ hỗ trợ %Y %m %d)"""
+    if value is None:
+        return None
+    try:
+        d = datetime.strptime(str(value)[:10], "%Y-%m-%d")
+        return d.strftime(fmt)
+    except ValueError:
+        return None
+
+
+def _sqlite_crc32(value):
+    """CRC32(str) của MySQL cho SQLite"""
+    return None if value is None else zlib.crc32(str(value).encode("utf-8"))
+
+
+def make_session_factory(db_url=DEFAULT_DB_URL, reset=True):
+    """Tạo engine + sessionmaker cho DB benchmark. reset=True sẽ xóa và tạo lại toàn bộ bảng."""
+    connect_args = {"check_same_thread": False} if db_url.startswith("sqlite") else {}
+    engine = create_engine(db_url, connect_args=connect_args, pool_pre_ping=True)
+
+    if db_url.startswith("sqlite"):
+        # WAL giúp đọc/ghi đồng thời khi chạy load test nhiều luồng
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragma(dbapi_conn, _):
+            cur = dbapi_conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.close()
+            # Giả lập hàm MySQL DATE_FORMAT mà /class/dashboard/stats dùng
+            dbapi_conn.create_function("date_format", 2, _sqlite_date_format)
+            # CRC32 cho version roster (overview_service.get_class_version)
+            dbapi_conn.create_function("crc32", 1, _sqlite_crc32)
+
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db(session_factory):
+    """Dependency thay thế get_db để app FastAPI dùng DB benchmark"""
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    return _get_db
+
+
+def async_db_url(db_url):
+    """URL benchmark (driver sync) -> URL driver async tương ứng"""
+    if db_url.startswith("sqlite"):
+        return db_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return db_url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+
+
+def override_get_async_db(db_url):
+    """
+    Dependency thay thế get_async_db (endpoint async) trỏ vào cùng DB benchmark.
+    NullPool: không giữ kết nối giữa các event loop (TestClient chạy loop riêng).
+    """
+    engine = create_async_engine(async_db_url(db_url), poolclass=NullPool)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def _get_async_db():
+        async with factory() as db:
+            yield db
+    return _get_async_db
+
+
+def seed_database(db, num_classes=5, students_per_class=60, num_sessions=12,
+                  presence_rate=0.8, seed=0, start=date(2025, 9, 8)):
+    """
+    Sinh dữ liệu mẫu: lớp học, sinh viên, bảng study và điểm danh theo tuần.
+    Trả về dict tóm tắt (class_ids, session_dates, số dòng mỗi bảng).
+    """
+    rng = random.Random(seed)
+
+    db.add_all([
+        Major(MajorID=1, MajorName="ĐHTT", Full_name_mj="Ngành Công nghệ thông tin"),
+        Type(TypeID=1, TypeName="Đại học - Chính quy"),
+        Shift(ShiftID=1, ShiftName="Ca 1", TimeStart=time(7, 0), TimeEnd=time(10, 30)),
+        Login(id_login=1, email="bench@vaa.edu.vn", name="Benchmark"),
+    ])
+    db.flush()
+
+    session_dates = [start + timedelta(weeks=i) for i in range(num_sessions)]
+    class_ids = []
+    student_id = 0
+    study_id = 0
+    attendance_rows = []
+
+    for c in range(1, num_classes + 1):
+        db.add(Class(
+            ClassID=c, Quantity=students_per_class, Semester="Học kỳ 1",
+            DateStart=start, DateEnd=session_dates[-1] if session_dates else start,
+            ClassName=f"BENCH{c:03d}", FullClassName=f"Lớp benchmark {c}",
+            CourseCode=c, Teacher_class="Benchmark", Session="Thứ 2",
+            TypeID=1, MajorID=1, ShiftID=1,
+        ))
+        db.add(Teach(id_login=1, ClassID=c))
+        db.flush()
+        class_ids.append(c)
+
+        students = []
+        studies = []
+        for _ in range(students_per_class):
+            student_id += 1
+            study_id += 1
+            students.append({
+                "StudentID": student_id, "FullName": f"Sinh viên {student_id}",
+                "StudentCode": f"{2300000000 + student_id}", "MajorID": 1, "TypeID": 1,
+                "PhotoStatus": "DONE",
+            })
+            studies.append({"StudyID": study_id, "StudentID": student_id, "ClassID": c})
+
+            for d in session_dates:
+                if rng.random() < presence_rate:
+                    attendance_rows.append({
+                        "StudyID": study_id, "Date": d,
+                        "Time": time(7, rng.randrange(0, 45), rng.randrange(0, 60)),
+                        "PhotoPath": "bench",
+                    })
+
+        db.bulk_insert_mappings(Student, students)
+        db.bulk_insert_mappings(Study, studies)
+
+    db.bulk_insert_mappings(Attendance, attendance_rows)
+    db.commit()
+    # Dữ liệu seed ghi thẳng vào attendance -> tính lại bảng tổng hợp
+    rebuild_summaries(db)
+
+    return {
+        "class_ids": class_ids,
+        "session_dates": [d.isoformat() for d in session_dates],
+        "students": student_id,
+        "studies": study_id,
+        "attendance": len(attendance_rows),
+        "seeded_at": datetime.now().isoformat(timespec="seconds"),
+    }
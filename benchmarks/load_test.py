@@ -0,0 +1,333 @@
+# benchmarks/load_test.py
+"""
+Load test bất đồng bộ (httpx) cho các endpoint điểm danh.
+
+Endpoint được tải:
+  recognize       POST /api/v1/attendance/recognize
+  session_detail  GET  /api/v1/attendance/session-detail/{class_id}/{date}
+  export          GET  /api/v1/attendance/export/{class_id}
+  stats           GET  /api/v1/class/dashboard/stats
+  overview        GET  /api/v1/class/overview/{class_id}?session_date={date}
+
+Hai chế độ:
+  --asgi                gọi thẳng app qua httpx.ASGITransport, DB là SQLite được seed sẵn
+  --base-url URL        gọi uvicorn đang chạy (seed vào --db-url nếu truyền --seed-db -
+                        server đó phải trỏ vào cùng DB)
+  --spawn-uvicorn       tự khởi động uvicorn local với --workers N rồi tải vào đó;
+                        với --seed-db, uvicorn con nhận DATABASE_URL=--db-url (phải là MySQL)
+
+Ví dụ:
+    python -m benchmarks.load_test --asgi --concurrency 1,8,32 --duration 20
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --mix session_detail=4,stats=2,export=1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.synthetic import load_enrollment_images, classroom_frame, encode_jpeg
+
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+API_PREFIX = "/api/v1"
+
+DEFAULT_MIX = "recognize=1,session_detail=4,export=1,stats=2"
+
+
+# ==========================================
+# 1. ĐỊNH NGHĨA REQUEST
+# ==========================================
+def build_request_factories(fixture, jpeg_bytes):
+    """Mỗi endpoint -> hàm tạo (method, url, kwargs) với tham số ngẫu nhiên từ dữ liệu seed"""
+    class_ids = fixture["class_ids"]
+    dates = fixture["session_dates"]
+
+    def recognize(rng):
+        return "POST", f"{API_PREFIX}/attendance/recognize", {
+            "files": {"file": ("frame.jpg", jpeg_bytes, "image/jpeg")},
+            "data": {"class_id": str(rng.choice(class_ids))},
+        }
+
+    def session_detail(rng):
+        return "GET", f"{API_PREFIX}/attendance/session-detail/{rng.choice(class_ids)}/{rng.choice(dates)}", {}
+
+    def export(rng):
+        return "GET", f"{API_PREFIX}/attendance/export/{rng.choice(class_ids)}", {}
+
+    def stats(rng):
+        return "GET", f"{API_PREFIX}/class/dashboard/stats", {}
+
+    def overview(rng):
+        return "GET", f"{API_PREFIX}/class/overview/{rng.choice(class_ids)}", {
+            "params": {"session_date": rng.choice(dates)},
+        }
+
+    return {
+        "recognize": recognize,
+        "session_detail": session_detail,
+        "export": export,
+        "stats": stats,
+        "overview": overview,
+    }
+
+
+def parse_mix(mix):
+    """'a=1,b=4' -> {'a': 1.0, 'b': 4.0}"""
+    weights = {}
+    for part in mix.split(","):
+        if not part.strip():
+            continue
+        name, _, w = part.partition("=")
+        weights[name.strip()] = float(w or 1)
+    return weights
+
+
+# ==========================================
+# 2. VÒNG LẶP TẢI
+# ==========================================
+async def run_level(client, factories, weights, concurrency, duration, timeout, seed=0):
+    """Chạy `concurrency` worker song song trong `duration` giây, trả về thống kê"""
+    names = [n for n in weights if n in factories]
+    probs = np.array([weights[n] for n in names], dtype=np.float64)
+    probs /= probs.sum()
+    cum = np.cumsum(probs)
+
+    samples = {n: [] for n in names}
+    errors = {n: 0 for n in names}
+    statuses = {n: {} for n in names}
+    deadline = time.perf_counter() + duration
+
+    async def worker(wid):
+        rng = random.Random(seed * 1000 + wid)
+        while time.perf_counter() < deadline:
+            name = names[min(int(np.searchsorted(cum, rng.random())), len(names) - 1)]
+            method, url, kwargs = factories[name](rng)
+            t0 = time.perf_counter()
+            try:
+                resp = await client.request(method, url, timeout=timeout, **kwargs)
+                await resp.aread()
+                code = resp.status_code
+            except Exception:
+                code = 0
+            samples[name].append((time.perf_counter() - t0) * 1000)
+            statuses[name][code] = statuses[name].get(code, 0) + 1
+            if code == 0 or code >= 500:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    def stats_of(lat, err, count_by_status):
+        n = len(lat)
+        if n == 0:
+            return {"requests": 0}
+        arr = np.asarray(lat)
+        return {
+            "requests": n,
+            "throughput_rps": round(n / elapsed, 2),
+            "error_rate": round(err / n, 4),
+            "p50_ms": round(float(np.percentile(arr, 50)), 2),
+            "p95_ms": round(float(np.percentile(arr, 95)), 2),
+            "p99_ms": round(float(np.percentile(arr, 99)), 2),
+            "max_ms": round(float(arr.max()), 2),
+            "status_codes": {str(k): v for k, v in sorted(count_by_status.items())},
+        }
+
+    all_lat = [x for n in names for x in samples[n]]
+    all_status = {}
+    for n in names:
+        for k, v in statuses[n].items():
+            all_status[k] = all_status.get(k, 0) + v
+
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "overall": stats_of(all_lat, sum(errors.values()), all_status),
+        "endpoints": {n: stats_of(samples[n], errors[n], statuses[n]) for n in names},
+    }
+
+
+def print_level(result):
+    o = result["overall"]
+    print(f"\n⚡ concurrency={result['concurrency']:>4}  rps={o.get('throughput_rps', 0):>8}  "
+          f"p50={o.get('p50_ms')}ms p95={o.get('p95_ms')}ms p99={o.get('p99_ms')}ms  "
+          f"err={o.get('error_rate', 0):.2%}")
+    for name, s in result["endpoints"].items():
+        if s.get("requests"):
+            print(f"   - {name:<15} n={s['requests']:>6} rps={s['throughput_rps']:>8} "
+                  f"p50={s['p50_ms']:>8}ms p95={s['p95_ms']:>8}ms p99={s['p99_ms']:>8}ms "
+                  f"err={s['error_rate']:.2%} {s['status_codes']}")
+
+
+# ==========================================
+# 3. CHUẨN BỊ MÔI TRƯỜNG
+# ==========================================
+def seed_fixture(db_url, args):
+    from benchmarks.fixtures import make_session_factory, seed_database
+
+    engine, SessionBench = make_session_factory(db_url)
+    with SessionBench() as db:
+        info = seed_database(
+            db,
+            num_classes=args.classes,
+            students_per_class=args.students,
+            num_sessions=args.sessions,
+            seed=args.seed,
+        )
+    print(f"🌱 Seed DB {engine.dialect.name}: {info['students']} SV, {info['attendance']} lượt điểm danh")
+    return engine, SessionBench, info
+
+
+def spawn_uvicorn(port, workers, db_url=None):
+    """db_url: DB vừa seed -> truyền cho uvicorn con qua DATABASE_URL (database.py ưu tiên biến này)"""
+    env = dict(os.environ)
+    if db_url:
+        env["DATABASE_URL"] = db_url
+    cmd = [
+        sys.executable, "-m", "uvicorn", "backend.app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    proc = subprocess.Popen(cmd, cwd=ROOT_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+
+    # Chờ /health trả về ok
+    for _ in range(120):
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return proc, base_url
+        except Exception:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("uvicorn không khởi động được")
+
+
+async def main_async(args):
+    weights = parse_mix(args.mix)
+    sources = load_enrollment_images(limit=10)
+    jpeg = encode_jpeg(classroom_frame(args.faces, sources, seed=args.seed))
+    limits = httpx.Limits(max_connections=max(args.levels) * 2, max_keepalive_connections=max(args.levels))
+
+    proc = None
+    engine = None
+    app = None
+    try:
+        if args.asgi:
+            from benchmarks.fixtures import override_get_db, override_get_async_db
+            from backend.app.database import get_db, get_async_db
+            from backend.app.main import app
+
+            engine, SessionBench, fixture = seed_fixture(args.db_url, args)
+            app.dependency_overrides[get_db] = override_get_db(SessionBench)
+            app.dependency_overrides[get_async_db] = override_get_async_db(args.db_url)
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://loadtest"
+        else:
+            if args.seed_db:
+                engine, _, fixture = seed_fixture(args.db_url, args)
+            else:
+                fixture = {
+                    "class_ids": [int(x) for x in args.class_ids.split(",")],
+                    "session_dates": args.dates.split(","),
+                }
+            if args.spawn_uvicorn:
+                proc, base_url = spawn_uvicorn(args.port, args.workers, args.db_url if args.seed_db else None)
+            else:
+                base_url = args.base_url
+            transport = None
+
+        factories = build_request_factories(fixture, jpeg)
+        results = []
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits) as client:
+            for level in args.levels:
+                res = await run_level(client, factories, weights, level, args.duration, args.timeout, seed=args.seed)
+                print_level(res)
+                results.append(res)
+    finally:
+        if app is not None:
+            from backend.app.database import get_db, get_async_db
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_async_db, None)
+        if engine is not None:
+            engine.dispose()
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    # Điểm bão hòa: mức concurrency mà throughput tăng < 5% so với mức trước
+    saturation = None
+    for prev, cur in zip(results, results[1:]):
+        prev_rps = prev["overall"].get("throughput_rps", 0)
+        cur_rps = cur["overall"].get("throughput_rps", 0)
+        if prev_rps and cur_rps < prev_rps * 1.05:
+            saturation = prev["concurrency"]
+            break
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "mode": "asgi" if args.asgi else ("uvicorn" if args.spawn_uvicorn else "remote"),
+            "base_url": None if args.asgi else base_url,
+            "mix": weights,
+            "args": {k: v for k, v in vars(args).items() if k != "levels"},
+            "levels": args.levels,
+        },
+        "saturation_concurrency": saturation,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test các endpoint điểm danh")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--asgi", action="store_true", help="Gọi app in-process qua ASGI transport")
+    mode.add_argument("--spawn-uvicorn", action="store_true", help="Tự chạy uvicorn local")
+    parser.add_argument("--base-url", default=os.getenv("LOADTEST_BASE_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="Số worker uvicorn khi --spawn-uvicorn")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="Danh sách mức concurrency")
+    parser.add_argument("--duration", type=float, default=15.0, help="Số giây cho mỗi mức")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Tỉ trọng request, vd session_detail=4,stats=1")
+    parser.add_argument("--faces", type=int, default=5, help="Số khuôn mặt trong ảnh gửi /recognize")
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DB_URL", "sqlite:///./loadtest.sqlite3"))
+    parser.add_argument("--seed-db", action="store_true", help="Seed --db-url trước khi tải (chế độ uvicorn)")
+    parser.add_argument("--classes", type=int, default=5)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--sessions", type=int, default=12)
+    parser.add_argument("--class-ids", default="3,4,11", help="ClassID có sẵn khi không seed")
+    parser.add_argument("--dates", default="2025-09-09,2025-09-16", help="Ngày học có sẵn khi không seed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+    args.levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    if args.spawn_uvicorn and args.seed_db and not args.db_url.startswith("mysql"):
+        # backend chỉ chạy trên MySQL/MariaDB: SQLite chỉ dùng được với --asgi
+        parser.error("--spawn-uvicorn --seed-db cần --db-url mysql+pymysql://... (SQLite chỉ dùng với --asgi)")
+
+    report = asyncio.run(main_async(args))
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n📈 Điểm bão hòa (concurrency): {report['saturation_concurrency'] or 'chưa đạt'}")
+    print(f"💾 Đã lưu báo cáo: {out}")
+
+
+if __name__ == "__main__":
+    main()
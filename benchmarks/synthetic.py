@@ -0,0 +1,93 @@
+# benchmarks/synthetic.py
+# Sinh dữ liệu giả lập cho benchmark: gallery embedding ngẫu nhiên và khung hình lớp học có N khuôn mặt
+
+import random
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+FACE_DATA_DIR = ROOT_DIR / "backend" / "app" / "data" / "face"
+
+EMBEDDING_DIM = 512
+
+
+def random_gallery(size, dim=EMBEDDING_DIM, seed=0):
+    """
+    Tạo gallery gồm `size` vector đơn vị ngẫu nhiên (float32), giống định dạng _known["encodings"].
+    Output: {"encodings": np.ndarray (size, dim), "meta": list[{id, name, code}]}
+    """
+    rng = np.random.default_rng(seed)
+    encs = rng.standard_normal((size, dim)).astype(np.float32)
+    encs /= np.linalg.norm(encs, axis=1, keepdims=True) + 1e-9
+
+    meta = [
+        {"id": i + 1, "name": f"Sinh vien {i + 1}", "code": f"SV{i + 1:06d}"}
+        for i in range(size)
+    ]
+    return {"encodings": encs, "meta": meta}
+
+
+def load_enrollment_images(limit=None, data_dir=FACE_DATA_DIR):
+    """Đọc ảnh đăng ký (BGR) từ backend/app/data/face/{MSSV}/ - mỗi sinh viên lấy 1 ảnh"""
+    images = []
+    if not data_dir.exists():
+        return images
+
+    for folder in sorted(p for p in data_dir.iterdir() if p.is_dir()):
+        files = sorted(
+            f for f in folder.iterdir()
+            if f.suffix.lower() in (".jpg", ".jpeg", ".png")
+        )
+        for f in files:
+            img = cv2.imread(str(f))
+            if img is not None:
+                images.append(img)
+                break
+        if limit and len(images) >= limit:
+            break
+    return images
+
+
+def classroom_frame(num_faces, sources, width=1280, height=720, seed=0):
+    """
+    Ghép `num_faces` ảnh đăng ký thành 1 khung hình lớp học (BGR) dạng lưới.
+    Nếu không có ảnh nguồn thì trả về ảnh nhiễu (pipeline sẽ không thấy mặt nào).
+    """
+    rng = random.Random(seed)
+    canvas = np.full((height, width, 3), 200, dtype=np.uint8)
+
+    if num_faces <= 0:
+        return canvas
+    if not sources:
+        return np.random.default_rng(seed).integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+    cols = int(np.ceil(np.sqrt(num_faces * width / height)))
+    rows = int(np.ceil(num_faces / cols))
+    cell_w = width // cols
+    cell_h = height // rows
+
+    for i in range(num_faces):
+        src = sources[rng.randrange(len(sources))]
+        r, c = divmod(i, cols)
+
+        # Giữ tỉ lệ ảnh gốc, co vào ô lưới (chừa lề 5%)
+        h, w = src.shape[:2]
+        scale = min(cell_w * 0.9 / w, cell_h * 0.9 / h)
+        tile = cv2.resize(src, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+        th, tw = tile.shape[:2]
+        y0 = r * cell_h + (cell_h - th) // 2
+        x0 = c * cell_w + (cell_w - tw) // 2
+        canvas[y0:y0 + th, x0:x0 + tw] = tile
+
+    return canvas
+
+
+def encode_jpeg(img_bgr, quality=90):
+    """Encode ảnh BGR thành bytes JPEG (giống ảnh upload từ frontend)"""
+    ok, buf = cv2.imencode(".jpg", img_bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Không encode được ảnh JPEG")
+    return buf.tobytes()
@@ -0,0 +1,44 @@
+import streamlit as st
+
+# Phân trang keyset cho các danh sách: lưu chồng cursor trong session_state
+# (trang 1 = None, trang n = next_cursor của trang n-1). Đổi bộ lọc -> quay về trang 1.
+
+def current_cursor(key, filters):
+    """Cursor của trang hiện tại. `filters` đổi (vd từ khóa tìm kiếm) thì reset về trang đầu."""
+    state = st.session_state.setdefault(key, {"filters": filters, "cursors": [None]})
+    if state["filters"] != filters:
+        state["filters"] = filters
+        state["cursors"] = [None]
+    return state["cursors"][-1]
+
+
+def page_offset(key, page_size):
+    """Số thứ tự bắt đầu của trang hiện tại (để đánh STT liên tục qua các trang)"""
+    state = st.session_state.get(key)
+    return (len(state["cursors"]) - 1) * page_size if state else 0
+
+
+def render_pager(key, page):
+    """Nút Trang trước / Trang sau + tổng số dòng"""
+    state = st.session_state.get(key)
+    if not state:
+        return
+    page_no = len(state["cursors"])
+    limit = page.get("limit") or 1
+    total = page.get("total", 0)
+    total_pages = max(1, -(-total // limit))
+
+    c_prev, c_info, c_next = st.columns([1, 2, 1])
+    with c_prev:
+        if st.button("← Trang trước", key=f"{key}_prev", disabled=page_no <= 1, use_container_width=True):
+            state["cursors"].pop()
+            st.rerun()
+    with c_info:
+        st.markdown(
+            f"<div style='text-align:center; padding-top:8px; color:#666;'>Trang {page_no}/{total_pages} · {total} kết quả</div>",
+            unsafe_allow_html=True
+        )
+    with c_next:
+        if st.button("Trang sau →", key=f"{key}_next", disabled=not page.get("next_cursor"), use_container_width=True):
+            state["cursors"].append(page["next_cursor"])
+            st.rerun()
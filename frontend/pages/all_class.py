@@ -6,7 +6,8 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent))
 try:
     from components.sidebar_auth import render_auth_sidebar
-    from services.api_client import get_all_classes
+    from components.pager import current_cursor, page_offset, render_pager
+    from services.api_client import get_classes_page
 except ImportError:
     # Mock dữ liệu giống cấu trúc ảnh database bạn gửi
     def render_auth_sidebar(): pass
@@ -18,6 +19,12 @@ except ImportError:
             {"ClassID": 17, "ClassName": "24DHDL09", "FullClassName": "Kinh tế vĩ mô", "CourseCode": "109"},
             {"ClassID": 18, "ClassName": "23DHDL02", "FullClassName": "Lập trình Python", "CourseCode": "2102"},
         ]
+    def get_classes_page(**kwargs):
+        items = get_all_classes()
+        return {"items": items, "total": len(items), "next_cursor": None, "limit": len(items)}
+    def current_cursor(key, filters): return None
+    def page_offset(key, page_size): return 0
+    def render_pager(key, page): pass
 
 # ===== PAGE CONFIG =====
 st.set_page_config(page_title="Các buổi học", layout="wide", initial_sidebar_state="expanded")
@@ -123,8 +130,8 @@ st.markdown("""
 # ===== SIDEBAR =====
 render_auth_sidebar()
 
-# ===== DATA LOGIC =====
-classes = get_all_classes() or []
+PAGE_SIZE = 50
+PAGER_KEY = "all_class_pager"
 
 # ===== UI HEADER & BACK BUTTON =====
 # Tạo 3 cột: Nút Back | Tiêu đề | Khoảng trống (để cân đối tiêu đề ra giữa)
@@ -143,14 +150,12 @@ col_search, col_space = st.columns([4, 6])
 with col_search:
     search_query = st.text_input("Search", placeholder="Tìm kiếm theo tên hoặc mã lớp...", label_visibility="collapsed")
 
-# ===== FILTER LOGIC =====
-if search_query:
-    search_lower = search_query.lower()
-    classes = [
-        c for c in classes
-        if search_lower in str(c.get("FullClassName", "")).lower() 
-        or search_lower in str(c.get("CourseCode", "")).lower()
-    ]
+# ===== DATA LOGIC (lọc + phân trang ở server, mỗi lần chỉ tải 1 trang) =====
+search_query = (search_query or "").strip()
+cursor = current_cursor(PAGER_KEY, {"q": search_query})
+page = get_classes_page(q=search_query or None, sort="full_name", limit=PAGE_SIZE, cursor=cursor)
+classes = page.get("items", [])
+offset = page_offset(PAGER_KEY, PAGE_SIZE)
 
 st.write("") # Spacer
 
@@ -166,7 +171,7 @@ with c3:
     st.markdown('<div class="table-header">Mã lớp</div>', unsafe_allow_html=True)
 
 # ===== TABLE ROW LOOP =====
-for idx, c in enumerate(classes, 1):
+for idx, c in enumerate(classes, offset + 1):
     # Lấy dữ liệu theo yêu cầu: FullClassName và CourseCode
     display_name = c.get("FullClassName", "Chưa đặt tên") 
     display_code = c.get("CourseCode", "")
@@ -189,4 +194,7 @@ for idx, c in enumerate(classes, 1):
         st.markdown(f'<div class="class-code-box">{display_code}</div>', unsafe_allow_html=True)
         
     # Spacer row
-    st.markdown("<div style='margin-bottom: 8px;'></div>", unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown("<div style='margin-bottom: 8px;'></div>", unsafe_allow_html=True)
+
+# ===== PHÂN TRANG =====
+render_pager(PAGER_KEY, page)
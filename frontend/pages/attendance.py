@@ -25,8 +25,14 @@ if str(ROOT) not in sys.path:
 # Import AI
 try:
     from backend.app.ai.smart_face_attendance import match_image_and_check_real
+    from backend.app.ai.face.frame import Frame
 except ImportError:
-    def match_image_and_check_real(img): return None
+    Frame = lambda rgb: rgb
+    def match_image_and_check_real(img, source="default", class_id=None): return None
+
+# Ghi điểm danh qua CRUD chung (cập nhật luôn bảng tổng hợp)
+from backend.app.database import SessionLocal
+from backend.app.crud.attendance_crud import checkin_student
 
 # ===== CẤU HÌNH STUN SERVER (QUAN TRỌNG ĐỂ CHẠY ONLINE) =====
 from streamlit_webrtc import webrtc_streamer, WebRtcMode, RTCConfiguration
@@ -151,14 +157,29 @@ def create_video_callback(class_id, date_str, queue_ref):
     processed_cache = {}
     
     def video_callback(frame):
-        img = frame.to_ndarray(format="bgr24")
+        # Lấy thẳng RGB từ camera: pipeline AI dùng RGB, không đổi màu cả khung hình mỗi frame
+        # (màu vẽ bên dưới theo thứ tự RGB)
+        img = frame.to_ndarray(format="rgb24")
         
         try:
             # Gọi AI nhận diện
-            result = match_image_and_check_real(img)
+            result = match_image_and_check_real(Frame(img), source=f"class-{class_id}", class_id=class_id)
             
             if result and result.get("faces"):
                 for face in result["faces"]:
+                    if face.get("ambiguous") and face.get("box"):
+                        # Giống SV đã biết nhưng SV đó có người gần như trùng trong gallery -> chờ khung hình rõ hơn
+                        x1, y1, x2, y2 = map(int, face["box"])
+                        cv2.rectangle(img, (x1, y1), (x2, y2), (255, 200, 0), 2)
+                        cv2.putText(img, "Chua chac", (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 200, 0), 2)
+                        continue
+                    if face.get("found") and face.get("student") and not face.get("is_real", True):
+                        # Liveness (LIVENESS_CHECK=1) nghi giả mạo -> không điểm danh, khung đỏ
+                        if face.get("box"):
+                            x1, y1, x2, y2 = map(int, face["box"])
+                            cv2.rectangle(img, (x1, y1), (x2, y2), (255, 0, 0), 2)
+                            cv2.putText(img, "Gia mao?", (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
+                        continue
                     if face.get("found") and face.get("student"):
                         student = face["student"]
                         student_id = student.get("id")
@@ -175,33 +196,16 @@ def create_video_callback(class_id, date_str, queue_ref):
 
                         if current_time - last_processed > 3.0:
                             # Đã qua 3 giây, cho phép xử lý DB
+                            db = SessionLocal()
                             try:
-                                conn = get_db_connection()
-                                cursor = conn.cursor()
-                                
-                                # Tìm StudyID
-                                cursor.execute("SELECT StudyID FROM study WHERE StudentID = %s AND ClassID = %s", (student_id, class_id))
-                                study_row = cursor.fetchone()
-                                
-                                if study_row:
-                                    study_id = study_row['StudyID']
-                                    # Check đã điểm danh chưa
-                                    cursor.execute("SELECT AttendanceID FROM attendance WHERE StudyID = %s AND Date = %s", (study_id, date_str))
-                                    if cursor.fetchone():
-                                        msg = "Duplicate"
-                                    else:
-                                        # Lưu vào DB
-                                        cursor.execute("""
-                                            INSERT INTO attendance (StudyID, Date, Time, PhotoPath)
-                                            VALUES (%s, %s, CURTIME(), %s)
-                                        """, (study_id, date_str, f"AI:{similarity:.2f}"))
-                                        conn.commit()
-                                        msg = "Success"
-                                        print(f"✅ Đã lưu điểm danh: {name}")
-                                else:
-                                    msg = "NotInClass"
-                                    
-                                conn.close()
+                                # Ghi điểm danh + cập nhật bảng tổng hợp trong 1 transaction
+                                msg, _ = checkin_student(
+                                    db, student_id, class_id,
+                                    datetime.strptime(date_str, "%Y-%m-%d").date(),
+                                    photo_path=f"AI:{similarity:.2f}"
+                                )
+                                if msg == "Success":
+                                    print(f"✅ Đã lưu điểm danh: {name}")
                                 
                                 # Cập nhật cache thời gian
                                 processed_cache[student_id] = current_time
@@ -216,15 +220,18 @@ def create_video_callback(class_id, date_str, queue_ref):
                                     })
                                 
                             except Exception as db_err:
+                                db.rollback()
                                 print(f"🔥 [DB ERROR] {db_err}")
+                            finally:
+                                db.close()
                         
                         # Set màu sắc và nhãn hiển thị
                         label_suffix = ""
                         if msg == "Duplicate" or (current_time - last_processed <= 3.0 and processed_cache.get(student_id)):
-                             color = (0, 165, 255) # Cam (Đã xong)
+                             color = (255, 165, 0) # Cam (Đã xong)
                              label_suffix = " (Da DD)"
                         elif msg == "NotInClass":
-                             color = (0, 0, 255) # Đỏ
+                             color = (255, 0, 0) # Đỏ
                              label_suffix = " (Sai Lop)"
 
                         # Vẽ khung
@@ -236,7 +243,7 @@ def create_video_callback(class_id, date_str, queue_ref):
         except Exception as e:
             print(f"AI Error: {e}")
             
-        return av.VideoFrame.from_ndarray(img, format="bgr24")
+        return av.VideoFrame.from_ndarray(img, format="rgb24")
     return video_callback
 
 # ===== GIAO DIỆN CHÍNH (FRONTEND) =====
@@ -1,5 +1,4 @@
 import streamlit as st
-import requests
 from pathlib import Path
 import sys
 
@@ -22,6 +21,9 @@ except ImportError:
     # Fallback nếu không tìm thấy component
     capture_component = None
 
+# HTTP session dùng chung (keep-alive) + URL backend theo biến môi trường
+from services.api_client import http, API_URL
+
 # ===== LOAD CSS =====
 css_path = Path(__file__).parent.parent / "public" / "css" / "capture_photo.css"
 if css_path.exists():
@@ -123,8 +125,8 @@ with c2:
                 try:
                     # Gọi API Backend
                     # Lưu ý: Backend sẽ tự gọi logic save_images_and_generate_embedding
-                    res = requests.post(
-                        "http://127.0.0.1:8000/api/v1/capture/save-face-images",
+                    res = http.post(
+                        f"{API_URL}/capture/save-face-images",
                         json=payload,
                         timeout=120
                     )
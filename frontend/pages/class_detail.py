@@ -8,11 +8,14 @@ sys.path.append(str(Path(__file__).parent.parent))
 try:
     from components.sidebar_auth import render_auth_sidebar
     # Import các hàm cần thiết
-    from services.api_client import get_session_detail, get_students_in_class
+    from components.pager import current_cursor, page_offset, render_pager
+    from services.api_client import get_class_students_page
 except ImportError:
     def render_auth_sidebar(): pass
-    def get_students_in_class(class_id): return []
-    def get_session_detail(class_id, date): return {}
+    def get_class_students_page(class_id, **kwargs): return {"items": [], "total": 0, "next_cursor": None}
+    def current_cursor(key, filters): return None
+    def page_offset(key, page_size): return 0
+    def render_pager(key, page): pass
 
 # ===== PAGE CONFIG =====
 st.set_page_config(page_title="Chi tiết lớp học", layout="wide", initial_sidebar_state="expanded")
@@ -114,49 +117,26 @@ with col_filter:
 # 3. XỬ LÝ DỮ LIỆU (QUAN TRỌNG: ĐÃ SỬA LOGIC)
 # =========================================================
 
-# B1: Lấy danh sách tất cả sinh viên trong lớp
-all_students = get_students_in_class(class_id) or []
-
-# B2: Lấy dữ liệu điểm danh (API trả về Dict: {success, attended_list, absent_list})
-attendance_map = {} # Map lưu trạng thái: { MSSV : "Đã điểm danh" }
-
-if selected_date_api:
-    # Gọi API get_session_detail (chứ không phải get_attendance_session_detail cũ)
-    resp = get_session_detail(class_id, selected_date_api)
-    
-    if isinstance(resp, dict) and resp.get("success"):
-        # Lấy danh sách ĐÃ ĐIỂM DANH từ API response
-        attended_list = resp.get("attended_list", [])
-        
-        # Duyệt qua danh sách đã điểm danh để đánh dấu vào Map
-        for s in attended_list:
-            mssv = str(s.get("StudentCode", "")).strip()
-            attendance_map[mssv] = "Đã điểm danh"
+# B1: Lấy 1 trang SV (lọc theo tên / MSSV ở server) kèm trạng thái buổi đang chọn
+PAGE_SIZE = 50
+PAGER_KEY = f"class_detail_pager_{class_id}"
+search_text = (search_text or "").strip()
+cursor = current_cursor(PAGER_KEY, {"q": search_text, "date": selected_date_api})
+page = get_class_students_page(
+    class_id, q=search_text or None, session_date=selected_date_api,
+    limit=PAGE_SIZE, cursor=cursor
+)
+offset = page_offset(PAGER_KEY, PAGE_SIZE)
 
-# B3: Ghép dữ liệu (Merge)
+# B2: Ghép trạng thái hiển thị
 final_list = []
-for sv in all_students:
-    # Lấy tên và MSSV từ danh sách gốc
-    sv_name = sv.get("StudentName") or sv.get("FullName") or "Unknown"
-    sv_code = str(sv.get("StudentCode", "")).strip()
-    
-    # Kiểm tra trong Map điểm danh
-    if sv_code in attendance_map:
-        status = "Đã điểm danh"
-    else:
-        status = "Chưa điểm danh"
-    
+for sv in page.get("items", []):
     final_list.append({
-        "FullName": sv_name,
-        "StudentCode": sv_code,
-        "Status": status
+        "FullName": sv.get("FullName") or "Unknown",
+        "StudentCode": str(sv.get("StudentCode", "")).strip(),
+        "Status": "Đã điểm danh" if sv.get("Present") else "Chưa điểm danh"
     })
 
-# B4: Lọc theo ô tìm kiếm
-if search_text:
-    s_lower = search_text.lower()
-    final_list = [s for s in final_list if s_lower in str(s["FullName"]).lower() or s_lower in str(s["StudentCode"]).lower()]
-
 # ===== HIỂN THỊ UI =====
 st.markdown("""
     <div class="list-header">
@@ -170,7 +150,7 @@ st.markdown("""
 if not final_list:
     st.info("Không tìm thấy sinh viên nào.")
 else:
-    for idx, sv in enumerate(final_list, 1):
+    for idx, sv in enumerate(final_list, offset + 1):
         name = sv["FullName"]
         mssv = sv["StudentCode"]
         status = sv["Status"]
@@ -191,4 +171,7 @@ else:
             </div>
             """,
             unsafe_allow_html=True
-        )
\ No newline at end of file
+        )
+
+# ===== PHÂN TRANG =====
+render_pager(PAGER_KEY, page)
@@ -3,14 +3,12 @@ import pandas as pd
 import altair as alt
 from pathlib import Path
 import sys
-import io
 from datetime import datetime
 
 # ===== IMPORT SERVICES =====
 sys.path.append(str(Path(__file__).parent.parent))
 from components.sidebar_dashboard import render_dashboard_sidebar
-# Nhớ import hàm get_export_data mới thêm
-from services.api_client import get_students_in_class, get_attendance_by_date, get_export_data
+from services.api_client import get_class_overview, get_export_url
 
 # ==== PAGE CONFIG ====
 st.set_page_config(page_title="Dashboard - VAA", page_icon="📊", layout="wide", initial_sidebar_state="expanded")
@@ -59,8 +57,9 @@ st.markdown('</div><div style="margin-bottom: 30px;"></div>', unsafe_allow_html=
 # ==================================================================
 # 2. LẤY DỮ LIỆU
 # ==================================================================
-students = get_students_in_class(class_id) or []
-attendance_hist = get_attendance_by_date(class_id) or []
+overview = get_class_overview(class_id)
+students = overview.get("roster", [])
+attendance_hist = overview.get("sessions", [])
 total_students = len(students)
 
 col_charts, col_list = st.columns([1.8, 1.2], gap="large")
@@ -181,31 +180,23 @@ with col_list:
     st.markdown('<div style="margin-top: 20px;"></div>', unsafe_allow_html=True)
 
     # --- NÚT EXPORT EXCEL & THÊM SINH VIÊN ---
-    def to_excel(df):
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='DiemDanh')
-        processed_data = output.getvalue()
-        return processed_data
-
+    # File do server tạo và stream thẳng về trình duyệt (không build workbook trong Streamlit)
     col_export, col_add = st.columns([1, 1])
     
     with col_export:
-        export_raw = get_export_data(class_id)
-        if export_raw:
-            df_export = pd.DataFrame(export_raw)
-            if not df_export.empty:
-                excel_data = to_excel(df_export)
-                file_name = f"DiemDanh_{selected_class.get('ClassName')}_{datetime.now().strftime('%d%m%Y')}.xlsx"
-                
-                st.download_button(
-                    label="📥 Xuất Excel",
-                    data=excel_data,
-                    file_name=file_name,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True,
-                    type="secondary"
-                )
+        if attendance_hist:
+            st.link_button(
+                "📥 Xuất Excel",
+                get_export_url(class_id, "xlsx"),
+                use_container_width=True,
+                type="secondary"
+            )
+            st.markdown(
+                f"<div style='text-align:center;font-size:12px;'>"
+                f"<a href='{get_export_url(class_id, 'csv')}'>CSV</a> · "
+                f"<a href='{get_export_url(class_id, 'parquet')}'>Parquet</a></div>",
+                unsafe_allow_html=True
+            )
         else:
             st.button("📥 Xuất Excel", disabled=True, use_container_width=True, help="Không có dữ liệu để xuất")
 
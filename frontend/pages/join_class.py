@@ -2,7 +2,7 @@ import streamlit as st
 from pathlib import Path
 from datetime import datetime
 from components.sidebar_auth import render_auth_sidebar
-from services.api_client import get_majors, get_types, get_classes_by_teacher, get_shifts
+from services.api_client import get_majors, get_types, get_classes_page, get_shifts
 
 # ==== PAGE CONFIG ====
 st.set_page_config(page_title="Vào lớp", layout="wide", initial_sidebar_state="collapsed")
@@ -42,20 +42,26 @@ id_login = teacher.get("id_login")
 majors = get_majors() or []
 types = get_types() or []
 shifts = get_shifts() or []
-class_list = get_classes_by_teacher(id_login) or []
-
 
 
 major_dict = {m['MajorID']: m['MajorName'] for m in majors}
 type_dict = {t['TypeID']: t['TypeName'] for t in types}
 shift_dict = {s['ShiftID']: s['ShiftName'] for s in shifts}
 
-class_options = {c["ClassID"]: c for c in class_list}
-
 # ==== INIT SESSION ====
 st.session_state.setdefault("filter_major", None)
 st.session_state.setdefault("filter_type", None)
 st.session_state.setdefault("selected_class_id", None)
+# Lớp đang chọn lưu nguyên dict (danh sách lớp chỉ tải theo trang nên không có sẵn toàn bộ)
+st.session_state.setdefault("join_class_info", None)
+
+CLASS_PAGE_SIZE = 50
+
+def get_selected_class():
+    info = st.session_state.get("join_class_info")
+    if info and info.get("ClassID") == st.session_state.get("selected_class_id"):
+        return info
+    return None
 
 # =====================================
 # 1. TÌM KIẾM
@@ -65,17 +71,17 @@ with s_col1:
     search_text = st.text_input("Tìm kiếm nhanh", placeholder="Nhập tên lớp, mã môn học...", label_visibility="collapsed")
 with s_col2:
     if st.button("🔍 Tìm kiếm", use_container_width=True):
-        q = (search_text or "").strip().lower()
+        q = (search_text or "").strip()
         found = None
 
         if q:
-            for c in class_list:
-                if q in str(c).lower():
-                    found = c
-                    break
+            # Tìm ở server (tiền tố tên lớp / tên môn, hoặc mã môn) trong các lớp của giảng viên
+            items = get_classes_page(id_login=id_login, q=q, limit=1).get("items", [])
+            found = items[0] if items else None
 
         if found:
             st.session_state.selected_class_id = found["ClassID"]
+            st.session_state.join_class_info = found
             st.toast(f"Đã tìm thấy: {found.get('ClassName')}", icon="✅")
             st.rerun()
         else:
@@ -86,8 +92,7 @@ st.markdown('<div style="margin-bottom: 20px;"></div>', unsafe_allow_html=True)
 # =====================================
 # 2. BỘ LỌC HOẶC FORM SỬA
 # =====================================
-final_selected_id = st.session_state.get("selected_class_id")
-class_info = class_options.get(final_selected_id)
+class_info = get_selected_class()
 
 if class_info:
     # ========== FORM SỬA ==========
@@ -135,17 +140,22 @@ else:
         year = st.text_input("Năm học", placeholder="VD: 2024")
 
     with c4:
-        filtered_classes = [
-            c for c in class_list
-            if (not major_id or c.get("MajorID") == major_id)
-            and (not type_id or c.get("TypeID") == type_id)
-            and (not year or str(c.get("DateStart","")).startswith(year))
-        ]
-
+        # Lọc ở server, chỉ tải 1 trang cho dropdown
+        year_str = (year or "").strip()
+        filtered_classes = get_classes_page(
+            id_login=id_login,
+            major_id=major_id,
+            type_id=type_id,
+            year=int(year_str) if year_str.isdigit() else None,
+            limit=CLASS_PAGE_SIZE
+        ).get("items", [])
+
+        class_by_id = {c["ClassID"]: c for c in filtered_classes}
         class_name_dict = {c["ClassID"]: c["ClassName"] for c in filtered_classes}
 
         def on_class_change():
             st.session_state.selected_class_id = st.session_state.dropdown_class_id
+            st.session_state.join_class_info = class_by_id.get(st.session_state.dropdown_class_id)
 
         st.selectbox(
             "Chọn lớp",
@@ -163,8 +173,7 @@ st.markdown('<div style="border-bottom: 1px solid #eee; margin: 20px 0;"></div>'
 # =====================================
 st.markdown("### 📋 Thông tin chi tiết")
 
-final_selected_id = st.session_state.get("selected_class_id")
-class_info = class_options.get(final_selected_id)
+class_info = get_selected_class()
 
 if class_info:
 
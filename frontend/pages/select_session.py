@@ -12,7 +12,7 @@ st.set_page_config(
 
 # ===== IMPORT =====
 sys.path.append(str(Path(__file__).parent.parent))
-from services.api_client import get_attendance_by_date, get_session_detail
+from services.api_client import get_class_overview
 
 # ===== LOAD CSS =====
 css_path = Path(__file__).parent.parent / "public" / "css" / "attendance.css"
@@ -128,19 +128,18 @@ st.markdown("<br>", unsafe_allow_html=True)
 st.markdown('<h4 style="color:#333; margin-top:30px;">Danh sách các buổi học</h4>', unsafe_allow_html=True)
 st.markdown('<div class="session-list">', unsafe_allow_html=True)
 
+# Sĩ số mọi buổi lấy 1 lần (thay vì gọi session-detail cho từng buổi)
+overview = get_class_overview(class_info.get("ClassID"))
+total_students = overview.get("total_students", 0)
+present_by_date = {s["date"]: s["present"] for s in overview.get("sessions", [])}
+
 for session in sessions:
     col_session, col_date, col_status, col_action = st.columns([1, 2, 3, 1.5])
 
     # Lấy số sinh viên đã và chưa điểm danh cho buổi này
-    class_id = class_info.get("ClassID")
     session_date_api = session['date_raw'].strftime("%Y-%m-%d")
-    data = get_session_detail(class_id, session_date_api)
-    if data and data.get("success"):
-        total_attended = data.get("total_attended", 0)
-        total_absent = data.get("total_absent", 0)
-    else:
-        total_attended = "__"
-        total_absent = "__"
+    total_attended = present_by_date.get(session_date_api, 0)
+    total_absent = max(0, total_students - total_attended)
 
     with col_session:
         st.markdown(f"<div style='padding:10px; font-weight:600;'>Buổi {session['session_number']}</div>", unsafe_allow_html=True)
@@ -12,7 +12,7 @@ st.set_page_config(
 
 # ===== IMPORT =====
 sys.path.append(str(Path(__file__).parent.parent))
-from services.api_client import get_session_detail, manual_checkin
+from services.api_client import get_class_overview, manual_checkin
 
 # ===== LOAD CSS =====
 css_path = Path(__file__).parent.parent / "public" / "css" / "attendance.css"
@@ -71,7 +71,7 @@ if today != session_date:
 st.info(f"📅 **Buổi {session_number}** - {session_date_display}")
 
 # ===== GỌI API LẤY DỮ LIỆU =====
-data = get_session_detail(class_info.get("ClassID"), session_date_api)
+data = get_class_overview(class_info.get("ClassID"), session_date_api).get("selected_session") or {}
 
 if not data.get("success"):
     st.error(f"Lỗi: {data.get('message')}")
@@ -11,7 +11,7 @@ st.set_page_config(
 
 # ===== IMPORT SERVICES =====
 sys.path.append(str(Path(__file__).parent.parent))
-from services.api_client import get_student_detail, get_student_attendance, remove_student_from_class, update_student_info
+from services.api_client import get_student_detail, get_student_history_summary, remove_student_from_class, update_student_info
 from components.header import render_header
 from components.sidebar_dashboard import render_dashboard_sidebar
 
@@ -39,9 +39,11 @@ if not student:
     st.error("Không tìm thấy thông tin sinh viên.")
     st.stop()
 
-attendance_data = []
+history_summary = None
 if class_info.get("ClassID"):
-    attendance_data = get_student_attendance(class_info.get("ClassID"), student_id)
+    # 1 request: lịch sử từng buổi + tổng có mặt / tỷ lệ (tính sẵn ở server)
+    history_summary = get_student_history_summary(class_info.get("ClassID"), student_id)
+attendance_data = history_summary.get("History", []) if history_summary else []
 
 # ===== HEADER MÔN HỌC =====
 render_header(
@@ -140,9 +142,9 @@ st.markdown("<div class='history-title'>Lịch sử điểm danh</div>", unsafe_
 
 if attendance_data:
     # Thống kê
-    total = len(attendance_data)
-    present = sum(1 for x in attendance_data if x.get('IsPresent'))
-    rate = int((present/total)*100) if total > 0 else 0
+    total = history_summary.get("TotalSessions", len(attendance_data))
+    present = history_summary.get("Present", 0)
+    rate = int(history_summary.get("AttendanceRate", 0))
     
     c_s1, c_s2, c_s3 = st.columns(3)
     c_s1.metric("Tổng buổi", total)
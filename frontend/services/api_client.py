@@ -1,5 +1,9 @@
 import os
+import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ===== CẤU HÌNH API =====
 
@@ -14,6 +18,68 @@ TIMEOUT = int(os.getenv("API_TIMEOUT", "20"))
 
 print(f"🔌 Đang kết nối API tới: {API_URL}") # In ra để kiểm tra đang chạy server nào
 
+# ===== HTTP SESSION DÙNG CHUNG (keep-alive + retry) =====
+# Mọi request đi qua 1 connection pool -> không bắt tay TCP/TLS lại mỗi lần Streamlit rerun
+POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+RETRIES = int(os.getenv("API_RETRIES", "3"))
+
+def _build_session():
+    session = requests.Session()
+    retry = Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=RETRIES,
+        backoff_factor=0.3,                     # 0.3s, 0.6s, 1.2s...
+        status_forcelist=(502, 503, 504),       # Render cold start / proxy lỗi tạm thời
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),  # POST không retry (tránh ghi 2 lần)
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http = _build_session()
+
+# ===== CACHE DỮ LIỆU DANH MỤC (majors / types / shifts) =====
+REFERENCE_TTL = int(os.getenv("API_REFERENCE_TTL", "600"))  # giây
+_reference_cache = {}  # {path: (expires_at, data, etag)}
+_reference_lock = threading.Lock()
+
+def _cached_get(path, default):
+    """
+    GET có TTL cache. Hết TTL thì hỏi lại kèm If-None-Match: server trả 304 -> dùng tiếp bản cũ.
+    Lỗi mạng -> trả bản cache cũ (nếu có) thay vì rỗng.
+    """
+    now = time.monotonic()
+    with _reference_lock:
+        hit = _reference_cache.get(path)
+    if hit and hit[0] > now:
+        return hit[1]
+
+    try:
+        headers = {"If-None-Match": hit[2]} if hit and hit[2] else {}
+        resp = http.get(f"{API_URL}{path}", headers=headers, timeout=TIMEOUT)
+        if resp.status_code == 304 and hit:
+            with _reference_lock:
+                _reference_cache[path] = (now + REFERENCE_TTL, hit[1], hit[2])
+            return hit[1]
+        if resp.status_code == 200:
+            data = resp.json()
+            with _reference_lock:
+                _reference_cache[path] = (now + REFERENCE_TTL, data, resp.headers.get("ETag"))
+            return data
+    except Exception as e:
+        print(f"[API ERROR] {path}: {e}")
+    return hit[1] if hit else default
+
+def invalidate_reference_cache(path=None):
+    """Xóa cache danh mục (1 path, vd '/class/majors', hoặc tất cả) - gọi sau khi sửa dữ liệu danh mục"""
+    with _reference_lock:
+        if path is None:
+            _reference_cache.clear()
+        else:
+            _reference_cache.pop(path, None)
+
 def _safe_json(resp):
     try:
         return resp.json()
@@ -25,7 +91,7 @@ def register_teacher(email: str, password: str, name: str):
     url = f"{API_URL}/auth/register"
     payload = {"email": email, "password": password, "name": name}
     try:
-        resp = requests.post(url, json=payload, timeout=TIMEOUT)
+        resp = http.post(url, json=payload, timeout=TIMEOUT)
         data = _safe_json(resp)
         data.setdefault("status", resp.status_code)
         return data
@@ -36,7 +102,7 @@ def login_teacher(email: str, password: str):
     url = f"{API_URL}/auth/login"
     payload = {"email": email, "password": password}
     try:
-        resp = requests.post(url, json=payload, timeout=TIMEOUT)
+        resp = http.post(url, json=payload, timeout=TIMEOUT)
         data = _safe_json(resp)
         data.setdefault("status", resp.status_code)
         return data
@@ -45,36 +111,24 @@ def login_teacher(email: str, password: str):
 
 # --- CÁC HÀM CLASS INFO ---
 def get_majors():
-    try:
-        resp = requests.get(f"{API_URL}/class/majors", timeout=TIMEOUT)
-        return resp.json() if resp.status_code == 200 else []
-    except:
-        return []
+    return _cached_get("/class/majors", [])
 
 def get_types():
-    try:
-        resp = requests.get(f"{API_URL}/class/types", timeout=TIMEOUT)
-        return resp.json() if resp.status_code == 200 else []
-    except:
-        return []
+    return _cached_get("/class/types", [])
 
 def get_shifts():
-    try:
-        resp = requests.get(f"{API_URL}/class/shifts", timeout=TIMEOUT)
-        return resp.json() if resp.status_code == 200 else []
-    except:
-        return []
+    return _cached_get("/class/shifts", [])
 
 def get_classes():
     try:
-        resp = requests.get(f"{API_URL}/class/list", timeout=TIMEOUT)
+        resp = http.get(f"{API_URL}/class/list", timeout=TIMEOUT)
         return resp.json() if resp.status_code == 200 else []
     except:
         return []
 
 def get_dashboard_stats():
     try:
-        resp = requests.get(f"{API_URL}/class/dashboard/stats", timeout=TIMEOUT)
+        resp = http.get(f"{API_URL}/class/dashboard/stats", timeout=TIMEOUT)
         return resp.json() if resp.status_code == 200 else {}
     except:
         return {}
@@ -82,7 +136,7 @@ def get_dashboard_stats():
 def create_class(data: dict):
     url = f"{API_URL}/class/create"
     try:
-        resp = requests.post(url, json=data, timeout=TIMEOUT)
+        resp = http.post(url, json=data, timeout=TIMEOUT)
         return resp
     except Exception as e:
         # Tạo class giả để tránh lỗi AttributeError khi truy cập .status_code
@@ -96,7 +150,7 @@ def get_classes_by_teacher(teacher_id):
     """Lấy danh sách lớp học của giáo viên"""
     url = f"{API_URL}/class/by_teacher/{teacher_id}"
     try:
-        resp = requests.get(url, timeout=TIMEOUT)
+        resp = http.get(url, timeout=TIMEOUT)
         # resp.raise_for_status() # Bỏ dòng này nếu muốn server tự xử lý lỗi mềm
         if resp.status_code == 200:
             return resp.json()
@@ -110,7 +164,7 @@ def get_students_in_class(class_id):
     try:
         url = f"{API_URL}/student/students_in_class/{class_id}"
         print(f"🔍 [API] Getting students for class {class_id}...") # Debug
-        resp = requests.get(url, timeout=TIMEOUT)
+        resp = http.get(url, timeout=TIMEOUT)
         if resp.status_code == 200:
             return resp.json()
         else:
@@ -122,11 +176,71 @@ def get_students_in_class(class_id):
 
 def get_attendance_by_date(class_id):
     try:
-        resp = requests.get(f"{API_URL}/class/attendance_by_date/{class_id}", timeout=TIMEOUT)
+        resp = http.get(f"{API_URL}/class/attendance_by_date/{class_id}", timeout=TIMEOUT)
         return resp.json() if resp.status_code == 200 else []
     except:
         return []
 
+# Cache ETag theo URL: {url: (etag, data)} - sống qua các lần Streamlit rerun
+_overview_cache = {}
+
+def get_class_overview(class_id, session_date=None):
+    """
+    Roster + danh sách buổi (present/absent) + trạng thái buổi `session_date` (YYYY-MM-DD) trong 1 request.
+    Gửi If-None-Match -> server trả 304 nếu dữ liệu không đổi, dùng lại bản cache.
+    """
+    url = f"{API_URL}/class/overview/{class_id}"
+    params = {"session_date": session_date} if session_date else None
+    key = requests.Request("GET", url, params=params).prepare().url
+
+    cached = _overview_cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    try:
+        resp = http.get(url, params=params, headers=headers, timeout=TIMEOUT)
+        if resp.status_code == 304 and cached:
+            return cached[1]
+        if resp.status_code == 200:
+            data = resp.json()
+            etag = resp.headers.get("ETag")
+            if etag:
+                _overview_cache[key] = (etag, data)
+            return data
+        print(f"⚠️ [API WARN] get_class_overview: {resp.status_code}")
+    except Exception as e:
+        print(f"❌ [API ERROR] get_class_overview: {e}")
+    # Lỗi mạng -> dùng bản cache cũ nếu có
+    return cached[1] if cached else {"roster": [], "sessions": [], "total_students": 0, "selected_session": None}
+
+EMPTY_PAGE = {"items": [], "total": 0, "next_cursor": None}
+
+def _get_page(path, params):
+    """GET 1 trang (keyset). Bỏ các tham số None để URL gọn."""
+    params = {k: v for k, v in params.items() if v not in (None, "")}
+    try:
+        resp = http.get(f"{API_URL}{path}", params=params, timeout=TIMEOUT)
+        if resp.status_code == 200:
+            return resp.json()
+        print(f"⚠️ [API WARN] {path}: {resp.status_code} {resp.text}")
+    except Exception as e:
+        print(f"❌ [API ERROR] {path}: {e}")
+    return dict(EMPTY_PAGE)
+
+def get_classes_page(id_login=None, major_id=None, type_id=None, shift_id=None, semester=None,
+                     year=None, q=None, sort="name", order="asc", limit=50, cursor=None):
+    """1 trang danh sách lớp (lọc/sắp xếp ở server). Trang sau: truyền cursor = next_cursor."""
+    return _get_page("/class/page", {
+        "id_login": id_login, "major_id": major_id, "type_id": type_id, "shift_id": shift_id,
+        "semester": semester, "year": year, "q": q, "sort": sort, "order": order,
+        "limit": limit, "cursor": cursor,
+    })
+
+def get_class_students_page(class_id, q=None, session_date=None, sort="code", order="asc", limit=50, cursor=None):
+    """1 trang SV trong lớp (+ Present của buổi session_date nếu có)."""
+    return _get_page(f"/student/page_in_class/{class_id}", {
+        "q": q, "session_date": session_date, "sort": sort, "order": order,
+        "limit": limit, "cursor": cursor,
+    })
+
 def handle_response(res):
     try:
         res.raise_for_status()
@@ -142,7 +256,7 @@ def create_student(data: dict):
     url = f"{API_URL}/student/add"
     print(f"🚀 [API] Creating student: {data}") # Debug
     try:
-        res = requests.post(url, json=data, timeout=TIMEOUT)
+        res = http.post(url, json=data, timeout=TIMEOUT)
         return handle_response(res)
     except Exception as e:
         print(f"❌ [API ERROR] Create Student: {e}")
@@ -152,7 +266,7 @@ def search_students(keyword: str, limit: int = 30):
     url = f"{API_URL}/student/search"
     params = {"q": keyword, "limit": limit}
     try:
-        res = requests.get(url, params=params, timeout=TIMEOUT)
+        res = http.get(url, params=params, timeout=TIMEOUT)
         return handle_response(res)
     except:
         return []
@@ -167,7 +281,7 @@ def assign_student_to_class(student_id, class_id):
     print(f"🚀 [API] Assigning: {payload} -> {url}")
 
     try:
-        resp = requests.post(url, json=payload, timeout=TIMEOUT)
+        resp = http.post(url, json=payload, timeout=TIMEOUT)
         if resp.status_code == 422:
             print(f"❌ CHI TIẾT LỖI 422: {resp.json()}")
         
@@ -185,7 +299,7 @@ def assign_student_to_class(student_id, class_id):
 def get_student_attendance(class_id, student_id):
     url = f"{API_URL}/attendance/history/{class_id}/{student_id}"
     try:
-        resp = requests.get(url, timeout=TIMEOUT)
+        resp = http.get(url, timeout=TIMEOUT)
         if resp.status_code == 200:
             return resp.json()
         else:
@@ -195,10 +309,36 @@ def get_student_attendance(class_id, student_id):
         print(f"❌ Lỗi kết nối API: {e}")
         return []
 
+def get_student_history_summary(class_id, student_id):
+    """Lịch sử + thống kê (TotalSessions, Present, Absent, AttendanceRate, History) của 1 SV"""
+    url = f"{API_URL}/attendance/history-summary/{class_id}/{student_id}"
+    try:
+        resp = http.get(url, timeout=TIMEOUT)
+        if resp.status_code == 200:
+            return resp.json()
+        print(f"⚠️ API Lỗi {resp.status_code}: {resp.text}")
+        return None
+    except Exception as e:
+        print(f"❌ Lỗi kết nối API: {e}")
+        return None
+
+def get_class_histories(class_id):
+    """Lịch sử + thống kê của toàn bộ SV trong lớp (1 request)"""
+    url = f"{API_URL}/attendance/history/{class_id}"
+    try:
+        resp = http.get(url, timeout=TIMEOUT)
+        if resp.status_code == 200:
+            return resp.json()
+        print(f"⚠️ API Lỗi {resp.status_code}: {resp.text}")
+        return []
+    except Exception as e:
+        print(f"❌ Lỗi kết nối API: {e}")
+        return []
+
 def get_student_detail(student_id):
     url = f"{API_URL}/student/detail/{student_id}"
     try:
-        resp = requests.get(url, timeout=TIMEOUT)
+        resp = http.get(url, timeout=TIMEOUT)
         if resp.ok:
             data = resp.json()
             if data.get("success"):
@@ -210,7 +350,7 @@ def get_student_detail(student_id):
 def get_attendance_session_detail(class_id, date):
     url = f"{API_URL}/attendance/session/{class_id}/{date}"
     try:
-        resp = requests.get(url, timeout=TIMEOUT)
+        resp = http.get(url, timeout=TIMEOUT)
         if resp.status_code == 200:
             return resp.json()
         return []
@@ -224,7 +364,7 @@ def get_session_detail(class_id, session_date):
     """
     url = f"{API_URL}/attendance/session-detail/{class_id}/{session_date}"
     try:
-        resp = requests.get(url, timeout=TIMEOUT)
+        resp = http.get(url, timeout=TIMEOUT)
         # resp.raise_for_status() # Bỏ để tránh crash
         if resp.status_code == 200:
              return resp.json()
@@ -243,7 +383,7 @@ def manual_checkin(study_id: int, session_date: str):
             "session_date": session_date
         }
         
-        response = requests.post(
+        response = http.post(
             f"{API_URL}/attendance/manual-checkin",
             json=payload,
             timeout=TIMEOUT
@@ -266,7 +406,7 @@ def manual_checkin(study_id: int, session_date: str):
 def get_all_classes():
     url = f"{API_URL}/class/"
     try:
-        resp = requests.get(url, timeout=TIMEOUT)
+        resp = http.get(url, timeout=TIMEOUT)
         if resp.status_code == 200:
             return resp.json()
         return []
@@ -277,7 +417,7 @@ def get_all_classes():
 def remove_student_from_class(class_id, student_id):
     url = f"{API_URL}/class/remove_student"
     try:
-        resp = requests.post(url, json={"ClassID": class_id, "StudentID": student_id}, timeout=TIMEOUT)
+        resp = http.post(url, json={"ClassID": class_id, "StudentID": student_id}, timeout=TIMEOUT)
         return resp.status_code == 200
     except Exception as e:
         print(f"❌ [API ERROR] remove_student_from_class: {e}")
@@ -294,7 +434,7 @@ def update_class(class_id, major_id, type_id, year, class_name, shift_id):
         "ShiftID": shift_id
     }
     try:
-        resp = requests.post(url, json=data, timeout=TIMEOUT)
+        resp = http.post(url, json=data, timeout=TIMEOUT)
         return resp.status_code == 200
     except Exception as e:
         print(f"❌ [API ERROR] update_class: {e}")
@@ -311,20 +451,20 @@ def update_student_info(student_id, full_name, default_class, birth_date, phone,
         "CitizenID": cccd
     }
     try:
-        resp = requests.post(url, json=data, timeout=TIMEOUT)
+        resp = http.post(url, json=data, timeout=TIMEOUT)
         return resp.status_code == 200
     except Exception as e:
         print(f"❌ [API ERROR] update_student_info: {e}")
         return False
 
-def get_export_data(class_id):
-    """Lấy dữ liệu điểm danh để xuất Excel"""
-    url = f"{API_URL}/attendance/export/{class_id}"
-    try:
-        resp = requests.get(url, timeout=60) # Tăng timeout riêng cho export
-        if resp.status_code == 200:
-            return resp.json()
-        return []
-    except Exception as e:
-        print(f"Export API Error: {e}")
-        return []
\ No newline at end of file
+def get_export_url(class_id, fmt="xlsx", date_from=None, date_to=None):
+    """
+    URL tải file điểm danh (csv / xlsx / parquet) do server tạo và stream về.
+    Trình duyệt tải trực tiếp từ API nên Streamlit không phải giữ cả file trong RAM.
+    """
+    params = {"format": fmt}
+    if date_from:
+        params["date_from"] = str(date_from)
+    if date_to:
+        params["date_to"] = str(date_to)
+    return requests.Request("GET", f"{API_URL}/attendance/export/{class_id}", params=params).prepare().url
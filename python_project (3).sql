@@ -6,6 +6,9 @@
 -- Generation Time: Nov 14, 2025 at 06:02 PM
 -- Server version: 10.4.32-MariaDB
 -- PHP Version: 8.2.12
+--
+-- Schema tương ứng migration 0001_baseline (backend/migrations).
+-- Sau khi import: alembic -c backend/alembic.ini stamp 0001_baseline && alembic -c backend/alembic.ini upgrade head
 
 SET SQL_MODE = "NO_AUTO_VALUE_ON_ZERO";
 START TRANSACTION;